@@ -8,6 +8,7 @@ from pypsbuilder.psclasses import (
     PTsection,
     TXsection,
     PXsection,
+    ResultTable,
 )
 
 __all__ = (
@@ -20,6 +21,7 @@ __all__ = (
     "TXPS",
     "PXPS",
     "TCAPI",
+    "ResultTable",
 )
 
 __version__ = "2.2.0"
@@ -0,0 +1,8 @@
+"""Benchmarks of pypsbuilder hot paths.
+
+Complete suite is run by ``psbench`` command (see `suite`). Individual
+benchmarks could be run from repository root, e.g.::
+
+    $ python -m pypsbuilder.benchmarks.parser
+
+"""
@@ -0,0 +1,126 @@
+"""Benchmark of THERMOCALC output parsers.
+
+Compares `TCAPI.parse_logfile_new` on outputs read in advance with
+single-pass streaming parser reading files line by line, on univariant line
+outputs stored in examples/outputs. Outputs could be replicated to emulate
+long calculations.
+
+"""
+# author: Ondrej Lexa
+# website: petrol.natur.cuni.cz/~ondro
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pypsbuilder.psclasses import TCAPI, icseparator, read_lines, iter_icfile, iter_ptguesses
+
+examples = Path(__file__).resolve().parents[2] / 'examples' / 'outputs'
+"""Path: Example outputs in source tree. They are not installed with package."""
+encoding = 'mac-roman'
+
+
+def replicate(name, repeat, outdir, path=examples):
+    """Write log and ic files of example output repeated ``repeat`` times.
+
+    Returns:
+        tuple: paths to log and ic file
+    """
+    with (path / '{}-log.txt'.format(name)).open('r', encoding=encoding) as f:
+        output = f.read()
+    with (path / '{}-ic.txt'.format(name)).open('r', encoding=encoding) as f:
+        resic = f.read()
+    sep = '\n{}\n\n'.format(icseparator)
+    head, blocks = resic.split(sep, maxsplit=1)
+    pos = output.index(' P(kbar)')
+    loghead, logblocks = output[:pos], output[pos:]
+    logfile = Path(outdir) / '{}-log.txt'.format(name)
+    icfile = Path(outdir) / '{}-ic.txt'.format(name)
+    with logfile.open('w', encoding=encoding) as f:
+        f.write(loghead)
+        for _ in range(repeat):
+            f.write(logblocks if logblocks.endswith('\n') else logblocks + '\n')
+    with icfile.open('w', encoding=encoding) as f:
+        f.write(head)
+        for _ in range(repeat):
+            f.write(sep)
+            f.write(blocks.rstrip('\n') + '\n')
+    return logfile, icfile
+
+
+def run_parse(tc, logfile, icfile):
+    with logfile.open('r', encoding=encoding) as f:
+        output = f.read()
+    with icfile.open('r', encoding=encoding) as f:
+        resic = f.read()
+    status, variance, pts, res, output = tc.parse_logfile_new(output=output, resic=resic)
+    return len(res)
+
+
+def run_streaming(tc, logfile, icfile, use_mmap=False):
+    ptguesses = iter_ptguesses(read_lines(logfile, encoding, use_mmap))
+    n = 0
+    for (pt, variance, header, data), ptguess in zip(iter_icfile(read_lines(icfile, encoding, use_mmap)), ptguesses):
+        n += 1
+    return n
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """Return best time, peak traced memory and result of function call."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def run(names=('uni1', 'uni2', 'uni3'), repeat=1, path=examples):
+    """Run parser benchmark.
+
+    Returns:
+        list: dicts with name, parser, points, time (s) and peak memory (bytes)
+    """
+    tc = TCAPI(path)
+    runners = [('parse_logfile', run_parse, {}),
+               ('streaming', run_streaming, {}),
+               ('streaming-mmap', run_streaming, dict(use_mmap=True))]
+    results = []
+    with tempfile.TemporaryDirectory(prefix='pypsbuilder-') as outdir:
+        for name in names:
+            logfile, icfile = replicate(name, repeat, outdir, path=path)
+            for parser, func, kw in runners:
+                t, peak, npts = measure(func, tc, logfile, icfile, **kw)
+                results.append(dict(name=name, parser=parser, points=npts, time=t, peak=peak))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark THERMOCALC output parsers')
+    parser.add_argument('names', nargs='*', default=['uni1', 'uni2', 'uni3'],
+                        help='names of example outputs')
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='number of times output is replicated')
+    parser.add_argument('--path', type=Path, default=examples,
+                        help='directory with example outputs')
+    args = parser.parse_args()
+    missing = [name for name in args.names if not (args.path / '{}-ic.txt'.format(name)).exists()]
+    if missing:
+        parser.error('Example outputs {} not found in {}. Use --path with examples/outputs '
+                     'directory of pypsbuilder source tree.'.format(', '.join(missing), args.path))
+    print('{:8s} {:16s} {:>8s} {:>10s} {:>12s}'.format('output', 'parser', 'points', 'time [ms]', 'peak [kB]'))
+    for r in run(args.names, args.repeat, args.path):
+        print('{:8s} {:16s} {:8d} {:10.2f} {:12.1f}'.format(r['name'], r['parser'], r['points'], 1000 * r['time'], r['peak'] / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""Benchmark suite of pypsbuilder hot paths.
+
+Benchmarks use example outputs and synthetic pseudosections (see
+`pypsbuilder.benchmarks.synthetic`), so THERMOCALC is not needed. Example
+files are not installed with package, so examples directory of source tree
+is used (see ``--examples`` option). Results with timings and peak memory
+could be stored as JSON and compared with results of other commit::
+
+    $ psbench -o before.json
+    $ psbench -o after.json --compare before.json
+
+"""
+# author: Ondrej Lexa
+# website: petrol.natur.cuni.cz/~ondro
+
+import argparse
+import functools
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from pypsbuilder import __version__
+from pypsbuilder.psclasses import TCAPI
+from pypsbuilder.psexplorer import PTPS, GridData, GuessIndex, eval_expr
+from pypsbuilder.benchmarks.parser import examples, encoding, replicate, measure
+from pypsbuilder.benchmarks.synthetic import synthetic_section, synthetic_project, synthetic_grid
+
+sizes = dict(parser=(10, 100),
+             section=(6, 12),
+             grid=(50, 100, 200),
+             data=(50, 100),
+             interp=(30, 50),
+             project=(8,))
+quick_sizes = dict(parser=(10,),
+                   section=(4,),
+                   grid=(20, 50),
+                   data=(20,),
+                   interp=(20,),
+                   project=(4,))
+
+
+def bench_parse_logfile(ctx):
+    outputs = ctx['examples'] / 'outputs'
+    tc = TCAPI(outputs)
+    for repeat in ctx['sizes']['parser']:
+        logfile, icfile = replicate('uni2', repeat, ctx['tmpdir'], path=outputs)
+        output = logfile.read_text(encoding=encoding)
+        resic = icfile.read_text(encoding=encoding)
+        yield dict(points=51 * repeat), functools.partial(tc.parse_logfile_new, output=output, resic=resic)
+
+
+def bench_trim_uni(ctx):
+    def trim_all(ps):
+        for uid in ps.unilines:
+            ps.trim_uni(uid)
+    for n in ctx['sizes']['section']:
+        ps = synthetic_section(n, n)
+        yield dict(unilines=len(ps.unilines)), functools.partial(trim_all, ps)
+
+
+def bench_create_shapes(ctx):
+    for n in ctx['sizes']['section']:
+        ps = synthetic_section(n, n)
+        yield dict(unilines=len(ps.unilines)), ps.create_shapes
+
+
+def bench_guess_lookup(ctx):
+    def lookup_all(ps, unilists, keys, xs, ys):
+        index = GuessIndex(ps, unilists)
+        return [(index.nearest_inv(x, y), index.nearest_uni(x, y, key)) for x, y, key in zip(xs, ys, keys)]
+    rng = np.random.default_rng(0)
+    for n in ctx['sizes']['section']:
+        ps = synthetic_section(n, n)
+        shapes, unilists, log = ps.create_shapes()
+        xs = rng.uniform(*ps.xrange, 1000)
+        ys = rng.uniform(*ps.yrange, 1000)
+        keys = [key for key in shapes for i in range(1000 // len(shapes) + 1)][:1000]
+        yield dict(unilines=len(ps.unilines)), functools.partial(lookup_all, ps, unilists, keys, xs, ys)
+
+
+def bench_identify(ctx):
+    pt = ctx['project']()
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(*pt.xrange, 1000)
+    ys = rng.uniform(*pt.yrange, 1000)
+
+    def identify_all():
+        return [pt.identify(x, y) for x, y in zip(xs, ys)]
+    yield dict(points=len(xs)), identify_all
+
+
+def bench_identify_many(ctx):
+    pt = ctx['project']()
+    for n in ctx['sizes']['grid']:
+        grid = GridData(pt.sections[0], nx=n, ny=n)
+        yield dict(grid=n), functools.partial(pt.identify_many, grid.xg, grid.yg)
+
+
+def bench_create_masks(ctx):
+    pt = ctx['project']()
+    for n in ctx['sizes']['grid']:
+        pt.grids[0] = GridData(pt.sections[0], nx=n, ny=n)
+        yield dict(grid=n), pt.create_masks
+
+
+def bench_eval_expr(ctx):
+    pt = ctx['project']()
+    for n in ctx['sizes']['data']:
+        synthetic_grid(pt, n, n)
+        dt = pt.grids[0].results.phase_data('q')
+        yield dict(grid=n), functools.partial(eval_expr, 'x/(x+z)', dt)
+
+
+def bench_get_gridded(ctx):
+    pt = ctx['project']()
+    for n in ctx['sizes']['interp']:
+        synthetic_grid(pt, n, n)
+        pt.collect_all_data_keys()
+        if hasattr(pt, 'masks'):
+            del pt.masks
+        yield dict(grid=n), functools.partial(pt.get_gridded, 'x1', 'x')
+
+
+def bench_isopleths(ctx):
+    pt = ctx['project']()
+
+    def isopleths(pt):
+        pt.isopleths('x1', 'x')
+        plt.close('all')
+    for n in ctx['sizes']['interp']:
+        synthetic_grid(pt, n, n)
+        pt.collect_all_data_keys()
+        if hasattr(pt, 'masks'):
+            del pt.masks
+        yield dict(grid=n), functools.partial(isopleths, pt)
+
+
+def bench_project_load(ctx):
+    pt = ctx['project']()
+    yield dict(fields=len(pt.shapes)), functools.partial(PTPS, ctx['projfile'])
+
+
+def bench_project_save(ctx):
+    pt = ctx['project']()
+    n = ctx['sizes']['data'][0]
+    synthetic_grid(pt, n, n)
+    yield dict(grid=n), pt.save
+
+
+benchmarks = [('parse_logfile_new', bench_parse_logfile),
+              ('trim_uni', bench_trim_uni),
+              ('create_shapes', bench_create_shapes),
+              ('guess_lookup', bench_guess_lookup),
+              ('identify', bench_identify),
+              ('identify_many', bench_identify_many),
+              ('create_masks', bench_create_masks),
+              ('eval_expr', bench_eval_expr),
+              ('get_gridded', bench_get_gridded),
+              ('isopleths', bench_isopleths),
+              ('project_load', bench_project_load),
+              ('project_save', bench_project_save)]
+
+
+def commit():
+    """Return git commit of source tree or None."""
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(Path(__file__).parent),
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+        return out.stdout.decode().strip()
+    except Exception:
+        return None
+
+
+def run(names=None, repeat=3, quick=False, callback=None, examples=examples.parent):
+    """Run benchmarks.
+
+    Args:
+        names (list): Names or prefixes of benchmarks to run. Default all.
+        repeat (int): Number of repeats. Best time is reported. Default 3
+        quick (bool): Use small sizes, e.g. for CI. Default False
+        callback (function): When not None, called with every result as
+            soon as it is measured. Default None
+        examples (str, Path): Examples directory of source tree with outputs
+            and avgpelite subdirectories. Default examples of source tree.
+
+    Returns:
+        dict: meta with version, commit and platform info and results list
+        of dicts with name, params, time (s) and peak memory (bytes)
+    """
+    meta = dict(version=__version__, commit=commit(), python=platform.python_version(),
+                numpy=np.__version__, platform=platform.platform(),
+                datetime=datetime.now().isoformat(timespec='seconds'), quick=quick)
+    results = []
+    with tempfile.TemporaryDirectory(prefix='pypsbuilder-') as tmpdir:
+        ctx = dict(tmpdir=tmpdir, sizes=quick_sizes if quick else sizes, examples=Path(examples))
+        ctx['projfile'] = None
+
+        def project():
+            if ctx['projfile'] is None:
+                n = ctx['sizes']['project'][0]
+                ctx['projfile'] = synthetic_project(Path(tmpdir) / 'project', n, n,
+                                                    template=ctx['examples'] / 'avgpelite')
+            return PTPS(ctx['projfile'])
+        ctx['project'] = project
+        for name, bench in benchmarks:
+            if names and not any(name.startswith(n) for n in names):
+                continue
+            for params, func in bench(ctx):
+                t, peak, _ = measure(func, repeat=repeat)
+                results.append(dict(name=name, params=params, time=t, peak=peak))
+                if callback is not None:
+                    callback(results[-1])
+    return dict(meta=meta, results=results)
+
+
+def label(r):
+    return '{} {}'.format(r['name'], ' '.join('{}={}'.format(k, v) for k, v in r['params'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pypsbuilder hot paths')
+    parser.add_argument('names', nargs='*',
+                        help='names or prefixes of benchmarks to run')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='number of repeats (best time is reported)')
+    parser.add_argument('-o', '--output', type=str, default=None,
+                        help='JSON file to store results')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='JSON file with results to compare with')
+    parser.add_argument('--quick', action='store_true',
+                        help='small sizes for quick check')
+    parser.add_argument('--list', action='store_true',
+                        help='list available benchmarks')
+    parser.add_argument('--examples', type=Path, default=examples.parent,
+                        help='examples directory of pypsbuilder source tree')
+    args = parser.parse_args()
+    # deprecation warnings of dependencies would clutter report
+    warnings.simplefilter('ignore')
+    if args.list:
+        print('\n'.join(name for name, bench in benchmarks))
+        sys.exit(0)
+    if not all((args.examples / sub).is_dir() for sub in ('outputs', 'avgpelite')):
+        parser.error('Example files not found in {}. Use --examples with examples directory '
+                     'of pypsbuilder source tree.'.format(args.examples))
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = {label(r): r for r in json.load(f)['results']}
+
+    def show(r):
+        ref = baseline.get(label(r))
+        ratio = '{:8.2f}'.format(r['time'] / ref['time']) if ref else '{:>8s}'.format('-')
+        print('{:40s} {:12.2f} {:12.1f} {}'.format(label(r), 1000 * r['time'], r['peak'] / 1024, ratio), flush=True)
+
+    print('{:40s} {:>12s} {:>12s} {:>8s}'.format('benchmark', 'time [ms]', 'peak [kB]', 'ratio'))
+    report = run(args.names, repeat=args.repeat, quick=args.quick, callback=show, examples=args.examples)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print('Results stored in {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""Synthetic pseudosections for benchmarks.
+
+Section is regular lattice of ``nx`` x ``ny`` divariant fields. Field in
+row r and column c contains base phases together with phases x1..xc and
+y1..yr, so neighbouring fields differ by single phase and every lattice
+node is valid invariant point. Univariant lines are slightly curved and
+calculated beyond their invariant points, so they have to be trimmed.
+Compositions are smooth functions of temperature and pressure.
+
+"""
+# author: Ondrej Lexa
+# website: petrol.natur.cuni.cz/~ondro
+
+import gzip
+import pickle
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from pypsbuilder import __version__
+from pypsbuilder.psclasses import InvPoint, UniLine, PTsection, ResultTable
+from pypsbuilder.psexplorer import GridData
+from pypsbuilder.pstranscript import TCTranscript
+
+avgpelite = Path(__file__).resolve().parents[2] / 'examples' / 'avgpelite'
+"""Path: Example project in source tree. It is not installed with package."""
+base = ('q', 'mu', 'H2O')
+tcheader = ('THERMOCALC 3.50 running at 12.00 on Mon 1 Jan,2020\n'
+            'using tc-ds62.txt produced at 15.43 on Wed 7 Dec,2011\n'
+            'phases ranging over:\n'
+            'choose from: {}\n')
+
+
+def field_phases(r, c):
+    """Return phases of field in row r and column c."""
+    return set(base) | {'x{}'.format(i) for i in range(1, c + 1)} | {'y{}'.format(i) for i in range(1, r + 1)}
+
+
+def composition(phases, t, p):
+    """Return results for phases at arrays of temperatures and pressures."""
+    t, p = np.atleast_1d(t), np.atleast_1d(p)
+    res = ResultTable()
+    for tt, pp in zip(t, p):
+        data = {}
+        for k, phase in enumerate(sorted(phases)):
+            data[phase] = {'mode': 1 / len(phases),
+                           'x': 0.5 + 0.4 * np.sin(tt / 60 + k) * np.cos(pp / 3 + k),
+                           'z': 0.1 + 0.05 * np.cos(tt / 90 - k)}
+        res.append(dict(data=data, ptguess=['ptguess {:g} {:g}'.format(pp, tt)]))
+    return res
+
+
+def synthetic_section(nx=10, ny=10, npts=20, trange=(400., 700.), prange=(2., 12.)):
+    """Create PT section with nx*ny fields and 2*nx*ny - nx - ny univariant lines.
+
+    Args:
+        nx (int): Number of fields along temperature. Default 10
+        ny (int): Number of fields along pressure. Default 10
+        npts (int): Number of calculated points of univariant lines. Default 20
+        trange (tuple): Temperature range. Default (400, 700)
+        prange (tuple): Pressure range. Default (2, 12)
+
+    Returns:
+        PTsection: section with trimmed univariant lines
+    """
+    ps = PTsection(trange=trange, prange=prange)
+    ts = np.linspace(trange[0], trange[1], nx + 1)
+    ps_ = np.linspace(prange[0], prange[1], ny + 1)
+    dt, dp = ts[1] - ts[0], ps_[1] - ps_[0]
+    # extend boundary nodes out of section
+    ts[0], ts[-1] = ts[0] - dt / 2, ts[-1] + dt / 2
+    ps_[0], ps_[-1] = ps_[0] - dp / 2, ps_[-1] + dp / 2
+    nodes = {}
+    for i in range(1, ny):
+        for j in range(1, nx):
+            inv = InvPoint(phases=field_phases(i, j), out={'x{}'.format(j), 'y{}'.format(i)},
+                           variance=0, x=np.array([ts[j]]), y=np.array([ps_[i]]),
+                           results=composition(field_phases(i, j), ts[j], ps_[i]),
+                           output='Synthetic', manual=False)
+            nodes[(i, j)] = len(nodes) + 1
+            ps.add_inv(nodes[(i, j)], inv)
+    # calculated points overshoot invariant points by 20 %
+    s = np.linspace(-0.2, 1.2, npts)
+    wiggle = 0.05 * np.sin(np.pi * s)
+    uid = 1
+    for j in range(1, nx):
+        for r in range(ny):
+            y = ps_[r] + s * (ps_[r + 1] - ps_[r])
+            x = ts[j] + wiggle * dt
+            uni = UniLine(phases=field_phases(r, j), out={'x{}'.format(j)}, variance=1,
+                          x=x, y=y, results=composition(field_phases(r, j), x, y),
+                          output='Synthetic', begin=nodes.get((r, j), 0), end=nodes.get((r + 1, j), 0))
+            ps.add_uni(uid, uni)
+            uid += 1
+    for i in range(1, ny):
+        for c in range(nx):
+            x = ts[c] + s * (ts[c + 1] - ts[c])
+            y = ps_[i] + wiggle * dp
+            uni = UniLine(phases=field_phases(i, c), out={'y{}'.format(i)}, variance=1,
+                          x=x, y=y, results=composition(field_phases(i, c), x, y),
+                          output='Synthetic', begin=nodes.get((i, c), 0), end=nodes.get((i, c + 1), 0))
+            ps.add_uni(uid, uni)
+            uid += 1
+    for uid in ps.unilines:
+        ps.trim_uni(uid)
+    return ps
+
+
+def synthetic_grid(pt, nx=50, ny=50):
+    """Fill grid of explorer with synthetic compositions.
+
+    Args:
+        pt (PTPS): explorer of synthetic project
+        nx (int): Number of grid points along x. Default 50
+        ny (int): Number of grid points along y. Default 50
+    """
+    for ix, ps in pt.sections.items():
+        grid = GridData(ps, nx=nx, ny=ny)
+        keys = pt.identify_many(grid.xg, grid.yg)
+        for (r, c), key in np.ndenumerate(keys):
+            if key is not None:
+                grid.set_result(r, c, composition(key, grid.xg[r, c], grid.yg[r, c]))
+                grid.status[r, c] = 1
+                grid.delta[r, c] = 0.0
+        pt.grids[ix] = grid
+    pt.create_masks()
+
+
+def synthetic_project(workdir, nx=10, ny=10, npts=20, template=avgpelite):
+    """Create working directory with synthetic PT project.
+
+    Scriptfile, a-x file and dataset of avgpelite example are copied to
+    working directory and initial check of THERMOCALC is replayed by
+    stand-in executable (see `TCTranscript`), so project could be opened
+    by PTPS without THERMOCALC.
+
+    Args:
+        workdir (str, Path): Working directory. It is created when not exists.
+        nx (int): Number of fields along temperature. Default 10
+        ny (int): Number of fields along pressure. Default 10
+        npts (int): Number of calculated points of univariant lines. Default 20
+        template (str, Path): Directory with avgpelite example. Default
+            examples/avgpelite of source tree.
+
+    Returns:
+        Path: path to project file
+    """
+    workdir = Path(workdir).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    for f in Path(template).iterdir():
+        shutil.copy(str(f), str(workdir))
+    ps = synthetic_section(nx=nx, ny=ny, npts=npts)
+    phases = sorted(field_phases(ny - 1, nx - 1))
+    transcript = TCTranscript(workdir / 'transcript')
+    transcript.add(workdir, b'\nkill\n\n', tcheader.format(' '.join(phases)).encode('mac-roman'))
+    transcript.install(workdir)
+    shapes, unilists, log = ps.create_shapes()
+    data = {'selphases': [],
+            'out': [],
+            'section': ps,
+            'tcversion': tcheader.splitlines()[0],
+            'workdir': str(workdir),
+            'bulk': [],
+            'variance': {key: 2 for key in shapes},
+            'datetime': datetime.now(),
+            'version': __version__}
+    projfile = workdir / 'synthetic.ptb'
+    with gzip.open(str(projfile), 'wb') as stream:
+        pickle.dump(data, stream)
+    return projfile
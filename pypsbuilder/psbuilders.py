@@ -11,6 +11,7 @@ try:
 except ImportError:
   import pickle
 import gzip
+import hashlib
 from pathlib import Path
 from datetime import datetime
 import itertools
@@ -281,7 +282,7 @@ class BuildersBase(QtWidgets.QMainWindow):
                 if item.checkState() == QtCore.Qt.Checked:
                     out.append(item.text())
             # reread script file
-            tc = TCAPI(self.tc.workdir)
+            tc = TCAPI(self.tc.workdir, lazy=False)
             if tc.OK:
                 self.tc = tc
                 # select phases
@@ -542,9 +543,7 @@ class BuildersBase(QtWidgets.QMainWindow):
                             inv.phases.remove(old_phase)
                             inv.phases.add(new_phase)
                             if not inv.manual:
-                                for res in inv.results:
-                                    if old_phase in res['data']:
-                                        res['data'][new_phase] = res['data'].pop(old_phase)
+                                inv.results.rename_phase(old_phase, new_phase)
                         if old_phase in inv.out:
                             inv.out.remove(old_phase)
                             inv.out.add(new_phase)
@@ -553,9 +552,7 @@ class BuildersBase(QtWidgets.QMainWindow):
                             uni.phases.remove(old_phase)
                             uni.phases.add(new_phase)
                             if not uni.manual:
-                                for res in uni.results:
-                                    if old_phase in res['data']:
-                                        res['data'][new_phase] = res['data'].pop(old_phase)
+                                uni.results.rename_phase(old_phase, new_phase)
                         if old_phase in uni.out:
                             uni.out.remove(old_phase)
                             uni.out.add(new_phase)
@@ -998,7 +995,7 @@ class BuildersBase(QtWidgets.QMainWindow):
         if len(idx) > 1:
             uni._x = uni._x[idx]
             uni._y = uni._y[idx]
-            uni.results = [r for ix, r in enumerate(uni.results) if ix in idx]
+            uni.results = uni.results[idx]
             self.ps.trim_uni(uni.id)
             self.changed = True
             self.plot()
@@ -1483,6 +1480,91 @@ class BuildersBase(QtWidgets.QMainWindow):
         else:
             self.statusBar().showMessage('Project is not yet initialized.')
 
+    def explore_uni(self, uni, candidate, **kwargs):
+        """Search for invariant points on univariant line.
+
+        All candidates are calculated concurrently (see `TCAPI.explore_uni`)
+        and listed in textOutput as soon as they are calculated.
+
+        Args:
+            uni (UniLine): univariant line
+            candidate (function): returns x, y of calculated candidate and
+                whether it is within section, from parsed results
+            **kwargs: passed to `TCAPI.explore_uni`
+        """
+        cand, out_section = [], []
+        line = uni._shape()
+        # use guesses of invariant point when asked
+        if uni.connected == 1 and self.checkUseInvGuess.isChecked():
+            inv_id = sorted([uni.begin, uni.end])[1]
+            kwargs['guesses'] = self.ps.invpoints[inv_id].ptguess()
+
+        def found(phases, out, res):
+            if res[0] == 'ok':
+                inv = InvPoint(phases=phases, out=out)
+                isnew, id = self.ps.getidinv(inv)
+                if isnew:
+                    exists, inv_id = '', ''
+                else:
+                    exists, inv_id = '*', str(id)
+                x, y, inside = candidate(res)
+                if inside:
+                    cand.append((line.project(Point(x, y)), x, y, exists, ' '.join(inv.out), inv_id))
+                else:
+                    out_section.append((x, y, exists, ' '.join(inv.out), inv_id))
+                self.show_candidates(cand, out_section)
+            # only repaint, user actions must not drive THERMOCALC during search
+            QtWidgets.QApplication.processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
+
+        # project working directory is used by single worker pool
+        self.setEnabled(False)
+        try:
+            self.tc.explore_uni(uni.phases, uni.out, pool=self.explore_pool(), callback=found,
+                                excess=self.ps.excess, **kwargs)
+        finally:
+            self.setEnabled(True)
+        if cand:
+            self.statusBar().showMessage('Searching done. Found {} invariant points.'.format(len(cand)))
+        elif out_section:
+            self.statusBar().showMessage('Searching done. Found {} invariant points and {} out of section.'.format(len(cand), len(out_section)))
+        else:
+            self.statusBar().showMessage('No invariant points found.')
+
+    def explore_pool(self):
+        """Return pool of worker directories used by `explore_uni`.
+
+        Pool is staged once and reused by following searches, so only
+        changed scriptfile is copied to workers. New pool is staged when
+        project is changed or when content of prefs file, a-x file or
+        dataset changes.
+        """
+        digests = [hashlib.sha256(f.read_bytes()).hexdigest() if f.exists() else None
+                   for f in (self.tc.prefsfile, self.tc.axfile, self.tc.datasetfile)]
+        pool = getattr(self, '_explore_pool', None)
+        if pool is None or pool.tc is not self.tc or digests != self._explore_digests:
+            if pool is not None:
+                pool.close()
+            workers = min(os.cpu_count() or 1, len(self.tc.phases))
+            pool = self.tc.session(workers=workers)
+            self._explore_pool = pool
+            self._explore_digests = digests
+        return pool
+
+    def show_candidates(self, cand, out_section):
+        """Show invariant points found by `explore_uni` in textOutput."""
+        txt = ''
+        n_format = '{:10.4f}{:10.4f}{:>2}{:>8}{:>6}\n'
+        if cand:
+            txt += '         {}         {} E     Out   Inv\n'.format(self.ps.x_var, self.ps.y_var)
+            for cc in sorted(cand):
+                txt += n_format.format(*cc[1:])
+        elif out_section:
+            txt += 'Solutions with single point (need increase number of steps)\n'
+            txt += '         T         p E     Out   Inv\n'
+            for cc in out_section:
+                txt += n_format.format(*cc)
+        self.textOutput.setPlainText(txt)
+
     def show_topology(self):
         if self.ready:
             if NX_OK:
@@ -1588,7 +1670,7 @@ class PTBuilder(BuildersBase, Ui_PTBuilder):
                                               os.path.expanduser('~'),
                                               qd.ShowDirsOnly)
         if workdir:
-            tc = TCAPI(workdir)
+            tc = TCAPI(workdir, lazy=False)
             if tc.OK:
                 self.tc = tc
                 self.ps = PTsection(trange=self.tc.trange,
@@ -1643,7 +1725,7 @@ class PTBuilder(BuildersBase, Ui_PTBuilder):
                         workdir = active
                 QtWidgets.QApplication.processEvents()
                 QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-                tc = TCAPI(workdir)
+                tc = TCAPI(workdir, lazy=False)
                 if tc.OK:
                     self.tc = tc
                     self.ps = PTsection(trange=data['section'].xrange,
@@ -1734,7 +1816,7 @@ class PTBuilder(BuildersBase, Ui_PTBuilder):
                         workdir = active
                 QtWidgets.QApplication.processEvents()
                 QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-                tc = TCAPI(workdir)
+                tc = TCAPI(workdir, lazy=False)
                 if tc.OK:
                     self.tc = tc
                     self.ps = PTsection(trange=data['trange'],
@@ -1861,16 +1943,9 @@ class PTBuilder(BuildersBase, Ui_PTBuilder):
         if self.unisel.hasSelection():
             idx = self.unisel.selectedIndexes()
             uni = self.ps.unilines[self.unimodel.data(idx[0])]
-            phases = uni.phases
-            out = uni.out
             self.statusBar().showMessage('Searching for invariant points...')
             QtWidgets.QApplication.processEvents()
             QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-            # set guesses temporarily when asked
-            if uni.connected == 1 and self.checkUseInvGuess.isChecked():
-                inv_id = sorted([uni.begin, uni.end])[1]
-                old_guesses = self.tc.update_scriptfile(guesses=self.ps.invpoints[inv_id].ptguess(), get_old_guesses=True)
-            # Try out from phases
             extend = self.spinOver.value()
             trange = self.ax.get_xlim()
             ts = extend * (trange[1] - trange[0]) / 100
@@ -1878,51 +1953,15 @@ class PTBuilder(BuildersBase, Ui_PTBuilder):
             prange = self.ax.get_ylim()
             ps = extend * (prange[1] - prange[0]) / 100
             prange = (max(prange[0] - ps, 0.01), prange[1] + ps)
-            cand = []
-            line = uni._shape()
-            for ophase in phases.difference(out).difference(self.ps.excess):
-                nout = out.union(set([ophase]))
-                self.tc.calc_pt(phases, nout, prange = prange, trange=trange)
-                status, variance, pts, res, output = self.tc.parse_logfile()
-                if status == 'ok':
-                    inv = InvPoint(phases=phases, out=nout, variance=variance,
-                                   y=pts[0], x=pts[1], output=output, results=res)
-                    isnew, id = self.ps.getidinv(inv)
-                    if isnew:
-                        exists, inv_id = '', ''
-                    else:
-                        exists, inv_id = '*', str(id)
-                    cand.append((line.project(Point(inv._x, inv._y)), inv._x, inv._y, exists, ' '.join(inv.out), inv_id))
 
-            for ophase in set(self.tc.phases).difference(self.ps.excess).difference(phases):
-                nphases = phases.union(set([ophase]))
-                nout = out.union(set([ophase]))
-                self.tc.calc_pt(nphases, nout, prange = prange, trange=trange)
-                status, variance, pts, res, output = self.tc.parse_logfile()
-                if status == 'ok':
-                    inv = InvPoint(phases=nphases, out=nout, variance=variance,
-                                   y=pts[0], x=pts[1], output=output, results=res)
-                    isnew, id = self.ps.getidinv(inv)
-                    if isnew:
-                        exists, inv_id = '', ''
-                    else:
-                        exists, inv_id = '*', str(id)
-                    cand.append((line.project(Point(inv._x, inv._y)), inv._x, inv._y, exists, ' '.join(inv.out), inv_id))
-
-            # set original ptguesses when asked
-            if uni.connected == 1 and self.checkUseInvGuess.isChecked():
-                self.tc.update_scriptfile(guesses=old_guesses)
-            QtWidgets.QApplication.restoreOverrideCursor()
-            if cand:
-                txt = '         {}         {} E     Out   Inv\n'.format(self.ps.x_var, self.ps.y_var)
-                n_format = '{:10.4f}{:10.4f}{:>2}{:>8}{:>6}\n'
-                for cc in sorted(cand):
-                    txt += n_format.format(*cc[1:])
+            def candidate(results):
+                status, variance, pts, res, output = results
+                return pts[1][0], pts[0][0], True
 
-                self.textOutput.setPlainText(txt)
-                self.statusBar().showMessage('Searching done. Found {} invariant points.'.format(len(cand)))
-            else:
-                self.statusBar().showMessage('No invariant points found.')
+            try:
+                self.explore_uni(uni, candidate, calc='pt', prange=prange, trange=trange)
+            finally:
+                QtWidgets.QApplication.restoreOverrideCursor()
 
     def dogminer(self, event):
         self.cid.onmove(event)
@@ -2221,7 +2260,7 @@ class TXBuilder(BuildersBase, Ui_TXBuilder):
                                               os.path.expanduser('~'),
                                               qd.ShowDirsOnly)
         if workdir:
-            tc = TCAPI(workdir)
+            tc = TCAPI(workdir, lazy=False)
             if tc.OK:
                 self.tc = tc
                 self.ps = TXsection(trange=self.tc.trange,
@@ -2274,7 +2313,7 @@ class TXBuilder(BuildersBase, Ui_TXBuilder):
                         workdir = active
                 QtWidgets.QApplication.processEvents()
                 QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-                tc = TCAPI(workdir)
+                tc = TCAPI(workdir, lazy=False)
                 if tc.OK:
                     self.tc = tc
                     self.ps = TXsection(trange=data['section'].xrange,
@@ -2430,16 +2469,9 @@ class TXBuilder(BuildersBase, Ui_TXBuilder):
         if self.unisel.hasSelection():
             idx = self.unisel.selectedIndexes()
             uni = self.ps.unilines[self.unimodel.data(idx[0])]
-            phases = uni.phases
-            out = uni.out
             self.statusBar().showMessage('Searching for invariant points...')
             QtWidgets.QApplication.processEvents()
             QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-            # set guesses temporarily when asked
-            if uni.connected == 1 and self.checkUseInvGuess.isChecked():
-                inv_id = sorted([uni.begin, uni.end])[1]
-                old_guesses = self.tc.update_scriptfile(guesses=self.ps.invpoints[inv_id].ptguess(), get_old_guesses=True)
-            # Try out from phases
             extend = self.spinOver.value()
             trange = self.ax.get_xlim()
             ts = extend * (trange[1] - trange[0]) / 100
@@ -2449,93 +2481,34 @@ class TXBuilder(BuildersBase, Ui_TXBuilder):
             crange = self.ax.get_ylim()
             cs = extend * (crange[1] - crange[0]) / 100
             crange = (crange[0] - cs, crange[1] + cs)
-            # change bulk
+            # change bulk, so workers are staged with zoomed composition
             bulk = self.tc.interpolate_bulk(crange)
             self.tc.update_scriptfile(bulk=bulk, xsteps=self.spinSteps.value(), xvals=crange)
 
-            out_section = []
-            cand = []
-            line = uni._shape()
-            for ophase in phases.difference(out).difference(self.ps.excess):
-                nout = out.union(set([ophase]))
-                self.tc.calc_tx(phases, nout, prange = prange, trange=trange)
-                status, variance, pts, ptcoords, res, output = self.tc.parse_logfile(tx=True)
-                inv = InvPoint(phases=phases, out=nout)
-                isnew, id = self.ps.getidinv(inv)
-                if status == 'ok':
-                    if isnew:
-                        exists, inv_id = '', ''
-                    else:
-                        exists, inv_id = '*', str(id)
-                    if len(res) > 1:
-                        # rescale pts from zoomed composition
-                        pts[0] = crange[0] + pts[0] * (crange[1] - crange[0])
-                        pm = (self.tc.prange[0] + self.tc.prange[1]) / 2
-                        splt = interp1d(ptcoords[0], ptcoords[1], bounds_error=False, fill_value=np.nan)
-                        splx = interp1d(ptcoords[0], pts[0], bounds_error=False, fill_value=np.nan)
-                        Xm = splt([pm])
-                        Ym = splx([pm])
-                        if not np.isnan(Xm[0]):
-                            cand.append((line.project(Point(Xm[0], Ym[0])), Xm[0], Ym[0], exists, ' '.join(inv.out), inv_id))
-                        else:
-                            ix = abs(ptcoords[0] - pm).argmin()
-                            out_section.append((ptcoords[1][ix], ptcoords[0][ix], exists, ' '.join(inv.out), inv_id))
-                    else:
-                        out_section.append((ptcoords[1][0], ptcoords[0][0], exists, ' '.join(inv.out), inv_id))
-
-            for ophase in set(self.tc.phases).difference(self.ps.excess).difference(phases):
-                nphases = phases.union(set([ophase]))
-                nout = out.union(set([ophase]))
-                self.tc.calc_tx(nphases, nout, prange = prange, trange=trange)
-                status, variance, pts, ptcoords, res, output = self.tc.parse_logfile(tx=True)
-                inv = InvPoint(phases=nphases, out=nout)
-                isnew, id = self.ps.getidinv(inv)
-                if status == 'ok':
-                    if isnew:
-                        exists, inv_id = '', ''
-                    else:
-                        exists, inv_id = '*', str(id)
-                    if len(res) > 1:
-                        # rescale pts from zoomed composition
-                        pts[0] = crange[0] + pts[0] * (crange[1] - crange[0])
-                        pm = (self.tc.prange[0] + self.tc.prange[1]) / 2
-                        splt = interp1d(ptcoords[0], ptcoords[1], bounds_error=False, fill_value=np.nan)
-                        splx = interp1d(ptcoords[0], pts[0], bounds_error=False, fill_value=np.nan)
-                        Xm = splt([pm])
-                        Ym = splx([pm])
-                        if not np.isnan(Xm[0]):
-                            cand.append((line.project(Point(Xm[0], Ym[0])), Xm[0], Ym[0], exists, ' '.join(inv.out), inv_id))
-                        else:
-                            ix = abs(ptcoords[0] - pm).argmin()
-                            out_section.append((ptcoords[1][ix], ptcoords[0][ix], exists, ' '.join(inv.out), inv_id))
+            def candidate(results):
+                status, variance, pts, ptcoords, res, output = results
+                if len(res) > 1:
+                    # rescale pts from zoomed composition
+                    pts[0] = crange[0] + pts[0] * (crange[1] - crange[0])
+                    pm = (self.tc.prange[0] + self.tc.prange[1]) / 2
+                    splt = interp1d(ptcoords[0], ptcoords[1], bounds_error=False, fill_value=np.nan)
+                    splx = interp1d(ptcoords[0], pts[0], bounds_error=False, fill_value=np.nan)
+                    Xm = splt([pm])
+                    Ym = splx([pm])
+                    if not np.isnan(Xm[0]):
+                        return Xm[0], Ym[0], True
                     else:
-                        out_section.append((ptcoords[1][0], ptcoords[0][0], exists, ' '.join(inv.out), inv_id))
-
-            # set original ptguesses when asked
-            if uni.connected == 1 and self.checkUseInvGuess.isChecked():
-                self.tc.update_scriptfile(guesses=old_guesses)
-            # restore bulk
-            self.tc.update_scriptfile(bulk=self.bulk, xsteps=self.spinSteps.value())
-            QtWidgets.QApplication.restoreOverrideCursor()
-            txt = ''
-            n_format = '{:10.4f}{:10.4f}{:>2}{:>8}{:>6}\n'
-            if cand:
-                txt += '         {}         {} E     Out   Inv\n'.format(self.ps.x_var, self.ps.y_var)
-                for cc in sorted(cand):
-                    txt += n_format.format(*cc[1:])
-
-                self.textOutput.setPlainText(txt)
-                self.statusBar().showMessage('Searching done. Found {} invariant points.'.format(len(cand)))
-            elif out_section:
-                txt += 'Solutions with single point (need increase number of steps)\n'
-                txt += '         T         p E     Out   Inv\n'.format(self.ps.x_var, self.ps.y_var)
-                for cc in out_section:
-                    txt += n_format.format(*cc)
+                        ix = abs(ptcoords[0] - pm).argmin()
+                        return ptcoords[1][ix], ptcoords[0][ix], False
+                else:
+                    return ptcoords[1][0], ptcoords[0][0], False
 
-                self.textOutput.setPlainText(txt)
-                self.statusBar().showMessage('Searching done. Found {} invariant points and {} out of section.'.format(len(cand), len(out_section)))
-            else:
-                self.statusBar().showMessage('No invariant points found.')
+            try:
+                self.explore_uni(uni, candidate, calc='tx', prange=prange, trange=trange)
+            finally:
+                # restore bulk
+                self.tc.update_scriptfile(bulk=self.bulk, xsteps=self.spinSteps.value())
+                QtWidgets.QApplication.restoreOverrideCursor()
 
     def dogminer(self, event):
         self.cid.onmove(event)
@@ -2860,7 +2833,7 @@ class PXBuilder(BuildersBase, Ui_PXBuilder):
                                               os.path.expanduser('~'),
                                               qd.ShowDirsOnly)
         if workdir:
-            tc = TCAPI(workdir)
+            tc = TCAPI(workdir, lazy=False)
             if tc.OK:
                 self.tc = tc
                 self.ps = PXsection(prange=self.tc.prange,
@@ -2913,7 +2886,7 @@ class PXBuilder(BuildersBase, Ui_PXBuilder):
                         workdir = active
                 QtWidgets.QApplication.processEvents()
                 QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-                tc = TCAPI(workdir)
+                tc = TCAPI(workdir, lazy=False)
                 if tc.OK:
                     self.tc = tc
                     self.ps = PXsection(prange=data['section'].yrange,
@@ -3065,20 +3038,13 @@ class PXBuilder(BuildersBase, Ui_PXBuilder):
             self.pminEdit.setText(fmt(self.tc.prange[0]))
             self.pmaxEdit.setText(fmt(self.tc.prange[1]))
 
-    def uni_explore(self): ## TODO:
+    def uni_explore(self):
         if self.unisel.hasSelection():
             idx = self.unisel.selectedIndexes()
             uni = self.ps.unilines[self.unimodel.data(idx[0])]
-            phases = uni.phases
-            out = uni.out
             self.statusBar().showMessage('Searching for invariant points...')
             QtWidgets.QApplication.processEvents()
             QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-            # set guesses temporarily when asked
-            if uni.connected == 1 and self.checkUseInvGuess.isChecked():
-                inv_id = sorted([uni.begin, uni.end])[1]
-                old_guesses = self.tc.update_scriptfile(guesses=self.ps.invpoints[inv_id].ptguess(), get_old_guesses=True)
-            # Try out from phases
             extend = self.spinOver.value()
             trange = (max(self.tc.trange[0] - self.rangeSpin.value() / 2, 11),
                       self.tc.trange[1] + self.rangeSpin.value() / 2)
@@ -3088,93 +3054,34 @@ class PXBuilder(BuildersBase, Ui_PXBuilder):
             crange = self.ax.get_xlim()
             cs = extend * (crange[1] - crange[0]) / 100
             crange = (crange[0] - cs, crange[1] + cs)
-            # change bulk
+            # change bulk, so workers are staged with zoomed composition
             bulk = self.tc.interpolate_bulk(crange)
             self.tc.update_scriptfile(bulk=bulk, xsteps=self.spinSteps.value(), xvals=crange)
 
-            out_section = []
-            cand = []
-            line = uni._shape()
-            for ophase in phases.difference(out).difference(self.ps.excess):
-                nout = out.union(set([ophase]))
-                self.tc.calc_px(phases, nout, prange = prange, trange=trange)
-                status, variance, pts, ptcoords, res, output = self.tc.parse_logfile(px=True)
-                inv = InvPoint(phases=phases, out=nout)
-                isnew, id = self.ps.getidinv(inv)
-                if status == 'ok':
-                    if isnew:
-                        exists, inv_id = '', ''
-                    else:
-                        exists, inv_id = '*', str(id)
-                    if len(res) > 1:
-                        # rescale pts from zoomed composition
-                        pts[1] = crange[0] + pts[1] * (crange[1] - crange[0])
-                        tm = (self.tc.trange[0] + self.tc.trange[1]) / 2
-                        splt = interp1d(ptcoords[1], ptcoords[0], bounds_error=False, fill_value=np.nan)
-                        splx = interp1d(ptcoords[1], pts[1], bounds_error=False, fill_value=np.nan)
-                        Ym = splt([tm])
-                        Xm = splx([tm])
-                        if not np.isnan(Ym[0]):
-                            cand.append((line.project(Point(Xm[0], Ym[0])), Xm[0], Ym[0], exists, ' '.join(inv.out), inv_id))
-                        else:
-                            ix = abs(ptcoords[1] - tm).argmin()
-                            out_section.append((ptcoords[1][ix], ptcoords[0][ix], exists, ' '.join(inv.out), inv_id))
-                    else:
-                        out_section.append((ptcoords[1][0], ptcoords[0][0], exists, ' '.join(inv.out), inv_id))
-
-            for ophase in set(self.tc.phases).difference(self.ps.excess).difference(phases):
-                nphases = phases.union(set([ophase]))
-                nout = out.union(set([ophase]))
-                self.tc.calc_px(nphases, nout, prange = prange, trange=trange)
-                status, variance, pts, ptcoords, res, output = self.tc.parse_logfile(px=True)
-                inv = InvPoint(phases=nphases, out=nout)
-                isnew, id = self.ps.getidinv(inv)
-                if status == 'ok':
-                    if isnew:
-                        exists, inv_id = '', ''
-                    else:
-                        exists, inv_id = '*', str(id)
-                    if len(res) > 1:
-                        # rescale pts from zoomed composition
-                        pts[1] = crange[0] + pts[1] * (crange[1] - crange[0])
-                        tm = (self.tc.trange[0] + self.tc.trange[1]) / 2
-                        splt = interp1d(ptcoords[1], ptcoords[0], bounds_error=False, fill_value=np.nan)
-                        splx = interp1d(ptcoords[1], pts[1], bounds_error=False, fill_value=np.nan)
-                        Ym = splt([tm])
-                        Xm = splx([tm])
-                        if not np.isnan(Ym[0]):
-                            cand.append((line.project(Point(Xm[0], Ym[0])), Xm[0], Ym[0], exists, ' '.join(inv.out), inv_id))
-                        else:
-                            ix = abs(ptcoords[1] - tm).argmin()
-                            out_section.append((ptcoords[1][ix], ptcoords[0][ix], exists, ' '.join(inv.out), inv_id))
+            def candidate(results):
+                status, variance, pts, ptcoords, res, output = results
+                if len(res) > 1:
+                    # rescale pts from zoomed composition
+                    pts[1] = crange[0] + pts[1] * (crange[1] - crange[0])
+                    tm = (self.tc.trange[0] + self.tc.trange[1]) / 2
+                    splt = interp1d(ptcoords[1], ptcoords[0], bounds_error=False, fill_value=np.nan)
+                    splx = interp1d(ptcoords[1], pts[1], bounds_error=False, fill_value=np.nan)
+                    Ym = splt([tm])
+                    Xm = splx([tm])
+                    if not np.isnan(Ym[0]):
+                        return Xm[0], Ym[0], True
                     else:
-                        out_section.append((ptcoords[1][0], ptcoords[0][0], exists, ' '.join(inv.out), inv_id))
-
-            # set original ptguesses when asked
-            if uni.connected == 1 and self.checkUseInvGuess.isChecked():
-                self.tc.update_scriptfile(guesses=old_guesses)
-            # restore bulk
-            self.tc.update_scriptfile(bulk=self.bulk, xsteps=self.spinSteps.value())
-            QtWidgets.QApplication.restoreOverrideCursor()
-            txt = ''
-            n_format = '{:10.4f}{:10.4f}{:>2}{:>8}{:>6}\n'
-            if cand:
-                txt += '         {}         {} E     Out   Inv\n'.format(self.ps.x_var, self.ps.y_var)
-                for cc in sorted(cand):
-                    txt += n_format.format(*cc[1:])
-
-                self.textOutput.setPlainText(txt)
-                self.statusBar().showMessage('Searching done. Found {} invariant points.'.format(len(cand)))
-            elif out_section:
-                txt += 'Solutions with single point (need increase number of steps)\n'
-                txt += '         T         p E     Out   Inv\n'.format(self.ps.x_var, self.ps.y_var)
-                for cc in out_section:
-                    txt += n_format.format(*cc)
+                        ix = abs(ptcoords[1] - tm).argmin()
+                        return ptcoords[1][ix], ptcoords[0][ix], False
+                else:
+                    return ptcoords[1][0], ptcoords[0][0], False
 
-                self.textOutput.setPlainText(txt)
-                self.statusBar().showMessage('Searching done. Found {} invariant points and {} out of section.'.format(len(cand), len(out_section)))
-            else:
-                self.statusBar().showMessage('No invariant points found.')
+            try:
+                self.explore_uni(uni, candidate, calc='px', prange=prange, trange=trange)
+            finally:
+                # restore bulk
+                self.tc.update_scriptfile(bulk=self.bulk, xsteps=self.spinSteps.value())
+                QtWidgets.QApplication.restoreOverrideCursor()
 
     def dogminer(self, event):
         self.cid.onmove(event)
@@ -17,9 +17,24 @@ try:
 except ImportError:
     import pickle
 import gzip
+import hashlib
+import json
+import asyncio
+import io
+import mmap
 import subprocess
 import itertools
 import re
+import copy
+import shutil
+import functools
+import threading
+import weakref
+import time
+import tempfile
+import queue
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from collections import OrderedDict
 
@@ -28,9 +43,39 @@ import matplotlib.pyplot as plt
 from shapely.geometry import LineString, Point
 from shapely.ops import polygonize, linemerge, unary_union
 
+from .pstranscript import TCTranscript
+
 popen_kw = dict(stdout=subprocess.PIPE, stdin=subprocess.PIPE,
                 stderr=subprocess.STDOUT, universal_newlines=False)
 
+
+@contextmanager
+def nospan():
+    """Context manager doing nothing, used when timing is disabled."""
+    yield
+
+
+
+def run_coroutine(coro):
+    """Run coroutine in new event loop and return its result.
+
+    When event loop is already running in current thread (e.g. in Jupyter
+    notebook), loop could not be nested, so coroutine runs in new event loop
+    of separate thread and this function blocks until it is finished.
+    """
+    def run():
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return run()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run).result()
+
 polymorphs = [{'sill', 'and'}, {'ky', 'and'}, {'sill', 'ky'}, {'q', 'coe'}, {'diam', 'gph'}]
 """list: List of two-element sets containing polymorphs."""
 
@@ -46,6 +91,207 @@ class TCError(Exception):
     pass
 
 
+icseparator = '=' * 59
+"""str: Line separating calculated points in THERMOCALC ic file."""
+
+
+def read_lines(path, encoding, use_mmap=False):
+    """Generator yielding lines of text file without reading it at once.
+
+    Args:
+        path (pathlib.Path): File to read.
+        encoding (str): Text encoding of file.
+        use_mmap (bool): When True, file is memory mapped and lines are decoded
+            one by one. Default False.
+    """
+    if use_mmap:
+        with path.open('rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for ln in iter(mm.readline, b''):
+                    yield ln.decode(encoding)
+    else:
+        with path.open('r', encoding=encoding) as f:
+            yield from f
+
+
+def _keep_lines(lines, kept):
+    # pass lines through and keep them in list
+    for ln in lines:
+        kept.append(ln)
+        yield ln
+
+
+def iter_icfile(lines, tx=False, px=False):
+    """Single-pass parser of THERMOCALC ic file.
+
+    Lines are consumed one by one and each calculated point is yielded as soon
+    as its block is finished, so the whole file is never held in memory.
+
+    Args:
+        lines (iterable): Lines of ic file.
+        tx (bool): True for T-X calculations. Default False.
+        px (bool): True for P-X calculations. Default False.
+
+    Yields:
+        tuple: (pt, variance, header, data), where pt is list [p, T],
+        variance is parsed variance, header is step number for T-X and P-X
+        calculations (None otherwise) and data is dict with keys of phases
+        and each contain dict of values.
+    """
+    ptpat = re.compile(r'(?<=\{)(.*?)(?=\})')
+    varpat = re.compile(r'(?<=var = )(.*?)(?=\ )')
+    emprops = ['ideal', 'gamma', 'activity', 'prop', 'mu', 'RTlna']
+    block = None
+    for ln in itertools.chain(lines, [icseparator]):
+        ln = ln.rstrip('\r\n')
+        if ln == icseparator:
+            if block is not None:
+                if not block['mode']:
+                    # For some reasons there is no mode in output
+                    return
+                yield block['pt'], block['variance'], block['header'], _ordered_icdata(block)
+            block = dict(pt=None, variance=-1, header=None, data={}, mode=[])
+            section, nline, pending = None, 0, None
+            continue
+        if block is None:
+            continue
+        if ln == '':
+            nline = 0
+            continue
+        tokens = ln.split()
+        data = block['data']
+        if nline == 0:
+            # identify new section
+            if section is None:
+                section = 'header'
+            elif tokens[0] == 'mode':
+                section = 'mode'
+            elif ln == 'site fractions':
+                section = 'site'
+            elif ln == 'oxide compositions':
+                section = 'oxide'
+            elif section == 'header':
+                section = 'ax'
+            elif section == 'oxide':
+                section = 'oxphases'
+            elif section == 'mode':
+                section = 'factor'
+            elif section == 'factor':
+                section = 'props'
+            elif section == 'props':
+                section = 'sys'
+            elif section in ['sys', 'em']:
+                section = 'mu' if len(tokens) == 2 else 'em'
+            pending, emphase = None, None
+        nline += 1
+        # endmember tables are most frequent
+        if section == 'em':
+            if tokens[0] == 'ideal':
+                continue
+            if emphase is None:
+                emphase = tokens.pop(0)
+            key = '{}({})'.format(emphase, tokens[0])
+            data.setdefault(key, {}).update(zip(emprops, map(float, tokens[1:])))
+        elif section == 'header':
+            m = ptpat.search(ln)
+            if m is not None and block['pt'] is None:
+                block['pt'] = [float(n) for n in m.group().split(', ')]
+            m = varpat.search(ln)
+            if m is not None and block['variance'] == -1:
+                block['variance'] = int(m.group().replace(';', ''))
+        elif section in ['ax', 'site']:
+            if section == 'site' and nline == 1:
+                continue
+            if pending is None:
+                pending = tokens
+            else:
+                phase, ccs = pending[0], pending[1:]
+                if section == 'ax':
+                    suffix = '({})'.format(phase)
+                    ccs = [cc.replace(suffix, '') for cc in ccs]
+                data.setdefault(phase, {}).update(zip(ccs, map(float, tokens)))
+                pending = None
+        elif section in ['oxide', 'oxphases']:
+            if section == 'oxide' and nline < 4:
+                # title, oxides and bulk composition
+                if nline == 2:
+                    ccs = tokens
+                continue
+            data.setdefault(tokens[0], {}).update(zip(ccs, map(float, tokens[1:])))
+        elif section in ['mode', 'factor']:
+            if nline == 1:
+                phases = tokens[1:]
+            elif nline == 2:
+                # T-X and P-X modes (but only T-X factors) start with step
+                skip = tx or px if section == 'mode' else tx
+                vals = tokens[1:] if skip else tokens
+                for phase, vv in zip(phases, vals):
+                    data.setdefault(phase, {})[section] = float(vv)
+                    if section == 'mode':
+                        block['mode'].append(phase)
+        elif section == 'props':
+            if nline == 1:
+                props = tokens
+            else:
+                data.setdefault(tokens[0], {}).update(zip(props, map(float, tokens[1:])))
+        elif section == 'sys':
+            data.setdefault('sys', {}).update(zip(props, map(float, tokens[1:])))
+            if tx or px:
+                block['header'] = float(tokens[0])
+        elif section == 'mu':
+            data.setdefault(tokens[0], {})['mu'] = float(tokens[1])
+
+
+def _ordered_icdata(block):
+    # keep phases and values in order of mode section as original parser did
+    data = block['data']
+    ordered = {}
+    for phase in block['mode']:
+        dt = data.pop(phase)
+        ordered[phase] = dict(mode=dt.pop('mode'), **dt)
+    ordered.update(data)
+    return ordered
+
+
+def iter_ptguesses(lines):
+    """Single-pass extraction of ptguesses from THERMOCALC log.
+
+    Args:
+        lines (iterable): Lines of THERMOCALC output.
+
+    Yields:
+        list: Lines of ptguess for each calculated point, None when block
+        does not contain ptguess.
+    """
+    recent, guess, lastxyz = [], None, None
+    inblock = False
+    for ln in lines:
+        ln = ln.rstrip('\r\n')
+        if ln == '':
+            continue
+        if ln.startswith(' P(kbar)'):
+            if inblock:
+                yield guess[:lastxyz + 2] if guess is not None and lastxyz is not None else None
+            recent, guess, lastxyz = [], None, None
+            inblock = True
+        if not inblock:
+            continue
+        if guess is None:
+            if ln.startswith('ptguess'):
+                guess = recent[-3:]
+                guess.append(ln)
+            else:
+                recent = recent[-2:] + [ln]
+        else:
+            if ln.startswith('xyzguess'):
+                lastxyz = len(guess)
+            guess.append(ln)
+    if inblock:
+        yield guess[:lastxyz + 2] if guess is not None and lastxyz is not None else None
+
+
 class TCAPI(object):
     """THERMOCALC working directory API.
 
@@ -65,6 +311,31 @@ class TCAPI(object):
         phases (list): List of names of available phases.
         TCenc (str): Encoding used for THERMOCALC output text files.
             Default 'mac-roman'.
+        timeouts (dict): Wall-clock timeouts in seconds for calculation types
+            'assemblage', 't', 'p', 'pt', 'tx', 'px' and 'dogmin'. THERMOCALC
+            running longer is killed. None (default) means no timeout.
+        timedout: Timeout in seconds when last THERMOCALC run was killed,
+            otherwise False.
+        cache (TCCache): On-disk cache of calculations or None (default).
+            See `enable_cache`.
+
+    Initial check of THERMOCALC, which provides `tcout` and `phases`, is
+    deferred until first calculation or access of these attributes (see
+    `check_tc`), so opening project e.g. for plotting never runs THERMOCALC.
+    Results of the check are stored in hidden file ``.pypsbuilder-init`` in
+    working directory (see `initfile`) and reused until scriptfile, prefs,
+    a-x file, dataset or executable change. Use ``initcache=False`` to
+    neither read nor write this file.
+
+    Args:
+        workdir (str, Path): THERMOCALC working directory
+        tcexe (str): THERMOCALC executable. Default is first tc3* file.
+        drexe (str): drawpd executable. Default is first dr1* file.
+        initcache (bool): Whether to reuse and store results of initial check
+            in working directory (see `initfile`). Default True.
+        lazy (bool): Whether to defer THERMOCALC check until first
+            calculation. When False, THERMOCALC is run during initialization
+            unless results of previous check are valid. Default True.
 
     Raises:
         InitError: An error occurred during initialization of working dir.
@@ -72,9 +343,20 @@ class TCAPI(object):
         TCError: THERMOCALC bombed.
 
     """
-    def __init__(self, workdir, tcexe=None, drexe=None):
+    def __init__(self, workdir, tcexe=None, drexe=None, initcache=True, lazy=True):
         self.workdir = Path(workdir).resolve()
         self.TCenc = 'mac-roman'
+        self.initcache = initcache
+        self._tcout = None
+        self._phases = None
+        self.timeouts = dict(assemblage=None, t=None, p=None, pt=None, tx=None, px=None, dogmin=None)
+        self.timedout = False
+        self.cache = None
+        self.timer = None
+        self.recorder = None
+        if os.environ.get('PYPSBUILDER_RECORD'):
+            self.recorder = TCTranscript(os.environ['PYPSBUILDER_RECORD'])
+        self.runstats = dict(calls=0, spawn=0.0, run=0.0, timeouts=0, cached=0)
         try:
             errinfo = 'Initialize project error!'
             self.tcexe = None
@@ -123,6 +405,12 @@ class TCAPI(object):
                     if kw[0] == 'calcmode':
                         if kw[1] != '1':
                             raise InitError('tc-prefs: calcmode must be 1.')
+            # results of previous check are valid until files are modified
+            # initial check of recording instance must run to be recorded
+            if initcache and self.recorder is None and self.load_initfile():
+                self.status = 'Initial check done.'
+                self.OK = True
+                return
 
             errinfo = 'Scriptfile error!'
             self.excess = set()
@@ -268,12 +556,9 @@ class TCAPI(object):
                 raise ScriptfileError('There are not {PSBBULK-BEGIN} and {PSBBULK-END} tags in your scriptfile.')
 
             # TC
-            self.tcout = self.runtc('\nkill\n\n')
-            if 'BOMBED' in self.tcout:
-                raise TCError(self.tcout.split('BOMBED')[1].split('\n')[0])
-            else:
-                self.phases = self.tcout.split('choose from:')[1].split('\n')[0].split()
-                self.phases.sort()
+            if not lazy:
+                errinfo = 'THERMOCALC check failed.'
+                self.check_tc()
             # OK
             self.status = 'Initial check done.'
             self.OK = True
@@ -287,9 +572,128 @@ class TCAPI(object):
     def __str__(self):
         return str(self.workdir)
 
+    @property
+    def initfile(self):
+        """pathlib.Path: Path to file storing results of initial check."""
+        return self.workdir.joinpath('.pypsbuilder-init')
+
+    initattrs = ('axname', 'excess', 'trange', 'prange', 'bulk', 'ptx_steps', 'tcout', 'phases')
+    """tuple: Attributes set by initial check."""
+
+    def init_signature(self, files=None):
+        """Return signature of files affecting initial check.
+
+        Scriptfile and prefs file are hashed (ptguesses are ignored as they
+        change with every calculation), while executable, a-x file and
+        dataset are identified by modification time and size.
+
+        Args:
+            files (list): Paths of executable, a-x file and dataset. Default
+                are files of current check.
+        """
+        h = hashlib.sha256(self.prefsfile.read_bytes())
+        with self.scriptfile.open('r', encoding=self.TCenc) as f:
+            guesses = False
+            for line in f:
+                if '{PSBGUESS-BEGIN}' in line:
+                    guesses = True
+                if not guesses:
+                    h.update(line.encode(self.TCenc))
+                if '{PSBGUESS-END}' in line:
+                    guesses = False
+        signature = [h.hexdigest()]
+        if files is None:
+            files = (self.tcexe, self.axfile, self.datasetfile)
+        for f in files:
+            st = Path(f).stat()
+            signature.append((str(f), st.st_mtime_ns, st.st_size))
+        return signature
+
+    def load_initfile(self):
+        """Restore results of previous initial check when still valid.
+
+        Attributes are set only when signature of stored check matches
+        current files.
+
+        Returns:
+            bool: True when results were restored, otherwise False.
+        """
+        try:
+            with self.initfile.open('rb') as f:
+                data = pickle.load(f)
+            # executable, a-x file and dataset of stored check
+            files = [f for f, mtime, size in data['signature'][1:]]
+            if files[0] != str(self.tcexe) or data['signature'] != self.init_signature(files):
+                return False
+            attrs = {attr: data['attrs'][attr] for attr in self.initattrs}
+        except Exception:
+            return False
+        for attr, value in attrs.items():
+            setattr(self, attr, value)
+        return True
+
+    def check_tc(self):
+        """Run THERMOCALC to get its version, dataset and list of phases.
+
+        It is called by first calculation or access of `tcout` or `phases`,
+        unless results of previous check were restored from `initfile`.
+
+        Raises:
+            TCError: THERMOCALC bombed.
+        """
+        # calculations run by check must not start other check
+        self._tcout = ''
+        try:
+            tcout = self.runtc('\nkill\n\n')
+            if 'BOMBED' in tcout:
+                raise TCError(tcout.split('BOMBED')[1].split('\n')[0])
+            phases = sorted(tcout.split('choose from:')[1].split('\n')[0].split())
+        except BaseException as e:
+            self._tcout = None
+            self.status = '{}: {}'.format(type(e).__name__, str(e))
+            self.OK = False
+            raise
+        self._tcout, self._phases = tcout, phases
+        if self.initcache:
+            self.save_initfile()
+
+    @property
+    def tcout(self):
+        """str: THERMOCALC output of initial check. See `check_tc`."""
+        if self._tcout is None and getattr(self, 'OK', False):
+            self.check_tc()
+        return self._tcout
+
+    @tcout.setter
+    def tcout(self, tcout):
+        self._tcout = tcout
+
+    @property
+    def phases(self):
+        """list: Sorted names of available phases. See `check_tc`."""
+        if self._phases is None and getattr(self, 'OK', False):
+            self.check_tc()
+        return self._phases
+
+    @phases.setter
+    def phases(self, phases):
+        self._phases = phases
+
+    def save_initfile(self):
+        """Store results of initial check to `initfile`."""
+        try:
+            data = dict(signature=self.init_signature(),
+                        attrs={attr: getattr(self, attr) for attr in self.initattrs})
+            with self.initfile.open('wb') as f:
+                pickle.dump(data, f)
+        except OSError:
+            pass
+
     def __repr__(self):
         if self.OK:
-            return '\n'.join(['{}'.format(self.tcversion),
+            # repr must not run deferred THERMOCALC check
+            tcversion = self.tcversion if self._tcout else 'THERMOCALC not checked yet'
+            return '\n'.join(['{}'.format(tcversion),
                               'Working directory: {}'.format(self.workdir),
                               'Scriptfile: {}'.format('tc-' + self.name + '.txt'),
                               'AX file: {}'.format('tc-' + self.axname + '.txt'),
@@ -379,14 +783,16 @@ class TCAPI(object):
             resic (str): When not None, used as content of icfile. Default None.
 
         Returns:
-            status (str): Result of parsing. 'ok', 'nir' (nothing in range) or 'bombed'.
+            status (str): Result of parsing. 'ok', 'nir' (nothing in range),
+            'bombed' or 'timeout' (THERMOCALC killed, see `timeouts`).
             variance (int): parsed variance?
             pts (numpy.array): 2D array of calculated coordinates (p, T), (C, T)
             or (p, C) for P-T, T-X or P-X pseudosections).
             ptcoords (numpy.array): Array of calculated p, T values. Returned
             only when tx od px is True.
-            res (list): List of dicts with data and ptguess keys. One item for
-            invariant points, more items for univariant lines.
+            res (ResultTable): Table of results with data and ptguess for
+            each calculated point. One row for invariant points, more rows
+            for univariant lines.
             output (str): Full nonparsed THERMOCALC output.
 
         Example:
@@ -395,207 +801,142 @@ class TCAPI(object):
                 >>> tc = TCAPI('pat/to/dir')
                 >>> status, variance, pts, res, output = tc.parse_logfile()
         """
+        if self.timedout and kwargs.get('output', None) is None:
+            # log and ic files of killed run are incomplete
+            output = 'THERMOCALC killed after {} s timeout.'.format(self.timedout)
+            if kwargs.get('tx', False) or kwargs.get('px', False):
+                return 'timeout', -1, None, np.array([]).T, ResultTable(), output
+            else:
+                return 'timeout', -1, np.array([]).T, ResultTable(), output
+        if self.cache is not None and kwargs.get('output', None) is None and kwargs.get('resic', None) is None:
+            # parsed results are cached by content of log and ic files
+            key = self.cache.parsed_key(self, tx=kwargs.get('tx', False), px=kwargs.get('px', False))
+            parsed = self.cache.get(key, parsed=True)
+            if parsed is None:
+                parsed = self._parse_logfile(**kwargs)
+                self.cache.put(key, parsed)
+            return parsed
+        return self._parse_logfile(**kwargs)
+
+    def _parse_logfile(self, **kwargs):
+        if self.timer is not None:
+            # outputs are read in advance to separate file I/O from parsing
+            if kwargs.get('output', None) is None:
+                with self.timer.span('log read'):
+                    kwargs['output'] = self.logfile.read_text(encoding=self.TCenc)
+            if kwargs.get('resic', None) is None and self.icfile.exists():
+                with self.timer.span('ic read'):
+                    kwargs['resic'] = self.icfile.read_text(encoding=self.TCenc)
+            with self.timer.span('parse'):
+                return self._parse_logfile_version(**kwargs)
+        return self._parse_logfile_version(**kwargs)
+
+    def _parse_logfile_version(self, **kwargs):
         if self.tcnewversion:
             return self.parse_logfile_new(**kwargs)
         else:
             return self.parse_logfile_old(output=kwargs.get('output', None))
 
+    def iter_results(self, **kwargs):
+        """Incremental parser of THERMOCALC outputs.
+
+        The ic file and log are walked only once and line by line, pairing
+        calculated points with their ptguesses. Records are yielded as soon
+        as they are parsed.
+
+        Args:
+            tx (bool): True for T-X calculations. Default False.
+            px (bool): True for P-X calculations. Default False.
+            output (str): When not None, used as content of logfile. Default None.
+            loglines (iterable): When not None, used as lines of logfile.
+                Default None.
+            resic (str): When not None, used as content of icfile. Default None.
+            mmap (bool): When True, files are read via memory mapping.
+                Default False.
+
+        Yields:
+            dict: Record with keys pt ([p, T]), variance, header (step of T-X
+            or P-X calculations), data and ptguess.
+
+        Example:
+            >>> for rec in tc.iter_results():
+            ...     print(rec['pt'], rec['data']['g']['mode'])
+        """
+        tx = kwargs.get('tx', False)
+        px = kwargs.get('px', False)
+        output = kwargs.get('output', None)
+        resic = kwargs.get('resic', None)
+        use_mmap = kwargs.get('mmap', False)
+        loglines = kwargs.get('loglines', None)
+        if loglines is None:
+            if output is None:
+                loglines = read_lines(self.logfile, self.TCenc, use_mmap)
+            else:
+                loglines = io.StringIO(output)
+        if resic is None:
+            iclines = read_lines(self.icfile, self.TCenc, use_mmap)
+        else:
+            iclines = io.StringIO(resic)
+        ptguesses = iter_ptguesses(loglines)
+        for pt, variance, header, data in iter_icfile(iclines, tx=tx, px=px):
+            ptguess = next(ptguesses, None)
+            if ptguess is None:
+                break
+            yield dict(pt=pt, variance=variance, header=header, data=data, ptguess=ptguess)
+
     def parse_logfile_new(self, **kwargs):
+        """Parser for THERMOCALC 3.5 and newer output.
+
+        Compatibility wrapper around :meth:`iter_results` returning the same
+        values as :meth:`parse_logfile`. Log is read only once, line by line,
+        while ptguesses are parsed. Lines are kept to be returned as output.
+        """
         tx = kwargs.get('tx', False)
         px = kwargs.get('px', False)
         output = kwargs.get('output', None)
         resic = kwargs.get('resic', None)
+        use_mmap = kwargs.get('mmap', False)
         if output is None:
-            with self.logfile.open('r', encoding=self.TCenc) as f:
-                output = f.read()
-        lines = [ln for ln in output.splitlines() if ln != '']
+            loglines = read_lines(self.logfile, self.TCenc, use_mmap)
+        else:
+            loglines = io.StringIO(output)
+        seen = []
+        loglines = _keep_lines(loglines, seen)
         pts = []
-        res = []
+        res = ResultTable()
         headers = []
         variance = -1
-        do_parse = True
-        if resic is None:
-            if not self.icfile.exists():
-                if [ix for ix, ln in enumerate(lines) if 'BOMBED' in ln]:
-                    status = 'bombed'
-                else:
-                    status = 'nir'
-                do_parse = False
-            else:
-                with self.icfile.open('r', encoding=self.TCenc) as f:
-                    resic = f.read()
-        if do_parse:
-            # parse p, t from something 'g ep mu pa bi chl ab q H2O sph  {4.0000, 495.601}  kbar/°C\novar = 3; var = 1 (seen)'
-            ptpat = re.compile(r'(?<=\{)(.*?)(?=\})')
-            #ovarpat = re.compile(r'(?<=ovar = )(.*?)(?=\;)')
-            varpat = re.compile(r'(?<=var = )(.*?)(?=\ )')
-            # parse ptguesses
-            bstarts = [ix for ix, ln in enumerate(lines) if ln.startswith(' P(kbar)')]
-            bstarts.append(len(lines))
-            ptguesses = []
-            for bs, be in zip(bstarts[:-1], bstarts[1:]):
-                block = lines[bs:be]
-                # pts.append([float(n) for n in block[1].split()[:2]])
-                xyz = [ix for ix, ln in enumerate(block) if ln.startswith('xyzguess')]
-                gixs = [ix for ix, ln in enumerate(block) if ln.startswith('ptguess')][0] - 3
-                gixe = xyz[-1] + 2
-                ptguesses.append(block[gixs:gixe])
-            # parse icfile
-            alldata = []
-            for block in resic.split('\n===========================================================\n\n')[1:]:
-                sections = block.split('\n\n')
-                data = {}
-                pts.append([float(n) for n in ptpat.search(sections[0]).group().split(', ')])
-                variance = int(varpat.search(sections[0]).group().replace(';', ''))
-                #seenvariance = int(varpat.search(sections[0]).group())
-                # This was needed for same cases with variance 2 ???? Need to be explored 
-                # if variance < 3:
-                #     offset = 0
-                # else:
-                #     offset = 1
-                offset = 1
-                # parse mode
-                if not sections[4 + offset].startswith('mode'): # For some reasons there is no mode in output
+        if resic is not None or self.icfile.exists():
+            for rec in self.iter_results(tx=tx, px=px, loglines=loglines, resic=resic, mmap=use_mmap):
+                pts.append(rec['pt'])
+                variance = rec['variance']
+                headers.append(rec['header'])
+                res.append(dict(data=rec['data'], ptguess=rec['ptguess']))
+        for ln in loglines:
+            # rest of log is kept only to be returned as output
+            pass
+        if output is None:
+            output = ''.join(seen)
+        if res:
+            status = 'ok'
+        elif resic is None and not self.icfile.exists() and 'BOMBED' in output:
+            status = 'bombed'
+        else:
+            status = 'nir'
+        if (tx or px) and status == 'ok':
+            lines = (ln for ln in seen if ln.rstrip('\r\n') != '')
+            for ln in lines:
+                if ln.startswith('composition (from script)'):
+                    steps = int(next(lines).split()[-1]) - 1
                     break
-                l1, l2 = sections[4 + offset].split('\n')
-                if tx or px:
-                    for phase, vv in zip(l1.split()[1:], l2.split()[1:]):
-                        dt = data.get(phase, {})
-                        dt['mode'] = float(vv)
-                        data[phase] = dt
-                else:
-                    for phase, vv in zip(l1.split()[1:], l2.split()):
-                        dt = data.get(phase, {})
-                        dt['mode'] = float(vv)
-                        data[phase] = dt
-                # parse a-x variables
-                lns = sections[1].split('\n')
-                for l1, l2 in zip(lns[::2], lns[1::2]):
-                    phase, l1r = l1.split(maxsplit=1)
-                    axp = {}
-                    for cc, vv in zip(l1r.split(), l2.split()):
-                        axp[cc.replace('({})'.format(phase), '')] = float(vv)
-                    dt = data.get(phase, {})
-                    dt.update(axp)
-                    data[phase] = dt
-                # parse site fractions
-                lns = sections[2].split('\n')[1:]
-                for l1, l2 in zip(lns[::2], lns[1::2]):
-                    phase, l1r = l1.split(maxsplit=1)
-                    sfp = {}
-                    for cc, vv in zip(l1r.split(), l2.split()):
-                        sfp[cc] = float(vv)
-                    dt = data.get(phase, {})
-                    dt.update(sfp)
-                    data[phase] = dt
-                # parse oxides
-                if variance < 2:
-                    l1, l2 = sections[3].split('\n')[1:3]
-                    ccs = l1.split()
-                    #nccs = len(ccs)
-                    #bulk = {}
-                    #for cc, vv in zip(ccs, l2.split()[1:nccs+1]):
-                    #    bulk[cc] = float(vv)
-                    #data['bulk'] = bulk
-                    for ln in sections[3].split('\n')[3:]:
-                        oxp = {}
-                        phase, lnr = ln.split(maxsplit=1)
-                        for cc, vv in zip(ccs, lnr.split()):
-                            oxp[cc] = float(vv)
-                        dt = data.get(phase, {})
-                        dt.update(oxp)
-                        data[phase] = dt
-                else:
-                    l1, l2 = sections[3].split('\n')[1:]
-                    ccs = l1.split()
-                    #nccs = len(ccs)
-                    #bulk = {}
-                    #for cc, vv in zip(ccs, l2.split()[1:nccs+1]):
-                    #    bulk[cc] = float(vv)
-                    #data['bulk'] = bulk
-                    for ln in sections[4].split('\n'):
-                        oxp = {}
-                        phase, lnr = ln.split(maxsplit=1)
-                        for cc, vv in zip(ccs, lnr.split()):
-                            oxp[cc] = float(vv)
-                        dt = data.get(phase, {})
-                        dt.update(oxp)
-                        data[phase] = dt
-                # parse factor
-                l1, l2 = sections[5 + offset].split('\n')
-                if tx:
-                    for phase, vv in zip(l1.split()[1:], l2.split()[1:]):
-                        dt = data.get(phase, {})
-                        dt.update(dict(factor=float(vv)))
-                        data[phase] = dt
-                else:
-                    for phase, vv in zip(l1.split()[1:], l2.split()):
-                        dt = data.get(phase, {})
-                        dt.update(dict(factor=float(vv)))
-                        data[phase] = dt
-                # parse thermodynamic properties
-                props, lr = sections[6 + offset].split('\n', maxsplit=1)
-                for ln in lr.split('\n'):
-                    tdpp = {}
-                    phase, lnr = ln.split(maxsplit=1)
-                    for cc, vv in zip(props.split(), lnr.split()):
-                        tdpp[cc] = float(vv)
-                    dt = data.get(phase, {})
-                    dt.update(tdpp)
-                    data[phase] = dt
-                # sys
-                tdps = {}
-                header, lnr = sections[7 + offset].split(maxsplit=1)
-                for cc, vv in zip(props.split(), lnr.split()):
-                    tdps[cc] = float(vv)
-                dt = data.get('sys', {})
-                dt.update(tdps)
-                data['sys'] = dt
-                if tx or px:
-                    headers.append(float(header))
-                # parse endmembers and chemical potential
-                props = ['ideal', 'gamma', 'activity', 'prop', 'mu', 'RTlna']
-                for section in sections[8 + offset:-1]:
-                    lns = [ln for ln in section.split('\n') if ln != '                    ideal       gamma    activity        prop          µ0     RT ln a']
-                    phase, lnr = lns[0].split(maxsplit=1)
-                    lns[0] = lnr
-                    for ln in lns:
-                        phase_em, lnr = ln.split(maxsplit=1)
-                        emp = {}
-                        for cc, vv in zip(props, lnr.split()):
-                            emp[cc] = float(vv)
-                        phase_comb = '{}({})'.format(phase, phase_em)
-                        dt = data.get(phase_comb, {})
-                        dt.update(emp)
-                        data[phase_comb] = dt
-                for ln in sections[-1].split('\n')[:-1]:
-                    phase, vv = ln.split()
-                    dt = data.get(phase, {})
-                    dt.update(dict(mu=float(vv)))
-                    data[phase] = dt
-                alldata.append(data)
-            if alldata:
-                res = [dict(data=data, ptguess=ptguess) for data, ptguess in zip(alldata, ptguesses)]
-            if res:
-                status = 'ok'
-            else:
-                status = 'nir'
-        if tx:
-            if status == 'ok':
-                comps = [ix for ix, ln in enumerate(lines) if ln.startswith('composition (from script)')][0]
-                steps = int(lines[comps + 1].split()[-1]) - 1
-                txcoords = np.array(((np.array(headers) - 1) / steps, np.array(pts).T[1]))
-            else:
-                txcoords = None
-            return status, variance, txcoords, np.array(pts).T, res, output
-        elif px:
-            if status == 'ok':
-                comps = [ix for ix, ln in enumerate(lines) if ln.startswith('composition (from script)')][0]
-                steps = int(lines[comps + 1].split()[-1]) - 1
-                pxcoords = np.array((np.array(pts).T[0], (np.array(headers) - 1) / steps))
+            if tx:
+                xycoords = np.array(((np.array(headers) - 1) / steps, np.array(pts).T[1]))
             else:
-                pxcoords = None
-            return status, variance, pxcoords, np.array(pts).T, res, output
+                xycoords = np.array((np.array(pts).T[0], (np.array(headers) - 1) / steps))
+        else:
+            xycoords = None
+        if tx or px:
+            return status, variance, xycoords, np.array(pts).T, res, output
         else:
             return status, variance, np.array(pts).T, res, output
 
@@ -651,7 +992,7 @@ class TCAPI(object):
                 status = 'ok'
             else:
                 status = 'nir'
-        return status, variance, np.array(pts).T, res, output
+        return status, variance, np.array(pts).T, ResultTable(res), output
 
     def parse_dogmin_old(self):
         """Dogmin parser."""
@@ -708,69 +1049,174 @@ class TCAPI(object):
         xsteps = kwargs.get('xsteps', 20)
         p = kwargs.get('p', None)
         T = kwargs.get('T', None)
-        with self.scriptfile.open('r', encoding=self.TCenc) as f:
-            sc = f.readlines()
-        changed = False
-        gsb = [ix for ix, ln in enumerate(sc) if ln.startswith('%{PSBGUESS-BEGIN}')]
-        gse = [ix for ix, ln in enumerate(sc) if ln.startswith('%{PSBGUESS-END}')]
-        if get_old_guesses:
-            if gsb and gse:
-                old_guesses = [ln.strip() for ln in sc[gsb[0] + 1:gse[0]]]
-        if guesses is not None:
-            if gsb and gse:
-                sc = sc[:gsb[0] + 1] + [gln + '\n' for gln in guesses] + sc[gse[0]:]
-                changed = True
-        if dogmin is not None:
-            dgb = [ix for ix, ln in enumerate(sc) if ln.startswith('%{PSBDOGMIN-BEGIN}')]
-            dge = [ix for ix, ln in enumerate(sc) if ln.startswith('%{PSBDOGMIN-END}')]
-            dglines = []
-            dglines.append('dogmin {}\n'.format(dogmin))
-            if which is not None:
-                dglines.append('which {}\n'.format(' '.join(which)))
-                dglines.append('setPwindow {} {}\n'.format(p, p))
-                dglines.append('setTwindow {} {}\n'.format(T, T))
-            if dgb and dge:
-                sc = sc[:dgb[0] + 1] + dglines + sc[dge[0]:]
-                changed = True
-        if bulk is not None:
-            bub = [ix for ix, ln in enumerate(sc) if ln.startswith('%{PSBBULK-BEGIN}')]
-            bue = [ix for ix, ln in enumerate(sc) if ln.startswith('%{PSBBULK-END}')]
-            bulines = []
-            if len(bulk) == 2:
-                bulines.append('setbulk yes {} % x={:g}\n'.format(' '.join(bulk[0]), xvals[0]))
-                bulines.append('setbulk yes {} {:d} % x={:g}\n'.format(' '.join(bulk[1]), xsteps, xvals[1]))
-            else:
-                bulines.append('setbulk yes {}\n'.format(' '.join(bulk[0])))
-            if bub and bue:
-                sc = sc[:bub[0] + 1] + bulines + sc[bue[0]:]
-                changed = True
-        if changed:
-            with self.scriptfile.open('w', encoding=self.TCenc) as f:
-                for ln in sc:
-                    f.write(ln)
+        with self.span('scriptfile update'):
+            sc = self.script
+            if get_old_guesses:
+                old_guesses = sc.guesses
+            if guesses is not None:
+                sc.guesses = guesses
+            if dogmin is not None:
+                sc.set_dogmin(dogmin, which=which, p=p, T=T)
+            if bulk is not None:
+                sc.set_bulk(bulk, xvals=xvals, xsteps=xsteps)
+            sc.write()
         if get_old_guesses:
             return old_guesses
         else:
             return None
 
+    @property
+    def script(self):
+        """Scriptfile: In-memory model of scriptfile. See `Scriptfile`."""
+        if getattr(self, '_script', None) is None or self._script.path != self.scriptfile:
+            self._script = Scriptfile(self.scriptfile, encoding=self.TCenc)
+        return self._script
+
+    def clone(self, workdir):
+        """Create copy of working directory to be used by independent worker.
+
+        Prefs file, scriptfile, a-x file and dataset are copied to new
+        directory, so THERMOCALC runs there never touch scriptfile or output
+        files in original working directory. THERMOCALC executable is shared.
+
+        Args:
+            workdir (str, Path): Directory where copy is created. It is created
+                when not exists.
+
+        Returns:
+            TCAPI: instance operating on new working directory
+        """
+        workdir = Path(workdir).resolve()
+        workdir.mkdir(parents=True, exist_ok=True)
+        for f in (self.prefsfile, self.axfile, self.datasetfile):
+            if f.exists():
+                shutil.copy2(str(f), str(workdir.joinpath(f.name)))
+        tc = copy.copy(self)
+        tc.workdir = workdir
+        if self.scriptfile.exists():
+            tc._script = self.script.copy(tc.scriptfile)
+        tc.runstats = dict(calls=0, spawn=0.0, run=0.0, timeouts=0, cached=0)
+        return tc
+
+    def enable_cache(self, cachedir=None, maxsize=512 * 2**20):
+        """Enable on-disk cache of THERMOCALC calculations.
+
+        Cache is shared by all clones of working directory, e.g. workers of
+        gridding session. See `TCCache`.
+
+        Args:
+            cachedir (str, Path): Cache directory. Default is ``.tccache`` in
+                working directory.
+            maxsize (int): Maximum size of cache in bytes. Default 512 MB.
+
+        Returns:
+            TCCache: cache instance
+        """
+        if cachedir is None:
+            cachedir = self.workdir.joinpath('.tccache')
+        self.cache = TCCache(cachedir, maxsize=maxsize)
+        return self.cache
+
+    def enable_timer(self):
+        """Enable timing of named spans of calculations.
+
+        Timer is shared by all clones of working directory. Spans recorded in
+        worker processes of gridding are collected when batch is finished.
+        See `TCTimer`.
+
+        Returns:
+            TCTimer: timer instance
+        """
+        if self.timer is None:
+            self.timer = TCTimer()
+        return self.timer
+
+    def span(self, name):
+        """Return context manager timing named span when timer is enabled."""
+        if self.timer is None:
+            return nospan()
+        return self.timer.span(name)
+
+    def record(self, transcriptdir):
+        """Record all following THERMOCALC runs to transcript.
+
+        Recorded runs could be replayed without THERMOCALC by stand-in
+        executable (see `TCTranscript.install`) installed in copy of working
+        directory made before recording. Runs of clones, e.g. gridding
+        workers, are recorded as well. Initial check is run again to be
+        recorded. To record whole workflow including project loading or
+        builder session, set ``PYPSBUILDER_RECORD`` environment variable to
+        transcript directory.
+
+        Args:
+            transcriptdir (str, Path): Transcript directory
+
+        Returns:
+            TCTranscript: transcript instance
+        """
+        self.recorder = TCTranscript(transcriptdir)
+        self.runtc('\nkill\n\n')
+        return self.recorder
+
+    def session(self, workers=1, basedir=None, probe=False):
+        """Create pool of pre-staged THERMOCALC working directories.
+
+        Args:
+            workers (int): Number of workers. Default 1
+            basedir (str, Path): Directory where worker directories are
+                created. Default is new temporary directory.
+            probe (bool): Whether to measure start-up cost of THERMOCALC
+                by single run in every worker (see `TCSessionPool.probe`).
+                Default False
+
+        Returns:
+            TCSessionPool: session pool to be used as context manager
+
+        Example:
+            >>> with tc.session(workers=4) as pool:
+            ...     with pool.worker() as wtc:
+            ...         tcout, ans = wtc.calc_assemblage(phases, p, t)
+            ...         status, variance, pts, res, output = wtc.parse_logfile()
+        """
+        return TCSessionPool(self, workers=workers, basedir=basedir, probe=probe)
+
+    def asession(self, workers=4, basedir=None):
+        """Create asyncio session running THERMOCALC concurrently.
+
+        Args:
+            workers (int): Maximum number of concurrent THERMOCALC processes,
+                each running in its own working directory. Default 4
+            basedir (str, Path): Directory where worker directories are
+                created. Default is new temporary directory.
+
+        Returns:
+            AsyncTCSession: session to be used as async context manager
+
+        Example:
+            >>> async def grid(tc, tasks):
+            ...     async with tc.asession(workers=8) as session:
+            ...         return await asyncio.gather(*[session.calc_assemblage(phases, p, t)
+            ...                                       for phases, p, t in tasks])
+            >>> results = asyncio.run(grid(tc, tasks))
+        """
+        return AsyncTCSession(self, workers=workers, basedir=basedir)
+
     def interpolate_bulk(self, x):
+        """Return bulk compositions linearly interpolated between two bulks.
+
+        Args:
+            x (float or array_like): Position(s) between first (0) and second
+                (1) bulk composition. All positions are interpolated at once.
+
+        Returns:
+            list: List of bulk compositions (lists of strings), one for each
+            position. When scriptfile defines single bulk, it is returned.
+        """
         if len(self.bulk) == 2:
-            new_bulk = []
-            try:
-               _ = (e for e in x)
-            except TypeError:
-                b1 = np.array([float(v) for v in self.bulk[0]])
-                b2 = np.array([float(v) for v in self.bulk[1]])
-                db = b2 - b1
-                bi = b1 + x * db
-                new_bulk.append(['{:g}'.format(v) for v in bi])
-            else:
-                for x_val in x:
-                    b1 = np.array([float(v) for v in self.bulk[0]])
-                    b2 = np.array([float(v) for v in self.bulk[1]])
-                    db = b2 - b1
-                    bi = b1 + x_val * db
-                    new_bulk.append(['{:g}'.format(v) for v in bi])
+            b1 = np.array(self.bulk[0], dtype=float)
+            b2 = np.array(self.bulk[1], dtype=float)
+            bi = b1 + np.outer(np.atleast_1d(x), b2 - b1)
+            new_bulk = [['{:g}'.format(v) for v in row] for row in bi]
         else:
             new_bulk = self.bulk[0]
         return new_bulk
@@ -787,6 +1233,57 @@ class TCAPI(object):
             prec = kwargs.get('prec', max(int(2 - np.floor(np.log10(min(np.diff(trange)[0], np.diff(prange)[0])))), 0) + 1)
         return prange, trange, steps, prec
 
+    def _ans_t(self, phases, out, **kwargs):
+        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
+        step = (prange[1] - prange[0]) / steps
+        tmpl = '{}\n\n{}\ny\n{:.{prec}f} {:.{prec}f}\n{:.{prec}f} {:.{prec}f}\n{:g}\nn\n\nkill\n\n'
+        return tmpl.format(' '.join(phases), ' '.join(out), *prange, *trange, step, prec=prec)
+
+    def _ans_p(self, phases, out, **kwargs):
+        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
+        step = (trange[1] - trange[0]) / steps
+        tmpl = '{}\n\n{}\nn\n{:.{prec}f} {:.{prec}f}\n{:.{prec}f} {:.{prec}f}\n{:g}\nn\n\nkill\n\n'
+        return tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, step, prec=prec)
+
+    def _ans_pt(self, phases, out, **kwargs):
+        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
+        tmpl = '{}\n\n{}\n{:.{prec}f} {:.{prec}f} {:.{prec}f} {:.{prec}f}\nn\n\nkill\n\n'
+        return tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, prec=prec)
+
+    def _ans_tx(self, phases, out, **kwargs):
+        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
+        if len(out) > 1:
+            tmpl = '{}\n\n{}\n{:.{prec}f} {:.{prec}f} {:.{prec}f} {:.{prec}f}\nn\n\nkill\n\n'
+            ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, prec=prec)
+        else:
+            tmpl = '{}\n\n{}\ny\n\n{:.{prec}f} {:.{prec}f}\nn\nkill\n\n'
+            ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, prec=prec)
+        return ans
+
+    def _ans_px(self, phases, out, **kwargs):
+        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
+        if len(out) > 1:
+            tmpl = '{}\n\n{}\n{:.{prec}f} {:.{prec}f} {:.{prec}f} {:.{prec}f}\nn\n\nkill\n\n'
+            ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, prec=prec)
+        else:
+            tmpl = '{}\n\n{}\nn\n\n{:.{prec}f} {:.{prec}f}\nn\nkill\n\n'
+            ans = tmpl.format(' '.join(phases), ' '.join(out), *prange, prec=prec)
+        return ans
+
+    def _ans_assemblage(self, phases, p, t):
+        tmpl = '{}\n\n\n{}\n{}\nkill\n\n'
+        return tmpl.format(' '.join(phases), p, t)
+
+    def _ans_assemblages(self, phases, points):
+        # answering phases prompt instead of kill starts next calculation
+        tmpl = '{}\n\n\n{}\n{}\n'
+        ans = ''.join(tmpl.format(' '.join(phases), p, t) for p, t in points)
+        return ans + 'kill\n\n'
+
+    def _ans_dogmin(self, variance):
+        tmpl = '{}\nn\n\n'
+        return tmpl.format(variance)
+
     def calc_t(self, phases, out, **kwargs):
         """Method to run THERMOCALC to find univariant line using Calc T at P strategy.
 
@@ -801,11 +1298,8 @@ class TCAPI(object):
             tuple: (tcout, ans) standard output and input for THERMOCALC run.
             Input ans could be used to reproduce calculation.
         """
-        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
-        step = (prange[1] - prange[0]) / steps
-        tmpl = '{}\n\n{}\ny\n{:.{prec}f} {:.{prec}f}\n{:.{prec}f} {:.{prec}f}\n{:g}\nn\n\nkill\n\n'
-        ans = tmpl.format(' '.join(phases), ' '.join(out), *prange, *trange, step, prec=prec)
-        tcout = self.runtc(ans)
+        ans = self._ans_t(phases, out, **kwargs)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('t'), cache=True)
         return tcout, ans
 
     def calc_p(self, phases, out, **kwargs):
@@ -822,11 +1316,8 @@ class TCAPI(object):
             tuple: (tcout, ans) standard output and input for THERMOCALC run.
             Input ans could be used to reproduce calculation.
         """
-        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
-        step = (trange[1] - trange[0]) / steps
-        tmpl = '{}\n\n{}\nn\n{:.{prec}f} {:.{prec}f}\n{:.{prec}f} {:.{prec}f}\n{:g}\nn\n\nkill\n\n'
-        ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, step, prec=prec)
-        tcout = self.runtc(ans)
+        ans = self._ans_p(phases, out, **kwargs)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('p'), cache=True)
         return tcout, ans
 
     def calc_pt(self, phases, out, **kwargs):
@@ -843,10 +1334,8 @@ class TCAPI(object):
             tuple: (tcout, ans) standard output and input for THERMOCALC run.
             Input ans could be used to reproduce calculation.
         """
-        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
-        tmpl = '{}\n\n{}\n{:.{prec}f} {:.{prec}f} {:.{prec}f} {:.{prec}f}\nn\n\nkill\n\n'
-        ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, prec=prec)
-        tcout = self.runtc(ans)
+        ans = self._ans_pt(phases, out, **kwargs)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('pt'), cache=True)
         return tcout, ans
 
     def calc_tx(self, phases, out, **kwargs):
@@ -863,14 +1352,8 @@ class TCAPI(object):
             tuple: (tcout, ans) standard output and input for THERMOCALC run.
             Input ans could be used to reproduce calculation.
         """
-        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
-        if len(out) > 1:
-            tmpl = '{}\n\n{}\n{:.{prec}f} {:.{prec}f} {:.{prec}f} {:.{prec}f}\nn\n\nkill\n\n'
-            ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, prec=prec)
-        else:
-            tmpl = '{}\n\n{}\ny\n\n{:.{prec}f} {:.{prec}f}\nn\nkill\n\n'
-            ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, prec=prec)
-        tcout = self.runtc(ans)
+        ans = self._ans_tx(phases, out, **kwargs)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('tx'), cache=True)
         return tcout, ans
 
     def calc_px(self, phases, out, **kwargs):
@@ -887,14 +1370,8 @@ class TCAPI(object):
             tuple: (tcout, ans) standard output and input for THERMOCALC run.
             Input ans could be used to reproduce calculation.
         """
-        prange, trange, steps, prec = self.parse_kwargs(**kwargs)
-        if len(out) > 1:
-            tmpl = '{}\n\n{}\n{:.{prec}f} {:.{prec}f} {:.{prec}f} {:.{prec}f}\nn\n\nkill\n\n'
-            ans = tmpl.format(' '.join(phases), ' '.join(out), *trange, *prange, prec=prec)
-        else:
-            tmpl = '{}\n\n{}\nn\n\n{:.{prec}f} {:.{prec}f}\nn\nkill\n\n'
-            ans = tmpl.format(' '.join(phases), ' '.join(out), *prange, prec=prec)
-        tcout = self.runtc(ans)
+        ans = self._ans_px(phases, out, **kwargs)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('px'), cache=True)
         return tcout, ans
 
     def calc_assemblage(self, phases, p, t):
@@ -909,11 +1386,60 @@ class TCAPI(object):
             tuple: (tcout, ans) standard output and input for THERMOCALC run.
             Input ans could be used to reproduce calculation.
         """
-        tmpl = '{}\n\n\n{}\n{}\nkill\n\n'
-        ans = tmpl.format(' '.join(phases), p, t)
-        tcout = self.runtc(ans)
+        ans = self._ans_assemblage(phases, p, t)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('assemblage'), cache=True)
+        return tcout, ans
+
+    def calc_assemblages(self, phases, points):
+        """Calculate compositions of stable assemblage at several points.
+
+        All calculations are chained in single THERMOCALC session, so
+        dataset and a-x file are loaded only once. Starting guesses from
+        scriptfile are used for first point, THERMOCALC continues from
+        previous solution for others. Use `parse_assemblages` to split
+        output to individual points.
+
+        Args:
+            phases (set): Set of present phases
+            points (list): List of (p, t) tuples
+
+        Returns:
+            tuple: (tcout, ans) standard output and input for THERMOCALC run.
+        """
+        ans = self._ans_assemblages(phases, points)
+        timeout = self.timeouts.get('assemblage')
+        if timeout is not None:
+            timeout *= len(points)
+        tcout = self.runtc(ans, timeout=timeout, cache=True)
         return tcout, ans
 
+    def parse_assemblages(self, points):
+        """Split output of `calc_assemblages` to results of individual points.
+
+        Calculated points are matched to requested ones by p-T coordinates
+        written in icfile, so points without solution could not shift
+        results of others.
+
+        Args:
+            points (list): List of (p, t) tuples passed to `calc_assemblages`
+
+        Returns:
+            list: ResultTable with single row or None (no solution) for
+            every point.
+        """
+        results = [None] * len(points)
+        status, variance, pts, res, output = self.parse_logfile()
+        if status == 'ok':
+            req = np.array(points, dtype=float)
+            for row, pt in enumerate(pts.T):
+                # icfile coordinates are rounded to 4 (p) and 3 (T) decimals
+                match = np.flatnonzero(np.all(np.abs(req - pt) < 1e-3, axis=1))
+                for ix in match:
+                    if results[ix] is None:
+                        results[ix] = res[[row]]
+                        break
+        return results
+
     def dogmin(self, variance):
         """Run THERMOCALC dogmin session.
 
@@ -923,11 +1449,135 @@ class TCAPI(object):
         Returns:
             str: THERMOCALC standard output
         """
-        tmpl = '{}\nn\n\n'
-        ans = tmpl.format(variance)
-        tcout = self.runtc(ans)
+        ans = self._ans_dogmin(variance)
+        tcout = self.runtc(ans, timeout=self.timeouts.get('dogmin'), cache=True)
         return tcout
 
+    def dogmin_survey(self, nx=10, ny=10, variance=4, workers=4, **kwargs):
+        """Run dogmin on regular grid to get overview of stable assemblages.
+
+        Dogmin runs are distributed among concurrent THERMOCALC processes,
+        each in its own working directory (see `asession`). Survey could be
+        run also from Jupyter notebook, where event loop is already running
+        (see `run_coroutine`). Points where THERMOCALC was killed (see
+        `timeouts`) are not labelled.
+
+        Args:
+            nx (int): Number of grid points along temperature. Default 10
+            ny (int): Number of grid points along pressure. Default 10
+            variance (int): Maximum variance to be considered. Default 4
+            workers (int): Number of concurrent THERMOCALC processes. Default 4
+            which (set): Phases considered by dogmin. Default all phases
+                except excess ones.
+            doglevel (int): Dogmin log level. Default 1
+            trange (tuple): Temperature range. Default from scriptfile
+            prange (tuple): Pressure range. Default from scriptfile
+            prec (int): Precision of temperature and pressure. Default 2
+
+        Returns:
+            DogminSurvey: results of survey
+        """
+        which = kwargs.get('which', set(self.phases).difference(self.excess))
+        doglevel = kwargs.get('doglevel', 1)
+        trange = kwargs.get('trange', self.trange)
+        prange = kwargs.get('prange', self.prange)
+        prec = kwargs.get('prec', 2)
+        xspace = np.linspace(trange[0], trange[1], nx)
+        yspace = np.linspace(prange[0], prange[1], ny)
+
+        async def survey():
+            async with self.asession(workers=workers) as session:
+                return await asyncio.gather(*[session.dogmin(variance, dogmin='yes {}'.format(doglevel), which=sorted(which),
+                                                             T='{:.{prec}f}'.format(t, prec=prec),
+                                                             p='{:.{prec}f}'.format(p, prec=prec))
+                                              for p in yspace for t in xspace])
+        # with single worker dogmin block of own scriptfile is used
+        if workers == 1:
+            old_dogmin = list(self.script.blocks.get('DOGMIN', []))
+        try:
+            outputs = run_coroutine(survey())
+        finally:
+            if workers == 1:
+                self.script.set_block('DOGMIN', old_dogmin)
+                self.script.write()
+        dogmins = {}
+        for (r, c), (output, resic) in zip(itertools.product(range(ny), range(nx)), outputs):
+            if output is not None:
+                dgm = Dogmin(output=output, resic=resic, x=xspace[c], y=yspace[r])
+                try:
+                    if dgm.phases:
+                        dogmins[(r, c)] = dgm
+                except IndexError:
+                    pass
+        return DogminSurvey(xspace, yspace, dogmins)
+
+    def explore_uni(self, phases, out, workers=4, pool=None, callback=None, **kwargs):
+        """Search for invariant points on univariant line.
+
+        Every phase, which could become zero mode phase on univariant line
+        defines one candidate invariant point. Present phases not in out give
+        candidates with the same phases, other phases give candidates with
+        one more phase. All candidates are calculated concurrently, each in
+        own working directory (see `asession`).
+
+        Args:
+            phases (set): Set of present phases of univariant line
+            out (set): Set of zero mode phases of univariant line
+            workers (int): Maximum number of concurrent THERMOCALC processes.
+                Default 4
+            pool (TCSessionPool): When not None, staged worker directories of
+                pool are used instead of new ones, e.g. to stage them only once
+                for repeated searches. Default None
+            callback (function): When not None, called with phases, out and
+                parsed results of every candidate as soon as it is calculated.
+                Default None
+            calc (str): Type of calculation 'pt', 'tx' or 'px'. Default 'pt'
+            excess (set): Excess phases not considered. Default from scriptfile
+            guesses (list): ptguess used for all candidates. Default None
+                (guesses in scriptfile)
+            prange (tuple): Pressure range for calculation
+            trange (tuple): Temperature range for calculation
+
+        Returns:
+            list: List of (phases, out, results) tuples in order of completion.
+            Results are parsed by `parse_logfile`.
+        """
+        calc = kwargs.pop('calc', 'pt')
+        excess = kwargs.pop('excess', self.excess)
+        guesses = kwargs.pop('guesses', None)
+        candidates = [(phases, out.union({ophase})) for ophase in phases.difference(out).difference(excess)]
+        candidates += [(phases.union({ophase}), out.union({ophase}))
+                       for ophase in set(self.phases).difference(excess).difference(phases)]
+        if not candidates:
+            return []
+
+        async def candidate(session, cphases, cout):
+            return cphases, cout, await getattr(session, 'calc_' + calc)(cphases, cout, **kwargs)
+
+        async def explore():
+            found = []
+            async with AsyncTCSession(self, workers=max(1, min(workers, len(candidates))), pool=pool) as session:
+                tasks = [asyncio.ensure_future(candidate(session, *c)) for c in candidates]
+                try:
+                    for task in asyncio.as_completed(tasks):
+                        found.append(await task)
+                        if callback is not None:
+                            callback(*found[-1])
+                finally:
+                    # do not leave calculations running when search failed
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+            return found
+        # guesses are written before workers are staged or synced, so they copy them
+        if guesses is not None:
+            old_guesses = self.update_scriptfile(guesses=guesses, get_old_guesses=True)
+        try:
+            return run_coroutine(explore())
+        finally:
+            if guesses is not None:
+                self.update_scriptfile(guesses=old_guesses)
+
     def calc_variance(self, phases):
         """Get variance of assemblage.
 
@@ -945,27 +1595,158 @@ class TCAPI(object):
                 break
         return variance
 
-    def runtc(self, instr):
+    def runtc(self, instr, timeout=None, cache=False):
         """Low-level method to actually run THERMOCALC.
 
         Args:
             instr (str): String to be passed to standard input for session.
+            timeout (float): When not None, THERMOCALC process running longer
+                than timeout seconds is killed and `timedout` is set. Default None.
+            cache (bool): Whether to use cache of calculations when enabled.
+                On cache hit THERMOCALC is not executed and log and ic files
+                of cached run are restored. Default False.
 
         Returns:
             str: THERMOCALC standard output
         """
+        key, tcout = self._runtc_cached(instr, cache)
+        if tcout is not None:
+            return tcout
         if sys.platform.startswith('win'):
             startupinfo = subprocess.STARTUPINFO()
             startupinfo.dwFlags = 1
             startupinfo.wShowWindow = 0
         else:
             startupinfo = None
-        p = subprocess.Popen(str(self.tcexe), cwd=str(self.workdir), startupinfo=startupinfo, **popen_kw)
-        output, err = p.communicate(input=instr.encode(self.TCenc))
+        start_time = time.time()
+        with self.span('spawn'):
+            p = subprocess.Popen(str(self.tcexe), cwd=str(self.workdir), startupinfo=startupinfo, **popen_kw)
+        spawn_time = time.time()
+        stdin = instr.encode(self.TCenc)
+        try:
+            if self.timer is not None:
+                # input is written separately to be timed
+                with self.timer.span('stdin write'):
+                    try:
+                        p.stdin.write(stdin)
+                        p.stdin.flush()
+                    except BrokenPipeError:
+                        pass
+                stdin = None
+            with self.span('wait'):
+                output, err = p.communicate(input=stdin, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # hung THERMOCALC, e.g. iterating from bad guess
+            p.kill()
+            output, err = p.communicate()
+            self.timedout = timeout
         if err is not None:
             print(err.decode('utf-8'))
         sys.stdout.flush()
-        return output.decode(self.TCenc)
+        return self._runtc_done(key, instr, output.decode(self.TCenc), start_time, spawn_time)
+
+    def _runtc_cached(self, instr, cache):
+        """Reset state before run. Returns cache key and cached output or None."""
+        if self._tcout is None and getattr(self, 'OK', False):
+            self.check_tc()
+        self.timedout = False
+        if cache and self.cache is not None:
+            key = self.cache.key(self, instr)
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.restore(self, entry)
+                if hasattr(self, 'runstats'):
+                    self.runstats['cached'] += 1
+                if self.recorder is not None:
+                    self.recorder.record(self, instr, entry['tcout'])
+                return key, entry['tcout']
+            return key, None
+        return None, None
+
+    def _runtc_done(self, key, instr, output, start_time, spawn_time):
+        """Update statistics, cache and transcript after finished run."""
+        if hasattr(self, 'runstats'):
+            self.runstats['calls'] += 1
+            self.runstats['spawn'] += spawn_time - start_time
+            self.runstats['run'] += time.time() - spawn_time
+            self.runstats['timeouts'] += bool(self.timedout)
+        if key is not None and not self.timedout:
+            self.cache.put(key, self.cache.entry(self, output))
+        if self.recorder is not None and not self.timedout:
+            self.recorder.record(self, instr, output)
+        return output
+
+    async def aruntc(self, instr, timeout=None, cache=False):
+        """Asyncio counterpart of `runtc`.
+
+        THERMOCALC is started by `asyncio.create_subprocess_exec`, so event
+        loop is not blocked while calculation runs. Note that concurrent runs
+        must use different working directories (see `asession`).
+        """
+        key, tcout = self._runtc_cached(instr, cache)
+        if tcout is not None:
+            return tcout
+        if sys.platform.startswith('win'):
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags = 1
+            startupinfo.wShowWindow = 0
+        else:
+            startupinfo = None
+        start_time = time.time()
+        with self.span('spawn'):
+            p = await asyncio.create_subprocess_exec(str(self.tcexe), cwd=str(self.workdir), startupinfo=startupinfo, **popen_kw)
+        spawn_time = time.time()
+        try:
+            with self.span('wait'):
+                output, err = await asyncio.wait_for(p.communicate(input=instr.encode(self.TCenc)), timeout)
+        except asyncio.TimeoutError:
+            # hung THERMOCALC, e.g. iterating from bad guess
+            p.kill()
+            await p.wait()
+            output, err = b'', None
+            self.timedout = timeout
+        return self._runtc_done(key, instr, output.decode(self.TCenc), start_time, spawn_time)
+
+    async def acalc_t(self, phases, out, **kwargs):
+        """Asyncio counterpart of `calc_t`."""
+        ans = self._ans_t(phases, out, **kwargs)
+        tcout = await self.aruntc(ans, timeout=self.timeouts.get('t'), cache=True)
+        return tcout, ans
+
+    async def acalc_p(self, phases, out, **kwargs):
+        """Asyncio counterpart of `calc_p`."""
+        ans = self._ans_p(phases, out, **kwargs)
+        tcout = await self.aruntc(ans, timeout=self.timeouts.get('p'), cache=True)
+        return tcout, ans
+
+    async def acalc_pt(self, phases, out, **kwargs):
+        """Asyncio counterpart of `calc_pt`."""
+        ans = self._ans_pt(phases, out, **kwargs)
+        tcout = await self.aruntc(ans, timeout=self.timeouts.get('pt'), cache=True)
+        return tcout, ans
+
+    async def acalc_tx(self, phases, out, **kwargs):
+        """Asyncio counterpart of `calc_tx`."""
+        ans = self._ans_tx(phases, out, **kwargs)
+        tcout = await self.aruntc(ans, timeout=self.timeouts.get('tx'), cache=True)
+        return tcout, ans
+
+    async def acalc_px(self, phases, out, **kwargs):
+        """Asyncio counterpart of `calc_px`."""
+        ans = self._ans_px(phases, out, **kwargs)
+        tcout = await self.aruntc(ans, timeout=self.timeouts.get('px'), cache=True)
+        return tcout, ans
+
+    async def acalc_assemblage(self, phases, p, t):
+        """Asyncio counterpart of `calc_assemblage`."""
+        ans = self._ans_assemblage(phases, p, t)
+        tcout = await self.aruntc(ans, timeout=self.timeouts.get('assemblage'), cache=True)
+        return tcout, ans
+
+    async def adogmin(self, variance):
+        """Asyncio counterpart of `dogmin`."""
+        ans = self._ans_dogmin(variance)
+        return await self.aruntc(ans, timeout=self.timeouts.get('dogmin'), cache=True)
 
     def rundr(self):
         """Method to run drawpd."""
@@ -985,6 +1766,677 @@ class TCAPI(object):
             print('No drawpd executable identified in working directory.')
             return False
 
+class Scriptfile:
+    """In-memory model of THERMOCALC scriptfile.
+
+    Scriptfile is parsed once into text blocks and content of blocks tagged
+    by ``%{PSBGUESS-BEGIN}``, ``%{PSBDOGMIN-BEGIN}`` and ``%{PSBBULK-BEGIN}``
+    (and corresponding END tags). Edits are applied in memory and file is
+    written only when rendered content differs from content on disk. Writes
+    are atomic (temporary file renamed over scriptfile). When content of file
+    is modified by other program, it is parsed again before next edit.
+
+    Args:
+        path (Path): Path to scriptfile
+        encoding (str): Encoding of scriptfile. Default 'mac-roman'
+
+    Example:
+        >>> sc = Scriptfile(tc.scriptfile)
+        >>> sc.guesses = ptguess
+        >>> sc.set_bulk(bulk)
+        >>> sc.write()
+        True
+    """
+    tags = ('GUESS', 'DOGMIN', 'BULK')
+
+    def __init__(self, path, encoding='mac-roman'):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.load()
+
+    def __repr__(self):
+        return 'Scriptfile {}'.format(self.path)
+
+    def load(self):
+        """Parse scriptfile into text blocks and tagged blocks."""
+        with self.path.open('r', encoding=self.encoding) as f:
+            lines = f.readlines()
+        self._filedigest = self._filehash()
+        # parts are lists of lines or names of tagged blocks
+        self._parts = [[]]
+        self.blocks = {}
+        tag = None
+        for ln in lines:
+            if tag is None:
+                self._parts[-1].append(ln)
+                for t in self.tags:
+                    if t not in self.blocks and ln.startswith('%{{PSB{}-BEGIN}}'.format(t)):
+                        tag = t
+                        self.blocks[t] = []
+                        self._parts.append(t)
+                        self._parts.append([])
+            elif ln.startswith('%{{PSB{}-END}}'.format(tag)):
+                self._parts[-1].append(ln)
+                tag = None
+            else:
+                self.blocks[tag].append(ln)
+        if tag is not None:
+            # missing END tag, keep file untouched
+            self._parts.remove(tag)
+            self._parts[-2].extend(self.blocks.pop(tag))
+        self._digest = hashlib.sha256(self.render().encode(self.encoding)).digest()
+
+    def _filehash(self):
+        # modification time and size could stay same after edit
+        return hashlib.sha256(self.path.read_bytes()).digest()
+
+    def refresh(self):
+        """Parse scriptfile again when modified on disk."""
+        if self._filehash() != self._filedigest:
+            self.load()
+
+    def render(self):
+        """Return content of scriptfile as string."""
+        return ''.join(''.join(part) if isinstance(part, list) else ''.join(self.blocks[part]) for part in self._parts)
+
+    def write(self, path=None):
+        """Write scriptfile when content changed.
+
+        Args:
+            path (Path): When not None, content is written to other file.
+
+        Returns:
+            bool: True when file was written
+        """
+        text = self.render()
+        digest = hashlib.sha256(text.encode(self.encoding)).digest()
+        if path is None:
+            if digest == self._digest:
+                return False
+            path = self.path
+        tmp = path.with_name('{}.{}.tmp'.format(path.name, os.getpid()))
+        with tmp.open('w', encoding=self.encoding) as f:
+            f.write(text)
+        os.replace(str(tmp), str(path))
+        if path == self.path:
+            self._digest = digest
+            self._filedigest = self._filehash()
+        return True
+
+    def copy(self, path):
+        """Write content to other file, e.g. scriptfile of worker directory.
+
+        Returns:
+            Scriptfile: model of new scriptfile
+        """
+        self.refresh()
+        self.write(Path(path))
+        sc = copy.copy(self)
+        sc.path = Path(path)
+        sc._parts = [list(part) if isinstance(part, list) else part for part in self._parts]
+        sc.blocks = {tag: list(lines) for tag, lines in self.blocks.items()}
+        sc._filedigest = sc._filehash()
+        return sc
+
+    def set_block(self, tag, lines):
+        """Replace content of tagged block by list of lines."""
+        self.refresh()
+        if tag in self.blocks:
+            self.blocks[tag] = [ln if ln.endswith('\n') else ln + '\n' for ln in lines]
+
+    @property
+    def guesses(self):
+        """list: Lines of ptguess block."""
+        self.refresh()
+        if 'GUESS' in self.blocks:
+            return [ln.strip() for ln in self.blocks['GUESS']]
+
+    @guesses.setter
+    def guesses(self, guesses):
+        self.set_block('GUESS', guesses)
+
+    def set_dogmin(self, dogmin, which=None, p=None, T=None):
+        """Set dogmin block. See `TCAPI.update_scriptfile`."""
+        dglines = ['dogmin {}'.format(dogmin)]
+        if which is not None:
+            dglines.append('which {}'.format(' '.join(which)))
+            dglines.append('setPwindow {} {}'.format(p, p))
+            dglines.append('setTwindow {} {}'.format(T, T))
+        self.set_block('DOGMIN', dglines)
+
+    def set_bulk(self, bulk, xvals=(0, 1), xsteps=20):
+        """Set bulk block. See `TCAPI.update_scriptfile`."""
+        if len(bulk) == 2:
+            bulines = ['setbulk yes {} % x={:g}'.format(' '.join(bulk[0]), xvals[0]),
+                       'setbulk yes {} {:d} % x={:g}'.format(' '.join(bulk[1]), xsteps, xvals[1])]
+        else:
+            bulines = ['setbulk yes {}'.format(' '.join(bulk[0]))]
+        self.set_block('BULK', bulines)
+
+
+class TCSessionPool:
+    """Pool of pre-staged THERMOCALC working directories.
+
+    Every worker is a `TCAPI` instance operating on its own copy of working
+    directory, so several THERMOCALC calculations could run concurrently and
+    directories are staged only once for all calculations made during session.
+    When requested, each worker is probed by single THERMOCALC run, which
+    measures the start-up cost (process spawn, dataset and a-x file loading)
+    paid by every calculation (see `probe`). When only one worker is
+    requested, the original working directory is used.
+
+    Attributes:
+        tc (TCAPI): THERMOCALC API of project working directory
+        workers (list): List of `TCAPI` instances of workers
+        startup (float): Mean duration of THERMOCALC run doing no calculation.
+            NaN when workers were not probed.
+
+    """
+    def __init__(self, tc, workers=1, basedir=None, probe=False):
+        self.tc = tc
+        self._tmp = None
+        if workers > 1:
+            if basedir is None:
+                self._tmp = tempfile.TemporaryDirectory(prefix='pypsbuilder-')
+                basedir = self._tmp.name
+            self.workers = [tc.clone(Path(basedir).joinpath('worker{}'.format(wix))) for wix in range(workers)]
+        else:
+            self.workers = [tc]
+        self._free = queue.Queue()
+        self._runstats = dict(calls=0, spawn=0.0, run=0.0, timeouts=0, cached=0)
+        for wtc in self.workers:
+            self._free.put(wtc)
+        self.startup = np.nan
+        if probe:
+            self.probe()
+        self._baseline = [dict(wtc.runstats) for wtc in self.workers]
+
+    def probe(self):
+        """Measure start-up cost of THERMOCALC by single run in every worker.
+
+        Note that the run overwrites log and ic files of workers, i.e. of
+        project working directory when only one worker is used.
+
+        Returns:
+            float: mean duration of THERMOCALC run doing no calculation
+        """
+        durations = []
+        for wtc in self.workers:
+            # probe runs are not counted in session statistics
+            runstats = dict(wtc.runstats)
+            start_time = time.time()
+            wtc.runtc('\nkill\n\n')
+            durations.append(time.time() - start_time)
+            wtc.runstats.update(runstats)
+        self.startup = sum(durations) / len(durations)
+        return self.startup
+
+    def __repr__(self):
+        return 'THERMOCALC session with {} worker(s) in {}'.format(len(self.workers), self.workers[0].workdir.parent)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.workers)
+
+    def acquire(self):
+        """Return free worker. Blocks until some worker is available."""
+        return self._free.get()
+
+    def release(self, wtc):
+        """Return worker to pool."""
+        self._free.put(wtc)
+
+    @contextmanager
+    def worker(self):
+        """Context manager providing free worker."""
+        wtc = self.acquire()
+        try:
+            yield wtc
+        finally:
+            self.release(wtc)
+
+    def add_runstats(self, runstats):
+        """Add statistics of calculations done outside of pool workers, e.g.
+        in worker processes."""
+        for k in self._runstats:
+            self._runstats[k] += runstats[k]
+
+    @property
+    def stats(self):
+        """dict: Statistics of THERMOCALC calls made during session.
+
+        Keys are `calls`, `spawn` (total time spent by process creation),
+        `run` (total time of THERMOCALC runs), `timeouts` (number of runs
+        killed by timeout, see `TCAPI.timeouts`), `cached` (number of
+        calculations served from cache, see `TCCache`), `startup` (measured start-up cost
+        of single run including spawn) and `overhead` (estimated start-up cost
+        paid by all calls).
+        """
+        st = dict(self._runstats)
+        for wtc, base in zip(self.workers, self._baseline):
+            for k in st:
+                st[k] += wtc.runstats[k] - base[k]
+        st['startup'] = self.startup
+        st['overhead'] = st['calls'] * self.startup
+        return st
+
+    def sync(self):
+        """Copy scriptfile of project working directory to workers, which
+        scriptfile differs, e.g. after change of guesses or bulk."""
+        sc = self.tc.script
+        sc.refresh()
+        text = sc.render()
+        for wtc in self.workers:
+            if wtc is not self.tc and wtc.script.render() != text:
+                wtc._script = sc.copy(wtc.scriptfile)
+
+    def close(self):
+        """Remove staged working directories."""
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+
+class AsyncTCSession:
+    """Asyncio session running THERMOCALC calculations concurrently.
+
+    Session uses pool of pre-staged working directories (see `TCSessionPool`).
+    Every calculation waits for free worker directory, so the number of
+    concurrent THERMOCALC processes is bounded by number of workers.
+    Calculations return parsed results, as worker directory is released once
+    calculation is finished.
+
+    Existing pool could be passed to session, so worker directories are
+    staged only once for several sessions. Scriptfiles of workers are then
+    synchronized with project scriptfile (see `TCSessionPool.sync`).
+
+    Attributes:
+        pool (TCSessionPool): pool of worker directories
+
+    """
+    def __init__(self, tc, workers=4, basedir=None, pool=None):
+        if pool is None:
+            self.pool = TCSessionPool(tc, workers=workers, basedir=basedir, probe=False)
+        else:
+            # existing pool is kept staged for later sessions
+            pool.sync()
+            self.pool = pool
+        self._owner = pool is None
+        self._free = None
+
+    def __repr__(self):
+        return 'Asyncio {}'.format(self.pool)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    @property
+    def stats(self):
+        """dict: Statistics of THERMOCALC calls. See `TCSessionPool.stats`"""
+        return self.pool.stats
+
+    async def acquire(self):
+        """Return free worker. Waits until some worker is available."""
+        if self._free is None:
+            # queue is created within running event loop
+            self._free = asyncio.Queue()
+            for wtc in self.pool.workers:
+                self._free.put_nowait(wtc)
+        return await self._free.get()
+
+    def release(self, wtc):
+        """Return worker to session."""
+        self._free.put_nowait(wtc)
+
+    async def run(self, method, *args, guesses=None, bulk=None, parse=None, **kwargs):
+        """Run asyncio calculation method of free worker and parse results.
+
+        Args:
+            method (str): Name of `TCAPI` asyncio method, e.g. 'acalc_pt'
+            guesses (list): ptguess written to scriptfile before calculation
+            bulk (list): bulk composition written to scriptfile before calculation
+            parse (dict): keyword arguments of `TCAPI.parse_logfile`
+
+        Scriptfile is updated and results are parsed in default executor of
+        event loop, so file I/O and parsing do not block other workers.
+
+        Returns:
+            tuple: parsed results, see `TCAPI.parse_logfile`
+        """
+        loop = asyncio.get_running_loop()
+        wtc = await self.acquire()
+        try:
+            if guesses is not None or bulk is not None:
+                await loop.run_in_executor(None, functools.partial(wtc.update_scriptfile, guesses=guesses, bulk=bulk))
+            await getattr(wtc, method)(*args, **kwargs)
+            return await loop.run_in_executor(None, functools.partial(wtc.parse_logfile, **(parse or {})))
+        finally:
+            self.release(wtc)
+
+    async def calc_t(self, phases, out, guesses=None, **kwargs):
+        """Calculate univariant line using Calc T at P strategy. See `TCAPI.calc_t`"""
+        return await self.run('acalc_t', phases, out, guesses=guesses, **kwargs)
+
+    async def calc_p(self, phases, out, guesses=None, **kwargs):
+        """Calculate univariant line using Calc P at T strategy. See `TCAPI.calc_p`"""
+        return await self.run('acalc_p', phases, out, guesses=guesses, **kwargs)
+
+    async def calc_pt(self, phases, out, guesses=None, **kwargs):
+        """Calculate invariant point. See `TCAPI.calc_pt`"""
+        return await self.run('acalc_pt', phases, out, guesses=guesses, **kwargs)
+
+    async def calc_tx(self, phases, out, guesses=None, **kwargs):
+        """Calculate T-X invariant point or univariant line. See `TCAPI.calc_tx`"""
+        return await self.run('acalc_tx', phases, out, guesses=guesses, parse=dict(tx=True), **kwargs)
+
+    async def calc_px(self, phases, out, guesses=None, **kwargs):
+        """Calculate P-X invariant point or univariant line. See `TCAPI.calc_px`"""
+        return await self.run('acalc_px', phases, out, guesses=guesses, parse=dict(px=True), **kwargs)
+
+    async def calc_assemblage(self, phases, p, t, guesses=None, bulk=None):
+        """Calculate compositions of stable assemblage. See `TCAPI.calc_assemblage`"""
+        return await self.run('acalc_assemblage', phases, p, t, guesses=guesses, bulk=bulk)
+
+    async def dogmin(self, variance, guesses=None, **kwargs):
+        """Run dogmin session. Returns (output, resic), see `TCAPI.parse_dogmin`.
+        (None, None) is returned when THERMOCALC was killed by timeout.
+
+        Keyword arguments (e.g. dogmin, which, p, T or bulk) are used to update
+        scriptfile of worker before calculation. See `TCAPI.update_scriptfile`.
+        """
+        loop = asyncio.get_running_loop()
+        wtc = await self.acquire()
+        try:
+            if guesses is not None or kwargs:
+                await loop.run_in_executor(None, functools.partial(wtc.update_scriptfile, guesses=guesses, **kwargs))
+            await wtc.adogmin(variance)
+            if wtc.timedout:
+                # log and ic files are incomplete or left by previous run
+                return None, None
+            return await loop.run_in_executor(None, wtc.parse_dogmin)
+        finally:
+            self.release(wtc)
+
+    def close(self):
+        """Remove staged working directories, unless pool was passed to session."""
+        if self._owner:
+            self.pool.close()
+
+
+class TCCache:
+    """Content-addressed on-disk cache of THERMOCALC calculations.
+
+    Entries are keyed by SHA-256 hash of THERMOCALC input together with
+    content of all files affecting calculation, i.e. scriptfile (including
+    ptguess, bulk and dogmin blocks), prefs file, a-x file, dataset and
+    executable, so cached calculation is never stale. Entry stores standard
+    output, log and ic files. Parsed results are stored in separate entries
+    keyed by content of log and ic files (see `parsed_key`), so they are
+    never attached to other run. Every entry is stored in its
+    own gzipped pickle named by key. When total size exceeds `maxsize`, least
+    recently used entries are removed.
+
+    Attributes:
+        cachedir (Path): Cache directory
+        maxsize (int): Maximum size of cache in bytes
+        stats (dict): Numbers of run `hits` and `misses`, parsed results
+            `parse_hits` and `parse_misses` and `evictions`
+
+    Example:
+        >>> tc.enable_cache()
+        >>> tcout, ans = tc.calc_assemblage(phases, p, t)
+        >>> tc.cache.stats
+        {'hits': 0, 'misses': 1, 'parse_hits': 0, 'parse_misses': 0, 'evictions': 0}
+    """
+    def __init__(self, cachedir, maxsize=512 * 2**20):
+        self.cachedir = Path(cachedir).resolve()
+        self.cachedir.mkdir(parents=True, exist_ok=True)
+        self.maxsize = maxsize
+        self.stats = dict(hits=0, misses=0, parse_hits=0, parse_misses=0, evictions=0)
+        self._digests = {}
+        # cache is shared by workers of asyncio session parsing in threads
+        self._lock = threading.RLock()
+        # least recently used first
+        self._index = OrderedDict()
+        entries = [e for e in os.scandir(str(self.cachedir)) if e.name.endswith('.gz')]
+        for e in sorted(entries, key=lambda e: e.stat().st_mtime):
+            self._index[e.name[:-3]] = e.stat().st_size
+        self._size = sum(self._index.values())
+
+    def __getstate__(self):
+        # copies in worker processes use their own lock
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return 'THERMOCALC cache with {} entries ({:.1f} MB) in {}'.format(len(self), self._size / 2**20, self.cachedir)
+
+    def __len__(self):
+        return len(self._index)
+
+    def file_digest(self, path):
+        """Return hash of file content. Hashes are reused until modification
+        time or size of file changes, so it is used only for executable, a-x
+        file and dataset, which are not rewritten by calculations."""
+        st = path.stat()
+        ident = (st.st_mtime_ns, st.st_size)
+        cached = self._digests.get(path)
+        if cached is None or cached[0] != ident:
+            h = hashlib.sha256()
+            with path.open('rb') as f:
+                for chunk in iter(lambda: f.read(2**20), b''):
+                    h.update(chunk)
+            cached = (ident, h.hexdigest())
+            self._digests[path] = cached
+        return cached[1]
+
+    def key(self, tc, instr):
+        """Return key of calculation defined by input and working directory."""
+        h = hashlib.sha256(instr.encode(tc.TCenc))
+        for f in (tc.tcexe, tc.axfile, tc.datasetfile):
+            h.update(self.file_digest(Path(f)).encode() if Path(f).exists() else b'-')
+        for f in (tc.prefsfile, tc.scriptfile):
+            h.update(f.read_bytes() if f.exists() else b'-')
+        return h.hexdigest()
+
+    def parsed_key(self, tc, tx=False, px=False):
+        """Return key of parsed results of log and ic files in working directory.
+
+        Files are hashed on every lookup, as they are rewritten by every run
+        often with same size within resolution of modification time.
+        """
+        h = hashlib.sha256('parsed {} {} {}'.format(tc.tcnewversion, tx, px).encode())
+        for f in (tc.logfile, tc.icfile):
+            h.update(hashlib.sha256(f.read_bytes()).digest() if f.exists() else b'-')
+        return h.hexdigest()
+
+    def path(self, key):
+        return self.cachedir.joinpath(key + '.gz')
+
+    def entry(self, tc, tcout):
+        """Create entry from output and files of finished run."""
+        return dict(tcout=tcout,
+                    log=tc.logfile.read_bytes() if tc.logfile.exists() else None,
+                    ic=tc.icfile.read_bytes() if tc.icfile.exists() else None)
+
+    def restore(self, tc, entry):
+        """Write log and ic files of cached run to working directory."""
+        for f, content in ((tc.logfile, entry['log']), (tc.icfile, entry['ic'])):
+            if content is None:
+                if f.exists():
+                    f.unlink()
+            else:
+                f.write_bytes(content)
+
+    def get(self, key, parsed=False):
+        """Return cached entry or None.
+
+        Args:
+            key (str): Key of entry
+            parsed (bool): Whether entry holds parsed results, i.e. lookup is
+                counted in `parse_hits` and `parse_misses`. Default False.
+        """
+        prefix = 'parse_' if parsed else ''
+        with self._lock:
+            try:
+                with gzip.open(str(self.path(key)), 'rb') as stream:
+                    entry = pickle.load(stream)
+                # mark as recently used
+                os.utime(str(self.path(key)))
+            except Exception:
+                self.stats[prefix + 'misses'] += 1
+                return None
+            if key not in self._index:
+                self._index[key] = self.path(key).stat().st_size
+                self._size += self._index[key]
+            self._index.move_to_end(key)
+            self.stats[prefix + 'hits'] += 1
+            return entry
+
+    def put(self, key, entry):
+        """Store entry and evict least recently used ones when needed."""
+        with self._lock:
+            path = self.path(key)
+            tmp = path.with_name('{}.{}.tmp'.format(key, os.getpid()))
+            with gzip.open(str(tmp), 'wb', compresslevel=1) as stream:
+                pickle.dump(entry, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(str(tmp), str(path))
+            self._size -= self._index.pop(key, 0)
+            self._index[key] = path.stat().st_size
+            self._size += self._index[key]
+            while self._size > self.maxsize and len(self._index) > 1:
+                old, size = self._index.popitem(last=False)
+                self._size -= size
+                if self.path(old).exists():
+                    self.path(old).unlink()
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            for key in self._index:
+                if self.path(key).exists():
+                    self.path(key).unlink()
+            self._index.clear()
+            self._size = 0
+
+
+class TCTimer:
+    """Timing of named spans of THERMOCALC calculations.
+
+    TCAPI records spans of process creation ('spawn'), writing of input
+    ('stdin write'), waiting for THERMOCALC ('wait'), reading of output files
+    ('log read', 'ic read'), parsing ('parse') and scriptfile modifications
+    ('scriptfile update'). Explorers add starting guesses lookup ('guess
+    lookup'). Every span is stored with current field label and run number,
+    so durations could be aggregated per span name, field and run.
+
+    Attributes:
+        events (list): Recorded spans as (name, field, run, start, duration,
+            pid) tuples. Times are in seconds.
+        field (str): Label of field attached to following spans
+        run (int): Number of current run (see `start_run`)
+
+    Example:
+        >>> pt.tc.enable_timer()
+        >>> pt.calculate_composition()
+        >>> pt.tc.timer.summary()['wait']
+        {'count': 2500, 'total': 95.1, 'mean': 0.038, 'max': 0.6}
+        >>> pt.tc.timer.to_chrome_trace('gridding.json')
+    """
+    def __init__(self):
+        self.events = []
+        self.field = None
+        self.run = 0
+
+    def __repr__(self):
+        return 'Timer with {} spans in {} runs'.format(len(self.events), self.run)
+
+    def __getstate__(self):
+        # copies in worker processes collect only their own spans
+        state = self.__dict__.copy()
+        state['events'] = []
+        return state
+
+    @contextmanager
+    def span(self, name):
+        """Context manager recording duration of named span."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.events.append((name, self.field, self.run, start, time.time() - start, os.getpid()))
+
+    def start_run(self):
+        """Start new run, e.g. gridding. Returns run number."""
+        self.run += 1
+        self.field = None
+        return self.run
+
+    def pop_events(self):
+        """Return recorded spans and clear them."""
+        events, self.events = self.events, []
+        return events
+
+    def summary(self, by='name', run=None):
+        """Aggregate durations of spans.
+
+        Args:
+            by (str): 'name' to aggregate by span name, 'field' to aggregate
+                by field label and span name. Default 'name'
+            run (int): When not None, only spans of given run are used.
+                Default None
+
+        Returns:
+            dict: Span name (and field label) mapped to dict with count,
+            total, mean and max duration.
+        """
+        groups = OrderedDict()
+        for name, field, erun, start, duration, pid in self.events:
+            if run is None or erun == run:
+                if by == 'field':
+                    groups.setdefault(field, OrderedDict()).setdefault(name, []).append(duration)
+                else:
+                    groups.setdefault(name, []).append(duration)
+
+        def stats(durations):
+            return dict(count=len(durations), total=sum(durations),
+                        mean=sum(durations) / len(durations), max=max(durations))
+        if by == 'field':
+            return OrderedDict((field, OrderedDict((name, stats(d)) for name, d in spans.items()))
+                               for field, spans in groups.items())
+        return OrderedDict((name, stats(d)) for name, d in groups.items())
+
+    def to_json(self, path, run=None):
+        """Write aggregated statistics and all spans to JSON file."""
+        events = [dict(name=name, field=field, run=erun, start=start, duration=duration, pid=pid)
+                  for name, field, erun, start, duration, pid in self.events if run is None or erun == run]
+        with open(str(path), 'w') as f:
+            json.dump(dict(spans=self.summary(run=run), fields=self.summary(by='field', run=run),
+                           events=events), f, indent=1)
+
+    def to_chrome_trace(self, path, run=None):
+        """Write spans as Chrome trace file (chrome://tracing or Perfetto)."""
+        events = [dict(name=name, cat=field or 'tc', ph='X', ts=1e6 * start, dur=1e6 * duration,
+                       pid=pid, tid=pid, args=dict(field=field, run=erun))
+                  for name, field, erun, start, duration, pid in self.events if run is None or erun == run]
+        with open(str(path), 'w') as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit='ms'), f)
+
+
 class Dogmin:
     def __init__(self, **kwargs):
         assert 'output' in kwargs, 'Dogmin output must be provided'
@@ -1026,6 +2478,388 @@ class Dogmin:
         return  block[gixs:gixe]
 
 
+class DogminSurvey:
+    """Stable assemblages found by dogmin on regular grid.
+
+    Grid cells with three or more different assemblages at its corners are
+    likely to contain invariant point, so they are good places where to
+    start building topology.
+
+    Args:
+        xspace (numpy.array): x coordinates of grid (temperature)
+        yspace (numpy.array): y coordinates of grid (pressure)
+        dogmins (dict): `Dogmin` results keyed by (r, c) grid indexes
+
+    Attributes:
+        keys (list): Stable assemblages as frozensets of phases
+        labels (numpy.array): Integer raster of indexes to keys. Grid points
+            where dogmin failed are -1.
+
+    Example:
+        >>> survey = tc.dogmin_survey(nx=8, ny=8, variance=4, workers=4)
+        >>> survey.invariant_candidates()[0]
+        (575.0, 8.2, [frozenset({'g', 'bi', ...}), ...])
+    """
+    def __init__(self, xspace, yspace, dogmins):
+        self.xspace = np.asarray(xspace)
+        self.yspace = np.asarray(yspace)
+        self.dogmins = dogmins
+        self.keys = list(OrderedDict.fromkeys(frozenset(dgm.phases) for dgm in dogmins.values()))
+        lookup = {key: lab for lab, key in enumerate(self.keys)}
+        self.labels = np.full((len(self.yspace), len(self.xspace)), -1)
+        for (r, c), dgm in dogmins.items():
+            self.labels[r, c] = lookup[frozenset(dgm.phases)]
+
+    def __repr__(self):
+        return 'Dogmin survey on {}x{} grid with {} assemblages'.format(len(self.xspace), len(self.yspace), len(self.keys))
+
+    def counts(self):
+        """Return number of grid points of every assemblage."""
+        return OrderedDict((key, int(np.sum(self.labels == lab))) for lab, key in enumerate(self.keys))
+
+    def invariant_candidates(self):
+        """Return grid cells with at least three assemblages at corners.
+
+        Returns:
+            list: (x, y, keys) tuples with cell centre and assemblages at
+            corners, sorted by decreasing number of assemblages.
+        """
+        candidates = []
+        for r in range(len(self.yspace) - 1):
+            for c in range(len(self.xspace) - 1):
+                labs = set(self.labels[r:r + 2, c:c + 2].flat).difference({-1})
+                if len(labs) > 2:
+                    candidates.append(((self.xspace[c] + self.xspace[c + 1]) / 2,
+                                       (self.yspace[r] + self.yspace[r + 1]) / 2,
+                                       [self.keys[lab] for lab in sorted(labs)]))
+        return sorted(candidates, key=lambda cand: -len(cand[2]))
+
+    def show(self, excess={}, filename=None):
+        """Show labelled raster of stable assemblages.
+
+        Args:
+            excess (set): Phases not shown in labels. Default empty
+            filename (str): When not None, figure is saved instead of shown.
+        """
+        fig, ax = plt.subplots()
+        dx = (self.xspace[1] - self.xspace[0]) / 2 if len(self.xspace) > 1 else 0.5
+        dy = (self.yspace[1] - self.yspace[0]) / 2 if len(self.yspace) > 1 else 0.5
+        extent = (self.xspace[0] - dx, self.xspace[-1] + dx, self.yspace[0] - dy, self.yspace[-1] + dy)
+        ax.imshow(np.ma.masked_less(self.labels, 0), origin='lower', extent=extent, aspect='auto',
+                  cmap='tab20', interpolation='nearest')
+        for lab, key in enumerate(self.keys):
+            r, c = np.argwhere(self.labels == lab).mean(axis=0)
+            ax.text(np.interp(c, np.arange(len(self.xspace)), self.xspace),
+                    np.interp(r, np.arange(len(self.yspace)), self.yspace),
+                    ' '.join(sorted(key.difference(excess))), ha='center', va='center', fontsize=8)
+        for x, y, keys in self.invariant_candidates():
+            ax.plot(x, y, 'k*')
+        ax.set_xlabel('Temperature [C]')
+        ax.set_ylabel('Pressure [kbar]')
+        ax.set_title('Dogmin survey')
+        if filename is None:
+            plt.show()
+        else:
+            fig.savefig(filename)
+            plt.close(fig)
+
+
+class ResultRow(dict):
+    """Result dict of single row of `ResultTable`.
+
+    Row is kept attached to table while referenced, so edits of its data
+    and ptguess, e.g. ``res[0]['data']['g']['mode'] = 0``, are written back
+    to table before columns are accessed.
+    """
+    pass
+
+
+class ResultTable:
+    """Columnar storage of THERMOCALC results.
+
+    Values are stored in one float array per (phase, variable) column with
+    one item per calculated point. Missing values are NaN. Ptguesses are
+    stored as text blocks. Table behaves like list of result dicts with data
+    and ptguess keys, so ``res[0]['data']['g']['mode']`` works as for lists
+    returned by older versions, while columns could be sliced directly with
+    NumPy.
+
+    Rows are returned as `ResultRow` dicts attached to table while they are
+    referenced, so edits of row data and ptguess are written back to columns.
+    Rows are detached once they are replaced (`set_row`, `set_value`), removed
+    or when phase is renamed.
+
+    Attributes:
+        ptguesses (list): List of ptguess text blocks (None when missing).
+
+    Example:
+        >>> status, variance, pts, res, output = tc.parse_logfile()
+        >>> res.column('g', 'mode')
+        array([0.02496698, 0.02501231, ...])
+    """
+    def __init__(self, results=None):
+        self._columns = OrderedDict()
+        self._phases = OrderedDict()
+        self._nrows = 0
+        self._capacity = 0
+        self._rows = weakref.WeakValueDictionary()
+        self.ptguesses = []
+        if results is not None:
+            self.extend(results)
+
+    def __repr__(self):
+        return 'ResultTable with {} rows and {} columns'.format(len(self), len(self._columns))
+
+    def __len__(self):
+        return self._nrows
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, idx):
+        # integer index returns attached row dict, slices return new table
+        if isinstance(idx, (int, np.integer)):
+            if idx < 0:
+                idx += len(self)
+            if not 0 <= idx < len(self):
+                raise IndexError('ResultTable index out of range')
+            row = self._rows.get(idx)
+            if row is None:
+                row = ResultRow(data=self._data(idx), ptguess=self.ptguess(idx))
+                self._rows[idx] = row
+            return row
+        self._flush()
+        idx = np.arange(len(self))[idx]
+        table = ResultTable()
+        table._columns = OrderedDict((key, col[idx]) for key, col in self._columns.items())
+        table._phases = OrderedDict((phase, list(variables)) for phase, variables in self._phases.items())
+        table._nrows = table._capacity = len(idx)
+        table.ptguesses = [self.ptguesses[i] for i in idx]
+        return table
+
+    def __getstate__(self):
+        self._flush()
+        return dict(columns=OrderedDict((key, col[:len(self)].copy()) for key, col in self._columns.items()),
+                    ptguesses=self.ptguesses)
+
+    def __setstate__(self, state):
+        self.__init__()
+        columns = state['columns']
+        if 'values' in state:
+            # 2D array used before columns were stored separately
+            columns = OrderedDict((key, state['values'][:, col]) for col, key in enumerate(columns))
+        self._nrows = self._capacity = len(state['ptguesses'])
+        for (phase, var), col in columns.items():
+            self._columns[(phase, var)] = np.array(col, dtype=float)
+            self._phases.setdefault(phase, []).append(var)
+        self.ptguesses = state['ptguesses']
+
+    @property
+    def columns(self):
+        """list: (phase, variable) tuples of stored columns."""
+        return list(self._columns)
+
+    @property
+    def values(self):
+        """numpy.array: 2D array of stored values (rows x columns) in order of
+        `columns`. Array is a copy, assign to replace all stored values."""
+        self._flush()
+        if not self._columns:
+            return np.empty((len(self), 0))
+        return np.column_stack([col[:len(self)] for col in self._columns.values()])
+
+    @values.setter
+    def values(self, values):
+        self._flush()
+        for j, col in enumerate(self._columns.values()):
+            col[:len(self)] = values[:, j]
+        self._rows.clear()
+
+    @property
+    def phases(self):
+        """list: Phases (and end-members) with stored values."""
+        return list(self._phases)
+
+    def variables(self, phase):
+        """list: Variables stored for phase."""
+        return list(self._phases.get(phase, []))
+
+    def _column(self, phase, var):
+        # stored column, new one is created when missing
+        col = self._columns.get((phase, var))
+        if col is None:
+            col = np.full(self._capacity, np.nan)
+            self._columns[(phase, var)] = col
+            self._phases.setdefault(phase, []).append(var)
+        return col
+
+    def _reserve(self, nrows):
+        if nrows > self._capacity:
+            self._capacity = max(4, nrows, 2 * self._capacity)
+            for key, col in self._columns.items():
+                self._columns[key] = np.full(self._capacity, np.nan)
+                self._columns[key][:len(self)] = col[:len(self)]
+
+    def _store(self, idx, res):
+        # write result dict to row
+        for col in self._columns.values():
+            col[idx] = np.nan
+        if res['data'] is not None:
+            for phase, dt in res['data'].items():
+                for var, val in dt.items():
+                    self._column(phase, var)[idx] = val
+        ptguess = res['ptguess']
+        self.ptguesses[idx] = None if ptguess is None else '\n'.join(ptguess)
+
+    def _flush(self):
+        # write edits of attached rows back to columns
+        for idx, row in list(self._rows.items()):
+            self._store(idx, row)
+
+    def _reorder(self, order):
+        # keep rows in given order, remaining rows are removed
+        self._flush()
+        n = len(self)
+        for col in self._columns.values():
+            col[:len(order)] = col[order]
+            col[len(order):n] = np.nan
+        self.ptguesses = [self.ptguesses[i] for i in order]
+        self._nrows = len(order)
+        position = dict(zip(order.tolist(), range(len(order))))
+        rows = list(self._rows.items())
+        self._rows.clear()
+        for idx, row in rows:
+            if idx in position:
+                self._rows[position[idx]] = row
+
+    def append(self, res):
+        """Append result dict with data and ptguess keys."""
+        self._reserve(len(self) + 1)
+        self._nrows += 1
+        self.ptguesses.append(None)
+        self._store(len(self) - 1, res)
+
+    def extend(self, results):
+        """Append all results from list of result dicts or other ResultTable."""
+        if isinstance(results, ResultTable):
+            results._flush()
+            start = len(self)
+            self._reserve(start + len(results))
+            for (phase, var), col in results._columns.items():
+                self._column(phase, var)[start:start + len(results)] = col[:len(results)]
+            self._nrows += len(results)
+            self.ptguesses.extend(results.ptguesses)
+        else:
+            for res in results:
+                self.append(res)
+
+    def set_row(self, idx, res):
+        """Replace row by result dict or first row of other ResultTable."""
+        if isinstance(res, ResultTable):
+            res = res[0]
+        self._flush()
+        self._rows.pop(idx, None)
+        self._store(idx, res)
+
+    def __delitem__(self, idx):
+        self._reorder(np.delete(np.arange(len(self)), idx))
+
+    def insert(self, idx, res):
+        """Insert result dict before index."""
+        self.append(res)
+        self._reorder(np.insert(np.arange(len(self) - 1), idx, len(self) - 1))
+
+    def _data(self, idx):
+        data = {}
+        for phase, variables in self._phases.items():
+            dt = {}
+            for var in variables:
+                val = self._columns[(phase, var)][idx]
+                if val == val:
+                    dt[var] = float(val)
+            if dt:
+                data[phase] = dt
+        return data
+
+    def data(self, idx):
+        """dict: Get copy of data dict of row. Empty when no values are stored."""
+        self._flush()
+        return self._data(idx)
+
+    def set_value(self, idx, phase, var, value):
+        """Set value of variable for given phase in row."""
+        self._flush()
+        self._rows.pop(idx, None)
+        self._column(phase, var)[:len(self)][idx] = value
+
+    def ptguess(self, idx):
+        """list: Get ptguess lines of row."""
+        row = self._rows.get(idx)
+        if row is not None:
+            return None if row['ptguess'] is None else list(row['ptguess'])
+        ptguess = self.ptguesses[idx]
+        if ptguess is None:
+            return None
+        return ptguess.split('\n') if ptguess else []
+
+    def column(self, phase, var, idx=slice(None)):
+        """numpy.array: Values of variable for given phase. NaN when missing."""
+        self._flush()
+        col = self._columns.get((phase, var))
+        if col is None:
+            return np.full(len(np.arange(len(self))[idx]), np.nan)
+        return col[:len(self)][idx]
+
+    def phase_data(self, phase, idx=slice(None), variables=None):
+        """dict: Arrays of variables for given phase.
+
+        Args:
+            phase (str): Phase or end-member name
+            idx: rows to select. Default all.
+            variables (iterable): Names of variables to select. Default all.
+        """
+        self._flush()
+        return {var: self._columns[(phase, var)][:len(self)][idx] for var in self._phases.get(phase, [])
+                if variables is None or var in variables}
+
+    def contains(self, phase, idx=slice(None)):
+        """numpy.array: Boolean array indicating rows containing phase."""
+        self._flush()
+        ok = np.zeros(len(np.arange(len(self))[idx]), dtype=bool)
+        for var in self._phases.get(phase, []):
+            ok |= np.isfinite(self._columns[(phase, var)][:len(self)][idx])
+        return ok
+
+    def rename_phase(self, old, new):
+        """Rename phase in all rows."""
+        if old not in self._phases:
+            return
+        self._flush()
+        if new in self._phases:
+            # rows with old phase replace values of new phase
+            rows = self.contains(old)
+            for var in self._phases[new]:
+                self._columns[(new, var)][:len(self)][rows] = np.nan
+            for var in self._phases.pop(old):
+                col = self._columns.pop((old, var))
+                self._column(new, var)[:len(self)][rows] = col[:len(self)][rows]
+        else:
+            self._columns = OrderedDict(((new if phase == old else phase, var), col)
+                                        for (phase, var), col in self._columns.items())
+            self._phases = OrderedDict((new if phase == old else phase, variables)
+                                       for phase, variables in self._phases.items())
+        # attached rows use old name
+        self._rows.clear()
+
+
+def as_results(results):
+    """Return results as ResultTable. Lists of result dicts are converted."""
+    if isinstance(results, ResultTable):
+        return results
+    return ResultTable(results)
+
+
 class PseudoBase:
     """Base class with common methods for InvPoint and UniLine.
 
@@ -1053,7 +2887,7 @@ class PseudoBase:
         """
         idx = kwargs.get('idx', self.midix)
         try:
-            return self.results[idx]['ptguess']
+            return self.results.ptguess(idx)
         except Exception as e:
             return None
 
@@ -1067,7 +2901,13 @@ class PseudoBase:
             idx (int): index which guesses to get.
         """
         idx = kwargs.get('idx', self.midix)
-        return self.results[idx]['data']
+        return self.results.data(idx)
+
+    def __setstate__(self, state):
+        # results stored by older versions are lists of dicts
+        if 'results' in state:
+            state['results'] = as_results(state['results'])
+        self.__dict__.update(state)
 
 class InvPoint(PseudoBase):
     """Class to store invariant point
@@ -1082,7 +2922,8 @@ class InvPoint(PseudoBase):
             (even if only one, it is stored as array)
         y (numpy.array): Array of x coordinates
             (even if only one, it is stored as array)
-        results (list): List of results dicts with data and ptgues keys.
+        results (ResultTable): Calculated results. Lists of results dicts
+            with data and ptguess keys are converted.
         output (str): Full THERMOCALC output
         manual (bool): True when inavariant point is user-defined and not
             calculated
@@ -1097,7 +2938,7 @@ class InvPoint(PseudoBase):
         self.variance = kwargs.get('variance', 0)
         self.x = kwargs.get('x', [])
         self.y = kwargs.get('y', [])
-        self.results = kwargs.get('results', [dict(data=None, ptguess=None)])
+        self.results = as_results(kwargs.get('results', [dict(data=None, ptguess=None)]))
         self.output = kwargs.get('output', 'User-defined')
         self.manual = kwargs.get('manual', False)
 
@@ -1161,7 +3002,8 @@ class UniLine(PseudoBase):
         variance (int): variance
         _x (numpy.array): Array of x coordinates (all calculated)
         _y (numpy.array): Array of x coordinates (all calculated)
-        results (list): List of results dicts with data and ptgues keys.
+        results (ResultTable): Calculated results. Lists of results dicts
+            with data and ptguess keys are converted.
         output (str): Full THERMOCALC output
         manual (bool): True when inavariant point is user-defined and not
             calculated
@@ -1182,7 +3024,7 @@ class UniLine(PseudoBase):
         self.variance = kwargs.get('variance', 0)
         self._x = kwargs.get('x', np.array([]))
         self._y = kwargs.get('y', np.array([]))
-        self.results = kwargs.get('results', [dict(data=None, ptguess=None)])
+        self.results = as_results(kwargs.get('results', [dict(data=None, ptguess=None)]))
         self.output = kwargs.get('output', 'User-defined')
         self.manual = kwargs.get('manual', False)
         self.begin = kwargs.get('begin', 0)
@@ -1355,7 +3197,7 @@ class SectionBase:
                 uni.variance = 0
                 uni._x = np.array([])
                 uni._y = np.array([])
-                uni.results = [dict(data=None, ptguess=None)]
+                uni.results = ResultTable([dict(data=None, ptguess=None)])
                 uni.output = 'User-defined'
                 uni.used = slice(0, 0)
                 uni.x = np.array([])
@@ -29,11 +29,16 @@ except ImportError:
     import pickle
 import gzip
 import ast
+import functools
 import time
 import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from collections.abc import Mapping
 import warnings
+from abc import ABC, abstractmethod
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -43,15 +48,22 @@ from matplotlib.colorbar import ColorbarBase
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from matplotlib import ticker
 
-from shapely.geometry import MultiPoint, Point
+from shapely.geometry import Point, box
+from shapely.prepared import prep
+try:
+    from shapely import contains_xy
+except ImportError:
+    from shapely.vectorized import contains as contains_xy
 from descartes import PolygonPatch
 from scipy.interpolate import Rbf, interp1d
 from scipy.linalg import LinAlgWarning
+from scipy.spatial import cKDTree
 from scipy.interpolate import griddata, interp2d
-from tqdm import tqdm, trange
+from tqdm import tqdm
 
 from .psclasses import TCAPI
 from .psclasses import InvPoint, UniLine, PTsection, TXsection, PXsection
+from .psclasses import ResultTable, as_results
 from .psclasses import polymorphs
 
 
@@ -80,6 +92,7 @@ class PS:
         self._shapes = {}
         self.unilists = {}
         self._variance = {}
+        self._guess_index = {}
         # common
         self.tolerance = tolerance
         self.tc = None
@@ -147,13 +160,14 @@ class PS:
             if 'grid' in data:
                 self.grids[ix] = data['grid']
         # union _shapes
-        self.shapes = {}
+        union = {}
         for shapes in self._shapes.values():
             for key, shape in shapes.items():
-                if key in self.shapes:
-                    self.shapes[key] = self.shapes[key].union(shape)
+                if key in union:
+                    union[key] = union[key].union(shape)
                 else:
-                    self.shapes[key] = shape
+                    union[key] = shape
+        self.shapes = union
         # update variable lookup table
         self.collect_all_data_keys()
 
@@ -171,6 +185,40 @@ class PS:
     def __iter__(self):
         return iter(self.shapes)
 
+    @property
+    def shapes(self):
+        """dict: Divariant fields (shapely polygons) identified by key.
+
+        Spatial index used by `identify` is rebuilt when shapes are assigned.
+        """
+        return self._union_shapes
+
+    @shapes.setter
+    def shapes(self, shapes):
+        self._union_shapes = shapes
+        self._field_index = None
+        self._guess_index = {}
+
+    @property
+    def field_index(self):
+        """FieldIndex: Spatial index of divariant fields."""
+        if self._field_index is None:
+            self._field_index = FieldIndex(self.shapes)
+        return self._field_index
+
+    def guess_index(self, ix):
+        """Return spatial index of starting guesses of pseudosection.
+
+        Args:
+            ix (int): index of pseudosection
+
+        Returns:
+            GuessIndex: index of invariant points and univariant lines vertices
+        """
+        if ix not in self._guess_index:
+            self._guess_index[ix] = GuessIndex(self.sections[ix], self.unilists[ix])
+        return self._guess_index[ix]
+
     @property
     def xrange(self):
         return min(ps.xrange[0] for ps in self.sections.values()), max(ps.xrange[1] for ps in self.sections.values())
@@ -260,6 +308,14 @@ class PS:
                     print('Available end-members for {}: {}'.format(phase, ' '.join(self.endmembers[phase])))
                 return False
             else:
+                try:
+                    unknown = compile_expr(expr).variables.difference(self.all_data_keys[phase])
+                except (SyntaxError, TypeError):
+                    print('Invalid expression {}'.format(expr))
+                    return False
+                if unknown:
+                    print('Unknown variables for phase {}: {}'.format(phase, ' '.join(sorted(unknown))))
+                    return False
                 return True
         else:
             print('Unknown phase {}'.format(phase))
@@ -288,6 +344,67 @@ class PS:
         """
         return {self.sections[ix].unilines[ed].begin for ed in unilist}.union({self.sections[ix].unilines[ed].end for ed in unilist}).difference({0})
 
+    def inv_guess(self, ix, x, y):
+        """Return ptguess of invariant point nearest to given point.
+
+        Args:
+            ix (int): index of pseudosection
+            x (float): x coord
+            y (float): y coord
+
+        Returns:
+            list: ptguess or None when section has no invariant points
+        """
+        with self.tc.span('guess lookup'):
+            id_inv = self.guess_index(ix).nearest_inv(x, y)
+            if id_inv is not None:
+                return self.sections[ix].invpoints[id_inv].ptguess()
+
+    def uni_guess(self, ix, key, x, y):
+        """Return ptguess of nearest calculated point on univariant lines
+        bounding divariant field.
+
+        Args:
+            ix (int): index of pseudosection
+            key (frozenset): Key identifying divariant field
+            x (float): x coord
+            y (float): y coord
+
+        Returns:
+            list: ptguess or None when no univariant line point is available
+        """
+        with self.tc.span('guess lookup'):
+            nearest = self.guess_index(ix).nearest_uni(x, y, key)
+            if nearest is not None:
+                id_uni, vix = nearest
+                return self.sections[ix].unilines[id_uni].ptguess(idx=vix)
+
+    def run_stats(self, run=None):
+        """Return statistics of last gridding.
+
+        THERMOCALC call statistics are available after parallel gridding of
+        PT sections (see `TCSessionPool.stats`). Durations of named spans
+        aggregated per span name and per field are available when timer is
+        enabled before gridding (see `TCAPI.enable_timer`).
+
+        Args:
+            run (int): Number of timer run. Default is last run.
+
+        Returns:
+            dict: with keys 'tc' (call statistics or None), 'guesses' (number
+            of grid points solved by guess source or None), 'spans' and
+            'fields' (see `TCTimer.summary`). Spans are empty when timer
+            is not enabled.
+        """
+        stats = dict(tc=getattr(self, 'tcstats', None), guesses=getattr(self, 'guess_sources', None),
+                     spans={}, fields={})
+        timer = self.tc.timer
+        if timer is not None:
+            run = timer.run if run is None else run
+            stats['spans'] = timer.summary(run=run)
+            stats['fields'] = timer.summary(by='field', run=run)
+        return stats
+
     def save(self):
         """Save gridded copositions and constructed divariant fields into
         psbuilder project file.
@@ -310,14 +427,17 @@ class PS:
             print('Not yet gridded...')
 
     def create_masks(self):
-        """Update grid masks from existing divariant fields"""
+        """Update grid masks from existing divariant fields
+
+        Masks are exclusive. Grid points inside overlapping fields belong
+        only to the first field in order of shapes, i.e. to the same field
+        as returned by `identify_many` and used for gridding (see `FieldIndex`).
+        """
         if self.gridded:
             for ix, grid in self.grids.items():
-                # Create data masks
-                points = MultiPoint(list(zip(grid.xg.flatten(), grid.yg.flatten())))
-                shapes = self._shapes[ix]
-                for key in shapes:
-                    grid.masks[key] = np.array(list(map(shapes[key].contains, points))).reshape(grid.xg.shape)
+                # Create data masks from label raster
+                index = FieldIndex(self._shapes[ix])
+                grid.masks = FieldMasks(index.labels(grid.xg, grid.yg), index.keys)
         else:
             print('Not yet gridded...')
 
@@ -331,11 +451,8 @@ class PS:
         self.xspace = np.linspace(self.xrange[0] + self.xstep/2, self.xrange[1] - self.xstep/2, nx)
         self.yspace = np.linspace(self.yrange[0] + self.ystep/2, self.yrange[1] - self.ystep/2, ny)
         self.xg, self.yg = np.meshgrid(self.xspace, self.yspace)
-        # Create data masks
-        self.masks = {}
-        points = MultiPoint(list(zip(self.xg.flatten(), self.yg.flatten())))
-        for key in self.shapes:
-            self.masks[key] = np.array(list(map(self.shapes[key].contains, points))).reshape(self.xg.shape)
+        # Create data masks from label raster
+        self.masks = FieldMasks(self.field_index.labels(self.xg, self.yg), self.field_index.keys)
 
     def collect_all_data_keys(self):
         """Collect all phases and variables calculated on grid.
@@ -380,12 +497,13 @@ class PS:
                     shapes = self._shapes[ix]
                     for key in shapes:
                         if phase in key:
-                            res = grid.gridcalcs[grid.masks[key] & (grid.status == 1)]
-                            if len(res) > 0:
-                                for comp in set(res[0]['data'].keys()).difference(set(['bulk', 'sys'])):
+                            rows = grid.index[grid.masks[key] & (grid.status > 0)]
+                            if len(rows) > 0:
+                                res = grid.results[rows[0]]
+                                for comp in set(res['data'].keys()).difference(set(['bulk', 'sys'])):
                                     k = comp.split(')')[0].split('(')
                                     if k[0] in valid_phases:
-                                        data[comp] = list(res[0]['data'][comp].keys())
+                                        data[comp] = list(res['data'][comp].keys())
 
                 if not valid_phases.issubset(data.keys()):
                     print('{} not calculated.'.format(phase))
@@ -447,14 +565,18 @@ class PS:
                 for id_uni in self.unilists[ix][key]:
                     uni = ps.unilines[id_uni]
                     if not uni.manual:
-                        if phase in uni.results[uni.midix]['data']:
+                        if phase in uni.data():
+                            res = uni.results[uni.used]
+                            func = compile_expr(expr)
+                            vals = np.broadcast_to(func(res.phase_data(phase, variables=func.variables)), len(res))
                             edt = zip(uni._x[uni.used],
                                       uni._y[uni.used],
-                                      uni.results[uni.used],)
-                            for x, y, res in edt:
-                                if self.shapes[key].intersects(Point(x, y)):
+                                      vals,
+                                      res.contains(phase))
+                            for x, y, val, ok in edt:
+                                if ok and self.shapes[key].intersects(Point(x, y)):
                                     dt['pts'].append((x, y))
-                                    dt['data'].append(eval_expr(expr, res['data'][phase]))
+                                    dt['data'].append(val)
         return dt
 
     def collect_grid_data(self, key, phase, expr):
@@ -476,17 +598,15 @@ class PS:
         if self.gridded:
             for ix, grid in self.grids.items():
                 if key in grid.masks:
-                    results = grid.gridcalcs[grid.masks[key] & (grid.status == 1)]
-                    if len(results) > 0:
-                        if phase in results[0]['data']:
-                            gdt = zip(grid.xg[grid.masks[key]],
-                                      grid.yg[grid.masks[key]],
-                                      results,
-                                      grid.status[grid.masks[key]])
-                            for x, y, res, ok in gdt:
-                                if ok == 1:
-                                    dt['pts'].append((x, y))
-                                    dt['data'].append(eval_expr(expr, res['data'][phase]))
+                    mask = grid.masks[key] & (grid.status > 0)
+                    rows = grid.index[mask]
+                    if len(rows) > 0:
+                        ok = grid.results.contains(phase, rows)
+                        if ok[0]:
+                            func = compile_expr(expr)
+                            vals = func(grid.results.phase_data(phase, rows[ok], func.variables))
+                            dt['pts'].extend(zip(grid.xg[mask][ok], grid.yg[mask][ok]))
+                            dt['data'].extend(np.broadcast_to(vals, ok.sum()).tolist())
         #else:
             #print('Not yet gridded...')
         return dt
@@ -506,7 +626,7 @@ class PS:
             ix = self.get_section_id(x, y)
             if ix is not None:
                 r, c = self.grids[ix].get_indexes(x, y)
-                dt = self.grids[ix].gridcalcs[r, c]
+                dt = self.grids[ix].get_result(r, c)
             return dt
         else:
             print('Not yet gridded...')
@@ -725,12 +845,10 @@ class PS:
 
     def format_coord(self, x, y):
         prec = 2
-        point = Point(x, y)
         phases = ''
-        for key, shape in self.shapes.items():
-            if shape.contains(point):
-                phases = ' '.join(sorted(list(key.difference(self.tc.excess))))
-                break
+        key = self.identify(x, y)
+        if key is not None:
+            phases = ' '.join(sorted(list(key.difference(self.tc.excess))))
         return '{}={:.{prec}f} {}={:.{prec}f} {}'.format(self.x_var, x, self.y_var, y, phases, prec=prec)
 
     def add_overlay(self, ax, fc='none', ec='k', label=False):
@@ -803,13 +921,14 @@ class PS:
                     gd = np.empty(grid.xg.shape)
                     gd[:] = np.nan
                     for key in grid.masks:
-                        res = grid.gridcalcs[grid.masks[key] & (grid.status == 1)]
-                        if len(res) > 0:
-                            if phase in res[0]['data']:
-                                rows, cols = np.nonzero(grid.masks[key])
-                                for r, c in zip(rows, cols):
-                                    if grid.status[r, c] == 1:
-                                        gd[r, c] = eval_expr(expr, grid.gridcalcs[r, c]['data'][phase])
+                        mask = grid.masks[key] & (grid.status > 0)
+                        rows = grid.index[mask]
+                        if len(rows) > 0:
+                            ok = grid.results.contains(phase, rows)
+                            if ok[0]:
+                                func = compile_expr(expr)
+                                vals = func(grid.results.phase_data(phase, rows, func.variables))
+                                gd[mask] = np.where(ok, vals, np.nan)
                     cgd[ix] = gd
                     mn = min(np.nanmin(gd), mn)
                     mx = max(np.nanmax(gd), mx)
@@ -832,8 +951,8 @@ class PS:
         if self.gridded:
             fig, ax = plt.subplots()
             im = {}
-            cmap = ListedColormap(['orangered', 'limegreen'])
-            bounds = [-0.5, 0.5, 1.5]
+            cmap = ListedColormap(['gold', 'orangered', 'limegreen', 'lightgreen'])
+            bounds = [-1.5, -0.5, 0.5, 1.5, 2.5]
             norm = BoundaryNorm(bounds, cmap.N)
             for ix, grid in self.grids.items():
                 im[ix] = ax.imshow(grid.status, extent=grid.extent,
@@ -842,8 +961,8 @@ class PS:
             ax.set_xlim(self.xrange)
             ax.set_ylim(self.yrange)
             ax.set_title('Gridding status - {}'.format(self.name))
-            cbar = fig.colorbar(im[0], cmap=cmap, norm=norm, boundaries=bounds, ticks=[0, 1])
-            cbar.ax.set_yticklabels(['Failed', 'OK'])
+            cbar = fig.colorbar(im[0], cmap=cmap, norm=norm, boundaries=bounds, ticks=[-1, 0, 1, 2])
+            cbar.ax.set_yticklabels(['Timeout', 'Failed', 'OK', 'Interpolated'])
             fig.tight_layout()
             plt.show()
         else:
@@ -903,7 +1022,7 @@ class PS:
                 chi[:] = np.nan
                 for key in tqdm(grid.masks, desc='Recalculating bulk... {}/{}'.format(ix + 1, len(self.sections)), total=len(grid.masks)):
                     for r, c in zip(*np.nonzero(grid.masks[key])):
-                        dt = grid.gridcalcs[r, c]
+                        dt = grid.get_result(r, c)
                         if dt is not None:
                             BM = np.array([[dt['data'][phase][ox] for ox in oxides] for phase in key])
                             atoms = np.array([sum(rbi*elem) for rbi in BM])
@@ -936,12 +1055,20 @@ class PS:
             x (float): x coord
             y (float): y coord
         """
-        key = None
-        for k, shape in self.shapes.items():
-            if shape.contains(Point(x, y)):
-                key = k
-                break
-        return key
+        return self.field_index.identify(x, y)
+
+    def identify_many(self, xs, ys):
+        """Return keys of divariant fields for arrays of points.
+
+        Args:
+            xs (array_like): x coords
+            ys (array_like): y coords
+
+        Returns:
+            numpy.array: object array of keys (None for points outside of
+            any field) with shape of broadcasted coordinates.
+        """
+        return self.field_index.identify_many(xs, ys)
 
     def gidentify(self, label=False):
         """Visual version of `identify` method. PT point is provided by mouse click.
@@ -1137,7 +1264,7 @@ class PS:
                         positions = []
                         for col in cont.collections:
                             for seg in col.get_segments():
-                                inside = np.fromiter(map(self.shapes[key].contains, MultiPoint(seg)), dtype=bool)
+                                inside = contains_xy(self.shapes[key], seg[:, 0], seg[:, 1])
                                 if np.any(inside):
                                     positions.append(seg[inside].mean(axis=0))
                         ax.clabel(cont, fontsize=9, manual=positions, fmt='%g', inline_spacing=3, inline=not nosplit)
@@ -1365,18 +1492,12 @@ class PS:
         else:
             print('Not yet gridded...')
 
-class PTPS(PS):
-    """Class to postprocess ptbuilder project
-    """
-    def __init__(self, *args, **kwargs):
-        self.section_class = PTsection
-        super(PTPS, self).__init__(*args, **kwargs)
-
-    def calculate_composition(self, nx=50, ny=50):
+    def calculate_composition(self, nx=50, ny=50, workers=1, resume=False, adaptive=0, maxerr=0.05, chain=1,
+                              continuation=False):
         """Method to calculate compositional variations on grid.
 
         A compositions are calculated for stable assemblages in regular grid
-        covering pT range of pseudosection. A stable assemblage is identified
+        covering range of pseudosection. A stable assemblage is identified
         from constructed divariant fields. Results are stored in `grid` property
         as `GridData` instance. A property `all_data_keys` is updated.
 
@@ -1386,118 +1507,281 @@ class PTPS(PS):
         the method `fix_solutions` is called and neigbouring grid calculations are
         used to provide ptguess.
 
+        Grid axes are mapped to pressure, temperature and bulk composition by
+        `GridAxes` of explorer, so scheduling, guess selection, parallelism and
+        checkpointing are shared by all types of pseudosections.
+
         Args:
-            nx (int): Number of grid points along x direction (T)
-            ny (int): Number of grid points along y direction (p)
+            nx (int): Number of grid points along x direction
+            ny (int): Number of grid points along y direction
+            workers (int): Number of parallel THERMOCALC processes. Each worker
+                runs in its own copy of working directory. Default 1 (serial).
+            resume (bool): Whether to resume interrupted gridding from checkpoint.
+                Already solved grid points are not recalculated. Default False.
+            adaptive (int): Number of quadtree refinement levels. When > 0,
+                calculation starts on grid 2**adaptive times coarser and only
+                cells crossed by field boundary or with interpolation error
+                above `maxerr` are subdivided (see `GridRefinement`). Grid
+                points inside smooth fields are not calculated. Default 0
+                (all grid points calculated).
+            maxerr (float): Maximum relative interpolation error of adaptive
+                refinement. Default 0.05
+            chain (int): Maximum number of successive grid points in row with
+                same assemblage and bulk calculated in single THERMOCALC session.
+                Points failed in chained session are calculated separately.
+                Default 1 (every point in own session).
+            continuation (bool): When True, every divariant field is calculated
+                as wavefront growing from seed point nearest to its invariant
+                point and grid points use ptguess of already solved neighbour
+                first (see `GridContinuation`). Grid points are submitted as
+                soon as their neighbour is solved. Could not be combined with
+                adaptive gridding. Default False.
+
+        Solved grid points are continuously appended to checkpoint file stored
+        next to project file (see `GridCheckpoint`). Checkpoint is removed when
+        gridding is finished and project saved.
+
+        Worker processes are started once for whole gridding, including
+        `fix_solutions` (see `GridExecutor`).
+
+        Statistics of THERMOCALC calls made during gridding are stored in
+        `tcstats` property. Start-up cost of THERMOCALC is measured only when
+        timer is enabled and gridding is parallel. Number of grid points
+        solved using ptguess from neighbour ('neighbour'), invariant point
+        ('inv') or univariant line ('uni') and number of failed ones
+        ('failed') is stored in `guess_sources` property and printed for
+        continuation gridding. See `TCSessionPool.stats` and `run_stats`.
         """
+        assert not (continuation and adaptive > 0), 'Continuation could not be combined with adaptive gridding.'
         axr = self.xrange
         ayr = self.yrange
         gpleft = 0
-        for ix, ps in self.sections.items():
-            paxr = ps.xrange
-            payr = ps.yrange
-            grid = GridData(ps,
-                            nx=round(nx*(paxr[1] - paxr[0])/(axr[1] - axr[0])),
-                            ny=round(ny*(payr[1] - payr[0])/(ayr[1] - ayr[0])))
-            last_inv = 0
-            for (r, c) in tqdm(np.ndindex(grid.xg.shape), desc='Gridding {}/{}'.format(ix + 1, len(self.sections)), total=np.prod(grid.xg.shape)):
-                x, y = grid.xg[r, c], grid.yg[r, c]
-                k = self.identify(x, y)
-                if k is not None:
-                    # update guesses from closest inv point
-                    dst = sys.float_info.max
-                    for id_inv, inv in ps.invpoints.items():
-                        d2 = (inv._x - x)**2 + (inv._y - y)**2
-                        if d2 < dst:
-                            dst = d2
-                            id_close = id_inv
-                    if id_close != last_inv:
-                        self.tc.update_scriptfile(guesses=ps.invpoints[id_close].ptguess())
-                        last_inv = id_close
-                    grid.status[r, c] = 0
-                    start_time = time.time()
-                    tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), y, x)
-                    delta = time.time() - start_time
-                    status, variance, pts, res, output = self.tc.parse_logfile()
-                    if len(res) == 1:
-                        grid.gridcalcs[r, c] = res[0]
-                        grid.status[r, c] = 1
-                        grid.delta[r, c] = delta
-                    else:
-                        # update guesses from closest uni line point
-                        dst = sys.float_info.max
-                        for id_uni in self.unilists[ix][k]:
-                            uni = ps.unilines[id_uni]
-                            for vix in list(range(len(uni._x))[uni.used]):
-                                d2 = (uni._x[vix] - x)**2 + (uni._y[vix] - y)**2
-                                if d2 < dst:
-                                    dst = d2
-                                    id_close = id_uni
-                                    vix_close = vix
-                        self.tc.update_scriptfile(guesses=ps.unilines[id_close].ptguess(idx=vix_close))
-                        start_time = time.time()
-                        tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), y, x)
-                        delta = time.time() - start_time
-                        status, variance, pts, res, output = self.tc.parse_logfile()
-                        if len(res) == 1:
-                            grid.gridcalcs[r, c] = res[0]
-                            grid.status[r, c] = 1
-                            grid.delta[r, c] = delta
-                        else:
-                            grid.gridcalcs[r, c] = None
-                            grid.status[r, c] = 0
+        checkpoints = []
+        self.guess_sources = OrderedDict((name, 0) for name in ['neighbour', 'inv', 'uni', 'failed'])
+        if self.tc.timer is not None:
+            self.tc.timer.start_run()
+        # probe run would overwrite output files of project directory
+        pool = self.tc.session(workers=workers, probe=self.tc.timer is not None and workers > 1)
+        with GridExecutor(pool) as executor:
+            for ix, ps in self.sections.items():
+                paxr = ps.xrange
+                payr = ps.yrange
+                grid = GridData(ps,
+                                nx=round(nx*(paxr[1] - paxr[0])/(axr[1] - axr[0])),
+                                ny=round(ny*(payr[1] - payr[0])/(ayr[1] - ayr[0])))
+                ckpt = GridCheckpoint(self.projfiles[ix], grid)
+                if resume:
+                    print('{} grid points restored from checkpoint.'.format(ckpt.restore(grid)))
+                checkpoints.append(ckpt)
+                keys = self.identify_many(grid.xg, grid.yg)
+                axes = self.grid_axes(self.tc, grid)
+                wavefront = None
+                if adaptive > 0:
+                    quadtree = GridRefinement(grid, keys, self.field_index, adaptive, maxerr=maxerr)
+                    nodes = quadtree.nodes()
+                elif continuation:
+                    wavefront = GridContinuation(grid, keys, self.guess_index(ix))
+                    nodes = wavefront.nodes()
                 else:
-                    grid.gridcalcs[r, c] = None
-            print('Grid search done. {} empty points left.'.format(len(np.flatnonzero(grid.status == 0))))
-            gpleft += len(np.flatnonzero(grid.status == 0))
-            self.grids[ix] = grid
-        if gpleft > 0:
-            self.fix_solutions()
+                    nodes = list(np.ndindex(grid.xg.shape))
+                busy = np.zeros(grid.status.shape, dtype=bool)
+                sources = {}
+                level = 0
+                with ckpt:
+                    while nodes:
+                        desc = 'Gridding {}/{}'.format(ix + 1, len(self.sections))
+                        if adaptive > 0:
+                            desc += ' level {}'.format(level)
+                        with tqdm(desc=desc, total=0) as pbar:
+                            pbar.total += self._grid_submit(executor, ix, grid, keys, axes, nodes, busy, sources,
+                                                            wavefront=wavefront, chain=chain)
+                            for r, c, res, delta, code, source in executor.results():
+                                pbar.update()
+                                if res is None:
+                                    # try ptguess of univariant line
+                                    retry = self._grid_submit(executor, ix, grid, keys, axes, [(r, c)], busy, sources,
+                                                              chain=chain)
+                                    if retry > 0:
+                                        pbar.total += retry
+                                        pbar.refresh()
+                                        continue
+                                busy[r, c] = False
+                                grid.status[r, c] = code
+                                names = sources.pop((r, c))
+                                self.guess_sources['failed' if source is None else names[source]] += 1
+                                if res is not None:
+                                    grid.set_result(r, c, res)
+                                    grid.delta[r, c] = delta
+                                    ckpt.write(r, c, res, delta)
+                                if wavefront is not None:
+                                    # advance fronts of all fields as soon as neighbour is solved
+                                    pbar.total += self._grid_submit(executor, ix, grid, keys, axes,
+                                                                    wavefront.nodes(busy), busy, sources,
+                                                                    wavefront=wavefront, chain=chain)
+                                    pbar.refresh()
+                        if adaptive > 0:
+                            nodes = quadtree.refine()
+                        else:
+                            nodes = []
+                        level += 1
+                if adaptive > 0:
+                    calculated = len(np.flatnonzero(np.isfinite(grid.status)))
+                    print('Adaptive gridding calculated {} of {} grid points. {} grid points interpolated.'.format(
+                          calculated, len(np.flatnonzero(keys != None)), quadtree.interpolate()))
+                print('Grid search done. {} empty points left.'.format(len(np.flatnonzero(grid.status == 0))))
+                if np.any(grid.status == -1):
+                    print('{} grid points timed out.'.format(len(np.flatnonzero(grid.status == -1))))
+                gpleft += len(np.flatnonzero(grid.status == 0))
+                self.grids[ix] = grid
+                if axes.bulks is not None:
+                    # restore bulk
+                    self.tc.update_scriptfile(bulk=self.bulk)
+            calculated = sum(self.guess_sources.values())
+            if continuation and calculated > 0:
+                print('Guess sources: {}. {:.2f} THERMOCALC calls per calculated grid point.'.format(
+                      ', '.join('{} {}'.format(name, n) for name, n in self.guess_sources.items()),
+                      pool.stats['calls'] / calculated))
+            if gpleft > 0:
+                self.fix_solutions(pool=executor)
+        pool.close()
+        self.tcstats = pool.stats
         self.create_masks()
         # save
         self.save()
+        for ckpt in checkpoints:
+            ckpt.remove()
         # update variable lookup table
         self.collect_all_data_keys()
 
-    def fix_solutions(self):
+    def _grid_submit(self, executor, ix, grid, keys, axes, nodes, busy, sources, wavefront=None, chain=1):
+        """Submit calculations of grid points.
+
+        Not yet calculated grid points use ptguess of nearest invariant point.
+        When `wavefront` is given, ptguess of solved neighbour is tried first.
+        Grid points already calculated with these are submitted again with
+        ptguess of nearest univariant line, so it is looked up only when other
+        ptguesses failed. Names of ptguess sources of submitted grid points are
+        stored in `sources` and submitted grid points are marked in `busy`.
+
+        Returns:
+            int: number of submitted grid points
+        """
+        tasks = []
+        for (r, c) in sorted(nodes, key=axes.order):
+            x, y = grid.xg[r, c], grid.yg[r, c]
+            k = keys[r, c]
+            if k is None:
+                continue
+            if np.isnan(grid.status[r, c]):
+                grid.status[r, c] = 0
+                busy[r, c] = True
+                if self.tc.timer is not None:
+                    self.tc.timer.field = ' '.join(sorted(k))
+                guesses = [self.inv_guess(ix, x, y)]
+                sources[(r, c)] = ['inv']
+                if wavefront is not None and (r, c) in wavefront.sources:
+                    guesses.insert(0, grid.ptguess(*wavefront.sources[(r, c)]))
+                    sources[(r, c)].insert(0, 'neighbour')
+            elif 'uni' not in sources.get((r, c), ['uni']):
+                guesses = [self.uni_guess(ix, k, x, y)]
+                if guesses[0] is None:
+                    continue
+                sources[(r, c)] = ['uni']
+            else:
+                continue
+            tasks.append(axes.task(r, c, k.difference(self.tc.excess), guesses))
+        executor.submit(tasks, chain=chain)
+        return len(tasks)
+
+    def fix_solutions(self, workers=1, pool=None):
         """Method try to find solution for grid points with failed status.
 
         Ptguesses are used from successfully calculated neighboring points until
         solution is find. Otherwise ststus remains failed.
+
+        Failed grid points are repaired in rounds. Points with more solved
+        neighbours are calculated first and neighbours from same field are
+        tried first. Points with newly solved neighbours are queued again in
+        next round, until no progress is made.
+
+        Args:
+            workers (int): Number of parallel THERMOCALC processes. Default 1
+            pool (TCSessionPool, GridExecutor): When not None, session or
+                running executor used for calculations instead of new session
+                with `workers`. Default None
+
+        Returns:
+            dict: number of residual failed grid points of divariant fields
+            for every pseudosection
         """
         if self.gridded:
+            own = pool is None
+            if own:
+                pool = self.tc.session(workers=workers)
+            residuals = {}
             for ix, grid in self.grids.items():
-                log = []
-                ri, ci = np.nonzero(grid.status == 0)
-                fixed, ftot = 0, len(ri)
-                tq = trange(ftot, desc='Fix ({}/{})'.format(fixed, ftot))
-                for ind in tq:
-                    r, c = ri[ind], ci[ind]
-                    x, y = grid.xg[r, c], grid.yg[r, c]
-                    k = self.identify(x, y)
-                    if k is not None:
-                        # search already done grid neighs
-                        for rn, cn in grid.neighs(r, c):
-                            if grid.status[rn, cn] == 1:
-                                self.tc.update_scriptfile(guesses=grid.gridcalcs[rn, cn]['ptguess'])
-                                start_time = time.time()
-                                tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), y, x)
-                                delta = time.time() - start_time
-                                status, variance, pts, res, output = self.tc.parse_logfile()
-                                if len(res) == 1:
-                                    grid.gridcalcs[r, c] = res[0]
-                                    grid.status[r, c] = 1
-                                    grid.delta[r, c] = delta
-                                    fixed += 1
-                                    tq.set_description(desc='Fix ({}/{})'.format(fixed, ftot))
-                                    break
-                    if grid.status[r, c] == 0:
-                        log.append('No solution find for {}, {}'.format(x, y))
-                log.append('Fix done. {} empty grid points left.'.format(len(np.flatnonzero(grid.status == 0))))
+                keys = self.identify_many(grid.xg, grid.yg)
+                axes = self.grid_axes(self.tc, grid)
+                tried = {}
+                ftot = len(np.flatnonzero(grid.status == 0))
+                rnd = 1
+                while True:
+                    tasks = []
+                    for r, c in zip(*np.nonzero(grid.status == 0)):
+                        k = keys[r, c]
+                        if k is not None:
+                            done = tried.setdefault((r, c), set())
+                            neighs = [(rn, cn) for rn, cn in grid.neighs(r, c)
+                                      if grid.status[rn, cn] == 1 and (rn, cn) not in done]
+                            if neighs:
+                                neighs.sort(key=lambda n: (keys[n] != k, abs(n[0] - r) + abs(n[1] - c)))
+                                done.update(neighs)
+                                tasks.append((len(neighs), axes.task(r, c, k.difference(self.tc.excess),
+                                                                     [grid.ptguess(rn, cn) for rn, cn in neighs])))
+                    if not tasks:
+                        break
+                    # prioritize points with most solved neighbours
+                    tasks = [task for score, task in sorted(tasks, key=lambda t: (-t[0], axes.order(t[1][:2])))]
+                    fixed = 0
+                    desc = 'Fix {}/{} round {}'.format(ix + 1, len(self.grids), rnd)
+                    for r, c, res, delta, code, source in grid_calculations(pool, tasks, desc=desc):
+                        if res is not None:
+                            grid.set_result(r, c, res)
+                            grid.status[r, c] = 1
+                            grid.delta[r, c] = delta
+                            fixed += 1
+                    if fixed == 0:
+                        break
+                    rnd += 1
+                log = ['No solution find for {}, {}'.format(grid.xg[r, c], grid.yg[r, c])
+                       for r, c in zip(*np.nonzero(grid.status == 0))]
+                residuals[ix] = OrderedDict()
+                for r, c in zip(*np.nonzero(grid.status == 0)):
+                    if keys[r, c] is not None:
+                        residuals[ix][keys[r, c]] = residuals[ix].get(keys[r, c], 0) + 1
+                left = len(np.flatnonzero(grid.status == 0))
+                log.append('Fix done. {} of {} failed grid points fixed. {} empty grid points left.'.format(ftot - left, ftot, left))
+                for key, n in residuals[ix].items():
+                    log.append('  {}: {}'.format(' '.join(sorted(key)), n))
                 print('\n'.join(log))
+                if axes.bulks is not None:
+                    # restore bulk
+                    self.tc.update_scriptfile(bulk=self.bulk)
+            if own:
+                pool.close()
+            return residuals
         else:
             print('Not yet gridded...')
 
+
+class PTPS(PS):
+    """Class to postprocess ptbuilder project
+    """
+    def __init__(self, *args, **kwargs):
+        self.section_class = PTsection
+        self.grid_axes = PTGridAxes
+        super(PTPS, self).__init__(*args, **kwargs)
+
     def collect_ptpath(self, tpath, ppath, N=100, kind = 'quadratic'):
         """Method to collect THERMOCALC calculations along defined PT path.
 
@@ -1524,7 +1808,7 @@ class PTPS(PS):
             splt = interp1d(gpath, tpath, kind=kind)
             splp = interp1d(gpath, ppath, kind=kind)
             err = 0
-            points, results = [], []
+            points, results = [], ResultTable()
             for step in tqdm(np.linspace(0, 1, N), desc='Calculating'):
                 t, p = splt(step), splp(step)
                 key = self.identify(t, p)
@@ -1533,19 +1817,19 @@ class PTPS(PS):
                     r, c = self.grids[ix].get_indexes(t, p)
                     calc = None
                     if self.grids[ix].status[r, c] == 1:
-                        calc = self.grids[ix].gridcalcs[r, c]
+                        calc = self.grids[ix].ptguess(r, c)
                     else:
                         for rn, cn in self.grids[ix].neighs(r, c):
                             if self.grids[ix].status[rn, cn] == 1:
-                                calc = self.grids[ix].gridcalcs[rn, cn]
+                                calc = self.grids[ix].ptguess(rn, cn)
                                 break
                     if calc is not None:
-                        self.tc.update_scriptfile(guesses=calc['ptguess'])
+                        self.tc.update_scriptfile(guesses=calc)
                         tcout, ans = self.tc.calc_assemblage(key.difference(self.tc.excess), p, t)
                         status, variance, pts, res, output = self.tc.parse_logfile()
                         if len(res) == 1:
                             points.append((t, p))
-                            results.append(res[0])
+                            results.extend(res)
                     else:
                         err += 1
             if err > 0:
@@ -1611,16 +1895,11 @@ class PTPS(PS):
         splt = interp1d(nd, ptpath.t, kind='quadratic')
         splp = interp1d(nd, ptpath.p, kind='quadratic')
         pset = set()
-        for res in ptpath.results:
-            pset.update(res['data'].keys())
-
-        pset = set()
-        for res in ptpath.results:
-            for key in res['data']:
-                if 'mode' in res['data'][key] and key not in exclude:
-                    pset.add(key)
+        for key in ptpath.results.phases:
+            if 'mode' in ptpath.results.variables(key) and key not in exclude:
+                pset.add(key)
         phases = sorted(list(pset))
-        modes = np.array([[res['data'][phase]['mode'] if phase in res['data'] else 0 for res in ptpath.results] for phase in phases])
+        modes = np.nan_to_num(np.array([ptpath.results.column(phase, 'mode') for phase in phases]))
         modes = 100 * modes / modes.sum(axis=0)
         cm = plt.get_cmap(cmap)
         fig, ax = plt.subplots(figsize=(12, 5))
@@ -1648,295 +1927,821 @@ class TXPS(PS):
     """
     def __init__(self, *args, **kwargs):
         self.section_class = TXsection
+        self.grid_axes = TXGridAxes
         super(TXPS, self).__init__(*args, **kwargs)
 
-    def calculate_composition(self, nx=50, ny=50):
-        """Method to calculate compositional variations on grid.
 
-        A compositions are calculated for stable assemblages in regular grid
-        covering pT range of pseudosection. A stable assemblage is identified
-        from constructed divariant fields. Results are stored in `grid` property
-        as `GridData` instance. A property `all_data_keys` is updated.
+class PXPS(PS):
+    """Class to postprocess pxbuilder project
+    """
+    def __init__(self, *args, **kwargs):
+        self.section_class = PXsection
+        self.grid_axes = PXGridAxes
+        super(PXPS, self).__init__(*args, **kwargs)
+
+
+def iter_grid_nodes(tc, tasks, chain=1):
+    """Calculate grid nodes using single THERMOCALC working directory.
+
+    Each task is tuple (r, c, phases, p, t, guesses) or (r, c, phases, p, t,
+    guesses, bulk), where guesses is list of ptguesses tried in order until
+    solution is found and bulk is bulk composition (see `update_scriptfile`)
+    used for task. Scriptfile is rewritten only when guesses or bulk differ
+    from ones already written.
+
+    When chain is bigger than 1, successive tasks in same grid row with same
+    assemblage are calculated in single THERMOCALC session (see
+    `TCAPI.calc_assemblages`) starting from first guess of first task.
+    Tasks without solution in chained run are calculated again one by one.
+
+    Args:
+        tc (TCAPI): THERMOCALC API of working directory
+        tasks (list): list of tasks
+        chain (int): maximum number of tasks calculated in single
+            THERMOCALC session. Default 1
+
+    Yields:
+        tuple: (r, c, result, delta, code, source) for every task. Result is
+        None when no solution was found. Code is grid status, i.e. 1 - OK,
+        0 - Failed or -1 - Timeout when last THERMOCALC run was killed. Source
+        is index of successful guess in guesses or None.
+    """
+    last_guesses, last_bulk = None, None
+    for group in chain_tasks(tasks, chain):
+        r, c, phases, p, t, guesses = group[0][:6]
+        bulk = group[0][6] if len(group[0]) > 6 else None
+        if bulk is not None and bulk != last_bulk:
+            tc.update_scriptfile(bulk=bulk)
+            last_bulk = bulk
+        if tc.timer is not None:
+            tc.timer.field = ' '.join(sorted(phases.union(tc.excess)))
+        source, guess = next(((ig, g) for ig, g in enumerate(guesses) if g is not None), (None, None))
+        if len(group) > 1 and guess is not None:
+            if guess != last_guesses:
+                tc.update_scriptfile(guesses=guess)
+                last_guesses = guess
+            points = [task[3:5] for task in group]
+            start_time = time.time()
+            tcout, ans = tc.calc_assemblages(phases, points)
+            delta = (time.time() - start_time) / len(group)
+            left = []
+            for task, res in zip(group, tc.parse_assemblages(points)):
+                if res is not None:
+                    yield task[0], task[1], res, delta, 1, source
+                else:
+                    left.append(task)
+            group = left
+        for r, c, phases, p, t, guesses in (task[:6] for task in group):
+            result, delta, code, source = None, np.nan, 0, None
+            for ig, guess in enumerate(guesses):
+                if guess is None:
+                    continue
+                if guess != last_guesses:
+                    tc.update_scriptfile(guesses=guess)
+                    last_guesses = guess
+                start_time = time.time()
+                tcout, ans = tc.calc_assemblage(phases, p, t)
+                delta = time.time() - start_time
+                status, variance, pts, res, output = tc.parse_logfile()
+                if len(res) == 1:
+                    result, code, source = res, 1, ig
+                    break
+                code = -1 if status == 'timeout' else 0
+            yield r, c, result, delta, code, source
+
+
+def chain_tasks(tasks, chain=1):
+    """Split tasks to groups of successive tasks in same row with same phases
+    and bulk.
+
+    Args:
+        tasks (list): list of (r, c, phases, p, t, guesses[, bulk]) tuples
+        chain (int): maximum number of tasks in group. Default 1
+
+    Returns:
+        list: list of lists of tasks
+    """
+    groups = []
+    for task in tasks:
+        if groups and len(groups[-1]) < chain:
+            last = groups[-1][-1]
+            if last[0] == task[0] and last[2] == task[2] and last[6:] == task[6:]:
+                groups[-1].append(task)
+                continue
+        groups.append([task])
+    return groups
+
+
+def _grid_worker_init(queue):
+    """Bind worker process to its own staged working directory."""
+    global _worker_tc
+    _worker_tc = queue.get()
+
+
+def _grid_worker_calc(tasks, chain=1):
+    before = dict(_worker_tc.runstats)
+    done = list(iter_grid_nodes(_worker_tc, tasks, chain))
+    events = _worker_tc.timer.pop_events() if _worker_tc.timer is not None else []
+    return done, {k: _worker_tc.runstats[k] - before[k] for k in before}, events
 
-        Before any grid point calculation, ptguesses are updated from nearest
-        invariant point. If calculation fails, nearest solution from univariant
-        line is used to update ptguesses. Finally, if solution is still not found,
-        the method `fix_solutions` is called and neigbouring grid calculations are
-        used to provide ptguess.
+
+class GridExecutor:
+    """Pool of worker processes for grid calculations.
+
+    Worker processes are started once and reused by successive calculations,
+    e.g. by all levels of gridding and by `PS.fix_solutions`. Every worker
+    process is bound to one staged working directory (see `TCSessionPool`),
+    so scriptfile, logfile and icfile are never shared. Tasks could be
+    submitted while results are collected, so workers are continuously fed
+    by wavefront of `GridContinuation`. With single worker, tasks are
+    calculated serially in main process.
+
+    Args:
+        pool (TCSessionPool): THERMOCALC session
+        workers (int): Number of worker processes. Default all workers of pool.
+
+    Example:
+        >>> with GridExecutor(pool) as executor:
+        ...     executor.submit(tasks)
+        ...     for r, c, res, delta, code, source in executor.results():
+        ...         pass
+    """
+    def __init__(self, pool, workers=None):
+        self.pool = pool
+        self.workers = len(pool) if workers is None else min(workers, len(pool))
+        self._executor = None
+        self._pending = deque()
+
+    def __len__(self):
+        return self.workers
+
+    def __enter__(self):
+        if self.workers > 1:
+            queue = multiprocessing.Queue()
+            for wtc in self.pool.workers[:self.workers]:
+                queue.put(wtc)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=_grid_worker_init,
+                                                 initargs=(queue,))
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Cancel pending tasks and stop worker processes."""
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown()
+            self._executor = None
+        self._pending.clear()
+
+    def submit(self, tasks, batch=None, chain=1):
+        """Submit grid node calculations.
 
         Args:
-            nx (int): Number of grid points along x direction (T)
-            ny (int): Number of grid points along y direction (p)
+            tasks (list): list of (r, c, phases, p, t, guesses[, bulk]) tuples
+            batch (int): Number of tasks in single batch. Default is chosen
+                to give every worker about four batches.
+            chain (int): Maximum number of tasks calculated in single
+                THERMOCALC session. See `iter_grid_nodes`. Default 1
         """
-        axr = self.xrange
-        ayr = self.yrange
-        gpleft = 0
-        for ix, ps in self.sections.items():
-            paxr = ps.xrange
-            payr = ps.yrange
-            grid = GridData(ps,
-                            nx=round(nx*(paxr[1] - paxr[0])/(axr[1] - axr[0])),
-                            ny=round(ny*(payr[1] - payr[0])/(ayr[1] - ayr[0])))
-            last_inv = 0
-            with tqdm(desc='Gridding {}/{}'.format(ix + 1, len(self.sections)), total=np.prod(grid.xg.shape)) as pbar:
-                pm = (self.tc.prange[0] + self.tc.prange[1]) / 2
-                for r in range(len(grid.yspace)):
-                    # change bulk
-                    bulk = self.tc.interpolate_bulk(grid.yspace[r])
-                    self.tc.update_scriptfile(bulk=bulk)
-                    for c in range(len(grid.xspace)):
-                        x, y = grid.xg[r, c], grid.yg[r, c]
-                        k = self.identify(x, y)
-                        if k is not None:
-                            # update guesses from closest inv point
-                            dst = sys.float_info.max
-                            for id_inv, inv in ps.invpoints.items():
-                                d2 = (inv._x - x)**2 + (inv._y - y)**2
-                                if d2 < dst:
-                                    dst = d2
-                                    id_close = id_inv
-                            if id_close != last_inv:
-                                self.tc.update_scriptfile(guesses=ps.invpoints[id_close].ptguess())
-                                last_inv = id_close
-                            grid.status[r, c] = 0
-                            start_time = time.time()
-                            tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), pm, x)
-                            delta = time.time() - start_time
-                            status, variance, pts, res, output = self.tc.parse_logfile()
-                            if len(res) == 1:
-                                grid.gridcalcs[r, c] = res[0]
-                                grid.status[r, c] = 1
-                                grid.delta[r, c] = delta
-                            else:
-                                # update guesses from closest uni line point
-                                dst = sys.float_info.max
-                                for id_uni in self.unilists[ix][k]:
-                                    uni = ps.unilines[id_uni]
-                                    for vix in list(range(len(uni._x))[uni.used]):
-                                        d2 = (uni._x[vix] - x)**2 + (uni._y[vix] - y)**2
-                                        if d2 < dst:
-                                            dst = d2
-                                            id_close = id_uni
-                                            vix_close = vix
-                                self.tc.update_scriptfile(guesses=ps.unilines[id_close].ptguess(idx=vix_close))
-                                start_time = time.time()
-                                tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), pm, x)
-                                delta = time.time() - start_time
-                                status, variance, pts, res, output = self.tc.parse_logfile()
-                                if len(res) == 1:
-                                    grid.gridcalcs[r, c] = res[0]
-                                    grid.status[r, c] = 1
-                                    grid.delta[r, c] = delta
-                                else:
-                                    grid.gridcalcs[r, c] = None
-                                    grid.status[r, c] = 0
-                        else:
-                            grid.gridcalcs[r, c] = None
-                        pbar.update(1)
-            print('Grid search done. {} empty points left.'.format(len(np.flatnonzero(grid.status == 0))))
-            gpleft += len(np.flatnonzero(grid.status == 0))
-            self.grids[ix] = grid
-        # restore bulk
-        self.tc.update_scriptfile(bulk=self.bulk)
-        if gpleft > 0:
-            self.fix_solutions()
-        self.create_masks()
-        # update variable lookup table
-        self.collect_all_data_keys()
-        # save
-        self.save()
+        if batch is None:
+            batch = max(1, min(32, len(tasks) // (4 * max(1, self.workers))))
+        for i in range(0, len(tasks), batch):
+            if self._executor is None:
+                self._pending.append((tasks[i:i + batch], chain))
+            else:
+                self._pending.append(self._executor.submit(_grid_worker_calc, tasks[i:i + batch], chain))
 
-    def fix_solutions(self):
-        """Method try to find solution for grid points with failed status.
+    def results(self):
+        """Yield results of submitted tasks as soon as batches are finished.
 
-        Ptguesses are used from successfully calculated neighboring points until
-        solution is find. Otherwise ststus remains failed.
+        Tasks submitted during iteration are yielded as well. Spans timed in
+        worker processes are merged to timer of pool when timer is enabled
+        (see `TCAPI.enable_timer`).
+
+        Yields:
+            tuple: (r, c, result, delta, code, source) for every task.
+            See `iter_grid_nodes`
         """
-        if self.gridded:
-            for ix, grid in self.grids.items():
-                log = []
-                ri, ci = np.nonzero(grid.status == 0)
-                fixed, ftot = 0, len(ri)
-                pm = (self.tc.prange[0] + self.tc.prange[1]) / 2
-                tq = trange(ftot, desc='Fix ({}/{})'.format(fixed, ftot))
-                for ind in tq:
-                    r, c = ri[ind], ci[ind]
-                    x, y = grid.xg[r, c], grid.yg[r, c]
-                    k = self.identify(x, y)
-                    if k is not None:
-                        # search already done grid neighs
-                        for rn, cn in grid.neighs(r, c):
-                            if grid.status[rn, cn] == 1:
-                                # change bulk
-                                bulk = self.tc.interpolate_bulk(grid.yspace[rn])
-                                self.tc.update_scriptfile(bulk=bulk, guesses=grid.gridcalcs[rn, cn]['ptguess'])
-                                start_time = time.time()
-                                tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), pm, x)
-                                delta = time.time() - start_time
-                                status, variance, pts, res, output = self.tc.parse_logfile()
-                                if len(res) == 1:
-                                    grid.gridcalcs[r, c] = res[0]
-                                    grid.status[r, c] = 1
-                                    grid.delta[r, c] = delta
-                                    fixed += 1
-                                    tq.set_description(desc='Fix ({}/{})'.format(fixed, ftot))
-                                    break
-                    if grid.status[r, c] == 0:
-                        log.append('No solution find for {}, {}'.format(x, y))
-                log.append('Fix done. {} empty grid points left.'.format(len(np.flatnonzero(grid.status == 0))))
-                print('\n'.join(log))
-            # restore bulk
-            self.tc.update_scriptfile(bulk=self.bulk)
+        while self._pending:
+            if self._executor is None:
+                tasks, chain = self._pending.popleft()
+                with self.pool.worker() as wtc:
+                    yield from iter_grid_nodes(wtc, tasks, chain)
+            else:
+                finished, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self._pending.remove(future)
+                    done, runstats, events = future.result()
+                    self.pool.add_runstats(runstats)
+                    if self.pool.tc.timer is not None:
+                        self.pool.tc.timer.events.extend(events)
+                    yield from done
+
+
+def grid_calculations(pool, tasks, batch=None, desc='Gridding', chain=1):
+    """Run grid node calculations serially or using pool of processes.
+
+    Args:
+        pool (TCSessionPool, GridExecutor): THERMOCALC session or running
+            executor. When session is given, `GridExecutor` is started for
+            tasks and stopped when all tasks are finished.
+        tasks (list): list of (r, c, phases, p, t, guesses[, bulk]) tuples
+        batch (int): Number of tasks in single batch. See `GridExecutor.submit`
+        desc (str): progress bar description
+        chain (int): Maximum number of tasks calculated in single
+            THERMOCALC session. See `iter_grid_nodes`. Default 1
+
+    Yields:
+        tuple: (r, c, result, delta, code, source) for every task.
+        See `iter_grid_nodes`
+    """
+    if isinstance(pool, GridExecutor):
+        pool.submit(tasks, batch=batch, chain=chain)
+        yield from tqdm(pool.results(), desc=desc, total=len(tasks))
+    else:
+        with GridExecutor(pool, workers=len(tasks)) as executor:
+            yield from grid_calculations(executor, tasks, batch=batch, desc=desc, chain=chain)
+
+
+class GridAxes(ABC):
+    """Mapping of grid axes to pressure, temperature and bulk composition.
+
+    Gridding engine (see `PS.calculate_composition`) creates grid tasks
+    using axes of explorer, so explorers of different types of pseudosections
+    differ only by axes.
+
+    Args:
+        tc (TCAPI): THERMOCALC API
+        grid (GridData): grid to be calculated
+
+    Attributes:
+        bulks (list): bulk compositions of grid rows or columns or None when
+            bulk does not change across grid
+    """
+    def __init__(self, tc, grid):
+        self.tc = tc
+        self.grid = grid
+        self.bulks = None
+
+    @abstractmethod
+    def task(self, r, c, phases, guesses):
+        """Return task of grid point. See `iter_grid_nodes`."""
+
+    def order(self, node):
+        """Return sorting key of (r, c) node. Nodes with same bulk are kept
+        together."""
+        return node
+
+
+class PTGridAxes(GridAxes):
+    """Temperature along x and pressure along y axis."""
+    def task(self, r, c, phases, guesses):
+        return (r, c, phases, self.grid.yg[r, c], self.grid.xg[r, c], guesses)
+
+
+class TXGridAxes(GridAxes):
+    """Temperature along x and composition along y axis at mean pressure."""
+    def __init__(self, tc, grid):
+        super(TXGridAxes, self).__init__(tc, grid)
+        self.p = (tc.prange[0] + tc.prange[1]) / 2
+        self.bulks = tc.interpolate_bulk(grid.yspace)
+
+    def task(self, r, c, phases, guesses):
+        return (r, c, phases, self.p, self.grid.xg[r, c], guesses, [self.bulks[r]])
+
+
+class PXGridAxes(GridAxes):
+    """Composition along x and pressure along y axis at mean temperature."""
+    def __init__(self, tc, grid):
+        super(PXGridAxes, self).__init__(tc, grid)
+        self.t = (tc.trange[0] + tc.trange[1]) / 2
+        self.bulks = tc.interpolate_bulk(grid.xspace)
+
+    def task(self, r, c, phases, guesses):
+        return (r, c, phases, self.grid.yg[r, c], self.t, guesses, [self.bulks[c]])
+
+    def order(self, node):
+        return node[1], node[0]
+
+
+class GridCheckpoint:
+    """Append-only checkpoint of grid calculations.
+
+    Solved grid points are appended to sidecar file stored next to project
+    file (e.g. ``myproject.ptb.ckpt``) as soon as they are calculated. File
+    is flushed at most every `interval` seconds, so checkpointing costs just
+    single pickle dump per grid point. Checkpoint could be used to resume
+    interrupted gridding.
+
+    Args:
+        projfile (Path): project file
+        grid (GridData): grid to be calculated
+        interval (float): flush interval in seconds. Default 5.
+
+    Example:
+        >>> ckpt = GridCheckpoint(projfile, grid)
+        >>> ckpt.restore(grid)
+        >>> with ckpt:
+        ...     ckpt.write(r, c, res, delta)
+    """
+    def __init__(self, projfile, grid, interval=5):
+        projfile = Path(projfile)
+        self.filename = projfile.with_name(projfile.name + '.ckpt')
+        self.header = dict(shape=grid.xg.shape, extent=grid.extent)
+        self.interval = interval
+        self._valid = None
+        self._stream = None
+
+    def restore(self, grid):
+        """Restore solved grid points from existing checkpoint.
+
+        Checkpoint is ignored when it was created for different grid. Last
+        incomplete record (e.g. after kill) is dropped.
+
+        Returns:
+            int: number of restored grid points
+        """
+        restored = 0
+        if self.filename.exists():
+            with self.filename.open('rb') as f:
+                try:
+                    header = pickle.load(f)
+                    if header['shape'] != self.header['shape'] or not np.allclose(header['extent'], self.header['extent']):
+                        return 0
+                    self._valid = f.tell()
+                    while True:
+                        r, c, delta, res = pickle.load(f)
+                        grid.set_result(r, c, res)
+                        grid.status[r, c] = 1
+                        grid.delta[r, c] = delta
+                        restored += 1
+                        self._valid = f.tell()
+                except (EOFError, pickle.UnpicklingError):
+                    # end of checkpoint or incomplete last record
+                    pass
+        return restored
+
+    def __enter__(self):
+        if self._valid is None:
+            self._stream = self.filename.open('wb')
+            pickle.dump(self.header, self._stream)
         else:
-            print('Not yet gridded...')
+            self._stream = self.filename.open('r+b')
+            self._stream.seek(self._valid)
+            self._stream.truncate()
+        self._flushed = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self._stream.close()
+        self._stream = None
+
+    def write(self, r, c, res, delta):
+        """Append solved grid point."""
+        pickle.dump((r, c, delta, res), self._stream, protocol=pickle.HIGHEST_PROTOCOL)
+        if time.time() - self._flushed > self.interval:
+            self._stream.flush()
+            self._flushed = time.time()
+
+    def remove(self):
+        """Remove checkpoint file."""
+        if self.filename.exists():
+            self.filename.unlink()
+
+
+class GridRefinement:
+    """Quadtree refinement of grid calculations.
+
+    Grid is covered by cells with corners on every 2**levels grid point and
+    only cell corners are calculated. Cells are recursively subdivided when
+    boundary of any divariant field crosses cell, calculation of any corner
+    failed, or estimated interpolation error exceeds `maxerr`. The error is
+    estimated as largest variation of any result variable (modes, compositional
+    variables etc.) among cell corners relative to its range over whole grid,
+    i.e. fraction of isopleth range linearly interpolated within the cell.
 
+    Args:
+        grid (GridData): grid to be calculated
+        keys (numpy.array): object array of field keys of grid points
+        index (FieldIndex): spatial index of divariant fields
+        levels (int): number of refinement levels
+        maxerr (float): maximum relative interpolation error. Default 0.05
 
-class PXPS(PS):
-    """Class to postprocess pxbuilder project
+    Attributes:
+        cells (list): cells to be checked as (r0, r1, c0, c1) index tuples of
+            corners
+        leaves (list): cells which were not subdivided. Grid points inside
+            are filled by `interpolate`.
+
+    Example:
+        >>> quadtree = GridRefinement(grid, keys, ps.field_index, 3)
+        >>> nodes = quadtree.nodes()
+        >>> while nodes:
+        ...     # calculate nodes
+        ...     nodes = quadtree.refine()
+        >>> quadtree.interpolate()
     """
-    def __init__(self, *args, **kwargs):
-        self.section_class = PXsection
-        super(PXPS, self).__init__(*args, **kwargs)
+    def __init__(self, grid, keys, index, levels, maxerr=0.05):
+        self.grid = grid
+        self.keys = keys
+        self.index = index
+        self.maxerr = maxerr
+        rb = self.breaks(len(grid.yspace), 2**levels)
+        cb = self.breaks(len(grid.xspace), 2**levels)
+        self.cells = [(r0, r1, c0, c1) for r0, r1 in zip(rb[:-1], rb[1:]) for c0, c1 in zip(cb[:-1], cb[1:])]
+        self.leaves = []
+
+    @staticmethod
+    def breaks(n, step):
+        return sorted(set(range(0, n, step)) | {n - 1})
+
+    def nodes(self):
+        """Return sorted list of (r, c) corners of cells."""
+        nodes = set()
+        for r0, r1, c0, c1 in self.cells:
+            nodes.update([(r0, c0), (r0, c1), (r1, c0), (r1, c1)])
+        return sorted(nodes)
+
+    def split(self, cell):
+        """Split cell into (up to) four subcells."""
+        r0, r1, c0, c1 = cell
+        rs = [r0, (r0 + r1) // 2, r1] if r1 - r0 > 1 else [r0, r1]
+        cs = [c0, (c0 + c1) // 2, c1] if c1 - c0 > 1 else [c0, c1]
+        return [(ra, rb, ca, cb) for ra, rb in zip(rs[:-1], rs[1:]) for ca, cb in zip(cs[:-1], cs[1:])]
+
+    def needs_refinement(self, cell, values, scale):
+        """Check whether cell must be subdivided."""
+        r0, r1, c0, c1 = cell
+        rr, cc = np.array([r0, r0, r1, r1]), np.array([c0, c1, c0, c1])
+        keys = set(self.keys[rr, cc])
+        if len(keys) > 1:
+            return True
+        xs, ys = self.grid.xspace, self.grid.yspace
+        if self.index.crosses(xs[c0], ys[r0], xs[c1], ys[r1]):
+            return True
+        if None in keys:
+            return False
+        if np.any(self.grid.status[rr, cc] != 1):
+            return True
+        vals = values[self.grid.index[rr, cc]]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            err = np.nanmax((np.nanmax(vals, axis=0) - np.nanmin(vals, axis=0)) / scale)
+        return err > self.maxerr
 
-    def calculate_composition(self, nx=50, ny=50):
-        """Method to calculate compositional variations on grid.
+    def refine(self):
+        """Subdivide cells which need refinement.
 
-        A compositions are calculated for stable assemblages in regular grid
-        covering pT range of pseudosection. A stable assemblage is identified
-        from constructed divariant fields. Results are stored in `grid` property
-        as `GridData` instance. A property `all_data_keys` is updated.
+        Returns:
+            list: (r, c) corners of new cells
+        """
+        values = self.grid.results.values
+        if len(values) > 0:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                scale = np.nanmax(values, axis=0) - np.nanmin(values, axis=0)
+            scale[~(scale > 0)] = np.inf
+        else:
+            scale = np.inf
+        cells = []
+        for cell in self.cells:
+            r0, r1, c0, c1 = cell
+            if r1 - r0 > 1 or c1 - c0 > 1:
+                if self.needs_refinement(cell, values, scale):
+                    cells.extend(self.split(cell))
+                else:
+                    self.leaves.append(cell)
+        self.cells = cells
+        return self.nodes()
 
-        Before any grid point calculation, ptguesses are updated from nearest
-        invariant point. If calculation fails, nearest solution from univariant
-        line is used to update ptguesses. Finally, if solution is still not found,
-        the method `fix_solutions` is called and neigbouring grid calculations are
-        used to provide ptguess.
+    def interpolate(self):
+        """Fill grid points skipped inside cells which were not subdivided.
+
+        Results are bilinearly interpolated from cell corners and ptguess of
+        nearest corner is used. Interpolated grid points get status 2, so
+        they are not counted as calculated nor failed.
+
+        Returns:
+            int: number of interpolated grid points
+        """
+        grid = self.grid
+        # grid points on edges are shared by neighbouring cells
+        pending = np.isnan(grid.status) & (self.keys != None)
+        nodes, corners, weights = [], [], []
+        for r0, r1, c0, c1 in self.leaves:
+            rr, cc = np.array([r0, r0, r1, r1]), np.array([c0, c1, c0, c1])
+            if np.any(grid.status[rr, cc] != 1):
+                continue
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    if pending[r, c]:
+                        pending[r, c] = False
+                        u, v = (r - r0) / (r1 - r0), (c - c0) / (c1 - c0)
+                        nodes.append((r, c))
+                        corners.append(grid.index[rr, cc])
+                        weights.append([(1 - u) * (1 - v), (1 - u) * v, u * (1 - v), u * v])
+        if nodes:
+            corners, weights = np.array(corners), np.array(weights)
+            table = grid.results[corners[np.arange(len(nodes)), np.argmax(weights, axis=1)]]
+            table.values = np.einsum('nk,nkv->nv', weights, grid.results.values[corners])
+            start = len(grid.results)
+            grid.results.extend(table)
+            for i, (r, c) in enumerate(nodes):
+                grid.index[r, c] = start + i
+                grid.status[r, c] = 2
+        return len(nodes)
+
+
+class GridContinuation:
+    """Wavefront scheduling of grid calculations.
+
+    Every divariant field is calculated from seed grid point nearest to
+    invariant point bounding the field. Next wavefront consists of not yet
+    calculated grid points having solved neighbour in same field, so every
+    calculation could start from already converged ptguess. New seed is chosen
+    when wavefront of field stops, e.g. on line of failed grid points. Grid
+    points restored from checkpoint are used as solved neighbours. Wavefront
+    could be advanced level by level or continuously, while some grid points
+    are still calculated (see `nodes`).
+
+    Args:
+        grid (GridData): grid to be calculated
+        keys (numpy.array): object array of field keys of grid points
+        index (GuessIndex): spatial index of guess sources used to choose seeds
+
+    Attributes:
+        fields (list): keys of divariant fields
+        labels (numpy.array): integer array of field indexes (-1 outside)
+        sources (dict): solved neighbours (rn, cn) of grid points (r, c) of
+            last wavefront. Seed points are not included.
+
+    Example:
+        >>> wavefront = GridContinuation(grid, keys, ps.guess_index(0))
+        >>> nodes = wavefront.nodes()
+        >>> while nodes:
+        ...     # calculate nodes using ptguess of wavefront.sources
+        ...     nodes = wavefront.nodes()
+    """
+    # orthogonal neighbours are preferred
+    shifts = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+    def __init__(self, grid, keys, index):
+        self.grid = grid
+        self.index = index
+        self.fields = list(OrderedDict.fromkeys(k for k in keys.flat if k is not None))
+        lookup = {key: lab for lab, key in enumerate(self.fields)}
+        self.labels = np.array([-1 if k is None else lookup[k] for k in keys.flat]).reshape(keys.shape)
+        self.sources = {}
+
+    def nodes(self, busy=None):
+        """Return sorted list of (r, c) grid points of next wavefront.
 
         Args:
-            nx (int): Number of grid points along x direction (T)
-            ny (int): Number of grid points along y direction (p)
+            busy (numpy.array): boolean array of grid points being calculated.
+                New seed is not chosen for fields with such points, as they
+                could still advance. Default None (no grid points calculated).
         """
-        axr = self.xrange
-        ayr = self.yrange
-        gpleft = 0
-        for ix, ps in self.sections.items():
-            paxr = ps.xrange
-            payr = ps.yrange
-            grid = GridData(ps,
-                            nx=round(nx*(paxr[1] - paxr[0])/(axr[1] - axr[0])),
-                            ny=round(ny*(payr[1] - payr[0])/(ayr[1] - ayr[0])))
-            last_inv = 0
-            with tqdm(desc='Gridding', total=np.prod(grid.xg.shape)) as pbar:
-                tm = (self.tc.trange[0] + self.tc.trange[1]) / 2
-                for c in range(len(grid.xspace)):
-                    # change bulk
-                    bulk = self.tc.interpolate_bulk(grid.xspace[c])
-                    self.tc.update_scriptfile(bulk=bulk)
-                    for r in range(len(grid.yspace)):
-                        x, y = grid.xg[r, c], grid.yg[r, c]
-                        k = self.identify(x, y)
-                        if k is not None:
-                            # update guesses from closest inv point
-                            dst = sys.float_info.max
-                            for id_inv, inv in ps.invpoints.items():
-                                d2 = (inv._x - x)**2 + (inv._y - y)**2
-                                if d2 < dst:
-                                    dst = d2
-                                    id_close = id_inv
-                            if id_close != last_inv:
-                                self.tc.update_scriptfile(guesses=ps.invpoints[id_close].ptguess())
-                                last_inv = id_close
-                            grid.status[r, c] = 0
-                            start_time = time.time()
-                            tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), y, tm)
-                            delta = time.time() - start_time
-                            status, variance, pts, res, output = self.tc.parse_logfile()
-                            if len(res) == 1:
-                                grid.gridcalcs[r, c] = res[0]
-                                grid.status[r, c] = 1
-                                grid.delta[r, c] = delta
-                            else:
-                                # update guesses from closest uni line point
-                                dst = sys.float_info.max
-                                for id_uni in self.unilists[ix][k]:
-                                    uni = ps.unilines[id_uni]
-                                    for vix in list(range(len(uni._x))[uni.used]):
-                                        d2 = (uni._x[vix] - x)**2 + (uni._y[vix] - y)**2
-                                        if d2 < dst:
-                                            dst = d2
-                                            id_close = id_uni
-                                            vix_close = vix
-                                self.tc.update_scriptfile(guesses=ps.unilines[id_close].ptguess(idx=vix_close))
-                                start_time = time.time()
-                                tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), y, tm)
-                                delta = time.time() - start_time
-                                status, variance, pts, res, output = self.tc.parse_logfile()
-                                if len(res) == 1:
-                                    grid.gridcalcs[r, c] = res[0]
-                                    grid.status[r, c] = 1
-                                    grid.delta[r, c] = delta
-                                else:
-                                    grid.gridcalcs[r, c] = None
-                                    grid.status[r, c] = 0
-                        else:
-                            grid.gridcalcs[r, c] = None
-                        pbar.update(1)
-            print('Grid search done. {} empty points left.'.format(len(np.flatnonzero(grid.status == 0))))
-            gpleft += len(np.flatnonzero(grid.status == 0))
-            self.grids[ix] = grid
-        # restore bulk
-        self.tc.update_scriptfile(bulk=self.bulk)
-        if gpleft > 0:
-            self.fix_solutions()
-        self.create_masks()
-        # update variable lookup table
-        self.collect_all_data_keys()
-        # save
-        self.save()
+        status = self.grid.status
+        pending = np.isnan(status) & (self.labels >= 0)
+        solved = status == 1
+        rows, cols = np.indices(status.shape)
+        src_r = np.full(status.shape, -1)
+        src_c = np.full(status.shape, -1)
+        for dr, dc in self.shifts:
+            nr, nc = rows + dr, cols + dc
+            valid = (nr >= 0) & (nr < status.shape[0]) & (nc >= 0) & (nc < status.shape[1])
+            nr, nc = np.where(valid, nr, rows), np.where(valid, nc, cols)
+            ok = pending & valid & solved[nr, nc] & (self.labels[nr, nc] == self.labels) & (src_r < 0)
+            src_r[ok], src_c[ok] = nr[ok], nc[ok]
+        front = src_r >= 0
+        self.sources = {(r, c): (src_r[r, c], src_c[r, c]) for r, c in zip(*np.nonzero(front))}
+        nodes = list(self.sources)
+        active = set(self.labels[front])
+        if busy is not None:
+            active.update(self.labels[busy])
+        for lab in set(np.unique(self.labels[pending])).difference(active):
+            rr, cc = np.nonzero(pending & (self.labels == lab))
+            d = self.index.distance(self.grid.xg[rr, cc], self.grid.yg[rr, cc], self.fields[lab])
+            ix = np.argmin(d)
+            nodes.append((rr[ix], cc[ix]))
+        return sorted(nodes)
+
+
+class FieldIndex:
+    """Spatial index of divariant fields.
+
+    Fields are prefiltered by bounding boxes and tested with prepared
+    geometries, so single point queries need just few shapely calls. Arrays
+    of points are tested field by field using vectorised point in polygon test.
+    When fields overlap, first one in order of `keys` wins.
 
-    def fix_solutions(self):
-        """Method try to find solution for grid points with failed status.
+    Attributes:
+        keys (list): keys of divariant fields
+        bounds (numpy.array): bounding boxes of fields (minx, miny, maxx, maxy)
+    """
+    def __init__(self, shapes):
+        self.keys = list(shapes)
+        self._shapes = list(shapes.values())
+        self.bounds = np.array([shape.bounds for shape in self._shapes]).reshape(-1, 4)
+        self._prepared = [prep(shape) for shape in self._shapes]
 
-        Ptguesses are used from successfully calculated neighboring points until
-        solution is find. Otherwise ststus remains failed.
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, x, y):
+        """Return indexes of fields with bounding box containing point."""
+        b = self.bounds
+        return np.flatnonzero((b[:, 0] <= x) & (x <= b[:, 2]) & (b[:, 1] <= y) & (y <= b[:, 3]))
+
+    def identify(self, x, y):
+        """Return key of field containing point or None."""
+        point = Point(x, y)
+        for ix in self.candidates(x, y):
+            if self._prepared[ix].contains(point):
+                return self.keys[ix]
+        return None
+
+    def crosses(self, xmin, ymin, xmax, ymax):
+        """Return True when boundary of any field crosses rectangle."""
+        b = self.bounds
+        rect = box(xmin, ymin, xmax, ymax)
+        for ix in np.flatnonzero((b[:, 0] <= xmax) & (xmin <= b[:, 2]) & (b[:, 1] <= ymax) & (ymin <= b[:, 3])):
+            if self._prepared[ix].intersects(rect) and not self._prepared[ix].contains(rect):
+                return True
+        return False
+
+    def labels(self, xs, ys):
+        """Return integer array of field indexes (-1 outside of fields).
+
+        Args:
+            xs (array_like): x coords
+            ys (array_like): y coords
         """
-        if self.gridded:
-            for ix, grid in self.grids.items():
-                log = []
-                ri, ci = np.nonzero(grid.status == 0)
-                fixed, ftot = 0, len(ri)
-                tm = (self.tc.trange[0] + self.tc.trange[1]) / 2
-                tq = trange(ftot, desc='Fix ({}/{})'.format(fixed, ftot))
-                for ind in tq:
-                    r, c = ri[ind], ci[ind]
-                    x, y = grid.xg[r, c], grid.yg[r, c]
-                    k = self.identify(x, y)
-                    if k is not None:
-                        # search already done grid neighs
-                        for rn, cn in grid.neighs(r, c):
-                            if grid.status[rn, cn] == 1:
-                                # change bulk
-                                bulk = self.tc.interpolate_bulk(grid.xspace[cn])
-                                self.tc.update_scriptfile(bulk=bulk, guesses=grid.gridcalcs[rn, cn]['ptguess'])
-                                start_time = time.time()
-                                tcout, ans = self.tc.calc_assemblage(k.difference(self.tc.excess), y, tm)
-                                delta = time.time() - start_time
-                                status, variance, pts, res, output = self.tc.parse_logfile()
-                                if len(res) == 1:
-                                    grid.gridcalcs[r, c] = res[0]
-                                    grid.status[r, c] = 1
-                                    grid.delta[r, c] = delta
-                                    fixed += 1
-                                    tq.set_description(desc='Fix ({}/{})'.format(fixed, ftot))
-                                    break
-                    if grid.status[r, c] == 0:
-                        log.append('No solution find for {}, {}'.format(x, y))
-                log.append('Fix done. {} empty grid points left.'.format(len(np.flatnonzero(grid.status == 0))))
-                print('\n'.join(log))
-            # restore bulk
-            self.tc.update_scriptfile(bulk=self.bulk)
-        else:
-            print('Not yet gridded...')
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        labels = np.full(xs.shape, -1, dtype=int)
+        for ix, shape in enumerate(self._shapes):
+            xmin, ymin, xmax, ymax = self.bounds[ix]
+            sel = np.flatnonzero((labels.flat == -1) & (xs.flat >= xmin) & (xs.flat <= xmax) &
+                                 (ys.flat >= ymin) & (ys.flat <= ymax))
+            if len(sel) > 0:
+                inside = contains_xy(shape, xs.flat[sel], ys.flat[sel])
+                labels.flat[sel[inside]] = ix
+        return labels
+
+    def identify_many(self, xs, ys):
+        """Return object array of keys (None outside of fields)."""
+        labels = self.labels(xs, ys)
+        keys = np.empty(len(self.keys) + 1, dtype=object)
+        for ix, key in enumerate(self.keys):
+            keys[ix] = key
+        # label -1 points to trailing None
+        return keys[labels]
+
+
+class GuessIndex:
+    """Spatial index of starting guesses of pseudosection.
+
+    KD-trees of invariant points and used vertices of univariant lines
+    return nearest source of starting guesses in logarithmic time. The y
+    coordinates are scaled by `ratio` of section, so both axes of diagram
+    have same weight. Trees restricted to invariant points and univariant
+    lines bounding single divariant field are built on first query.
+
+    Args:
+        ps (SectionBase): pseudosection
+        unilists (dict): univariant lines IDs bounding fields identified by key
+
+    Attributes:
+        ratio (float): scale of y coordinates
+    """
+    def __init__(self, ps, unilists):
+        self.ratio = ps.ratio
+        self._ps = ps
+        self._unilists = unilists
+        self._all = self._build(list(ps.invpoints), list(ps.unilines))
+        self._fields = {}
+
+    def _tree(self, x, y):
+        if len(x) > 0:
+            return cKDTree(np.column_stack([x, self.ratio * np.asarray(y)]))
+
+    def _build(self, invs, unis):
+        inv_x = [np.ravel(self._ps.invpoints[id_inv]._x)[0] for id_inv in invs]
+        inv_y = [np.ravel(self._ps.invpoints[id_inv]._y)[0] for id_inv in invs]
+        refs, uni_x, uni_y = [], [], []
+        for id_uni in unis:
+            uni = self._ps.unilines[id_uni]
+            vixs = np.arange(len(uni._x))[uni.used]
+            refs.extend((id_uni, vix) for vix in vixs)
+            uni_x.extend(uni._x[vixs])
+            uni_y.extend(uni._y[vixs])
+        return invs, self._tree(inv_x, inv_y), refs, self._tree(uni_x, uni_y)
+
+    def _field(self, key):
+        if key is None:
+            return self._all
+        if key not in self._fields:
+            unis = list(self._unilists.get(key, []))
+            invs = {self._ps.unilines[id_uni].begin for id_uni in unis}.union({self._ps.unilines[id_uni].end for id_uni in unis})
+            self._fields[key] = self._build(sorted(invs.difference({0})), unis)
+        return self._fields[key]
+
+    def nearest_inv(self, x, y, key=None):
+        """Return ID of invariant point nearest to given point.
+
+        Args:
+            x (float): x coord
+            y (float): y coord
+            key (frozenset): When not None, only invariant points bounding
+                given divariant field are used. Default None
+
+        Returns:
+            int: ID of invariant point or None
+        """
+        invs, tree, refs, unitree = self._field(key)
+        if tree is not None:
+            return invs[tree.query((x, self.ratio * y))[1]]
+
+    def distance(self, xs, ys, key=None):
+        """Return scaled distances of points to nearest invariant point.
+
+        Univariant lines points are used when there is no invariant point.
+
+        Args:
+            xs (array_like): x coords
+            ys (array_like): y coords
+            key (frozenset): When not None, only guess sources of given
+                divariant field are used. Default None
+
+        Returns:
+            numpy.array: distances (zeros when there is no guess source)
+        """
+        invs, tree, refs, unitree = self._field(key)
+        tree = unitree if tree is None else tree
+        pts = np.column_stack([np.ravel(xs), self.ratio * np.ravel(ys)])
+        if tree is None:
+            return np.zeros(len(pts))
+        return tree.query(pts)[0]
+
+    def nearest_uni(self, x, y, key=None):
+        """Return nearest used point of univariant line.
+
+        Args:
+            x (float): x coord
+            y (float): y coord
+            key (frozenset): When not None, only univariant lines bounding
+                given divariant field are used. Default None
+
+        Returns:
+            tuple: (uni_id, index) of univariant line point or None
+        """
+        invs, tree, refs, unitree = self._field(key)
+        if unitree is not None:
+            return refs[unitree.query((x, self.ratio * y))[1]]
+
+
+class FieldMasks(Mapping):
+    """Boolean masks of divariant fields derived from label raster.
+
+    Masks behave as read-only dictionary associating keys with boolean arrays.
+    Individual masks are created on first access and cached. As every grid
+    point has single label, masks never overlap.
+
+    Attributes:
+        labels (numpy.array): Integer raster of field indexes to `keys`
+            (-1 outside of any field)
+    """
+    def __init__(self, labels, keys):
+        self.labels = labels
+        self._keys = list(keys)
+        self._index = {key: ix for ix, key in enumerate(self._keys)}
+        self._cache = {}
+
+    def __getitem__(self, key):
+        mask = self._cache.get(key)
+        if mask is None:
+            mask = self.labels == self._index[key]
+            self._cache[key] = mask
+        return mask
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getstate__(self):
+        return dict(labels=self.labels, keys=self._keys)
+
+    def __setstate__(self, state):
+        self.__init__(state['labels'], state['keys'])
 
 
 class GridData:
@@ -1945,13 +2750,17 @@ class GridData:
     Attributes:
         xspace (numpy.array): Array of x coordinates used for gridding
         yspace (numpy.array): Array of y coordinates used for gridding
-        gridcalcs (numpy.array): 2D array of THERMOCALC Results
+        results (ResultTable): THERMOCALC results of all grid points
+        index (numpy.array): 2D array of row indexes to `results`. -1 for
+            grid points without result.
         status (numpy.array): 2D array indicating status of calculation. The
-            values are 1 - OK, 0 - Failed, NaN - not calculated (outside of any
-            divariant field)
+            values are 1 - OK, 0 - Failed, -1 - Timeout (THERMOCALC killed),
+            2 - Interpolated (skipped by adaptive refinement, see
+            `GridRefinement.interpolate`), NaN - not calculated (outside of
+            any divariant field)
         delta (numpy.array): 2D array of time needed for THERMOCALC calculation
         masks (dict): Dictionaty associating divariant field key (frozenset) and
-            binary mask for `gridcalcs`, `status` and `delta` arrays. Masks are
+            binary mask for `index`, `status` and `delta` arrays. Masks are
             used to retrieve results for individual divariant fields.
 
     """
@@ -1961,7 +2770,8 @@ class GridData:
         dy = (ps.yrange[1] - ps.yrange[0]) / ny
         self.yspace = np.linspace(ps.yrange[0] + dy/2, ps.yrange[1] - dy/2, ny)
         self.xg, self.yg = np.meshgrid(self.xspace, self.yspace)
-        self.gridcalcs = np.empty(self.xg.shape, np.dtype(object))
+        self.results = ResultTable()
+        self.index = np.full(self.xg.shape, -1, dtype=int)
         self.status = np.empty(self.xg.shape)
         self.status[:] = np.nan
         self.delta = np.empty(self.xg.shape)
@@ -1969,11 +2779,74 @@ class GridData:
         self.masks = OrderedDict()
 
     def __repr__(self):
-        tmpl = 'Grid {}x{} with ok/failed/none solutions {}/{}/{}'
+        tmpl = 'Grid {}x{} with ok/failed/timeout/none solutions {}/{}/{}/{}'
         ok = len(np.flatnonzero(self.status == 1))
         fail = len(np.flatnonzero(self.status == 0))
+        tout = len(np.flatnonzero(self.status == -1))
+        interp = len(np.flatnonzero(self.status == 2))
+        if interp > 0:
+            tmpl += ' and {} interpolated'.format(interp)
         return tmpl.format(len(self.xspace), len(self.yspace),
-                           ok, fail, np.prod(self.xg.shape) - ok - fail)
+                           ok, fail, tout, np.prod(self.xg.shape) - ok - fail - tout - interp)
+
+    def __setstate__(self, state):
+        # grids stored by older versions keep results in object array
+        if 'gridcalcs' in state:
+            gridcalcs = state.pop('gridcalcs')
+            state['results'] = ResultTable()
+            state['index'] = np.full(gridcalcs.shape, -1, dtype=int)
+            for (r, c), res in np.ndenumerate(gridcalcs):
+                if res is not None:
+                    state['index'][r, c] = len(state['results'])
+                    state['results'].append(res)
+        self.__dict__.update(state)
+
+    @property
+    def gridcalcs(self):
+        """numpy.array: 2D object array of THERMOCALC results dicts.
+
+        Created on request from `results`, so it is read-only.
+        """
+        gridcalcs = np.empty(self.xg.shape, np.dtype(object))
+        for r, c in zip(*np.nonzero(self.index >= 0)):
+            gridcalcs[r, c] = self.results[self.index[r, c]]
+        return gridcalcs
+
+    def get_result(self, r, c):
+        """Return results dict of grid point or None when not calculated."""
+        if self.index[r, c] < 0:
+            return None
+        return self.results[self.index[r, c]]
+
+    def set_result(self, r, c, res):
+        """Store result of grid point.
+
+        Row of already calculated point is replaced, so recalculated points
+        do not leave orphan rows in `results`.
+
+        Args:
+            r (int): Row index
+            c (int): Column index
+            res: results dict, single row ResultTable or None
+        """
+        ix = self.index[r, c]
+        if res is None:
+            if ix >= 0:
+                del self.results[ix]
+                self.index[r, c] = -1
+                self.index[self.index > ix] -= 1
+        elif ix >= 0:
+            self.results.set_row(ix, res)
+        else:
+            self.index[r, c] = len(self.results)
+            if isinstance(res, ResultTable):
+                self.results.extend(res[:1])
+            else:
+                self.results.append(res)
+
+    def ptguess(self, r, c):
+        """Return ptguess of grid point."""
+        return self.results.ptguess(self.index[r, c])
 
     def get_indexes(self, x, y):
         """Return row and column index tuple of nearest grid point
@@ -2035,26 +2908,33 @@ class PTpath:
     Attributes:
         t (numpy.array): 1D array of temperatures.
         p (numpy.array): 1D array of pressures.
-        results (list): List of THERMOCALC results dictionaries.
+        results (ResultTable): THERMOCALC results along path.
     """
     def __init__(self, points, results):
         self.t, self.p = np.array(points).T
-        self.results = results
+        self.results = as_results(results)
 
     def get_path_data(self, phase, expr):
-        ex = np.array([eval_expr(expr, res['data'][phase]) if phase in res['data'] else np.nan for res in self.results])
-        return ex
+        ok = self.results.contains(phase)
+        if not ok.any():
+            return np.full(len(self.results), np.nan)
+        func = compile_expr(expr)
+        ex = func(self.results.phase_data(phase, variables=func.variables))
+        return np.where(ok, ex, np.nan)
 
 
 def eval_expr(expr, dt):
     """Evaluate expression using THERMOCALC output variables.
 
+    Expression is compiled only once (see `compile_expr`). Values could be
+    floats or arrays, so expression could be evaluated for all points at once.
+
     Args:
         expr (str): expression to be evaluated
         dt (dict): dictionary of all available variables and their values
 
     Returns:
-        float: value evaluated from epxression
+        float: value evaluated from epxression (array for array values)
 
     Example:
         >>> ps = pt.sections[0]
@@ -2063,21 +2943,55 @@ def eval_expr(expr, dt):
         >>> eval_expr('xMgX/(xFeX+xMgX)', ps.invpoints[5].data()['g'])
         0.12584215591915301
     """
-    def eval_(node):
-        if isinstance(node, ast.Num):  # number
-            return node.n
+    return compile_expr(expr)(dt)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expr(expr):
+    """Parse and validate expression and return function evaluating it.
+
+    Compiled expressions are cached by expression string. Only numbers,
+    variable names, arithmetic operators (+, -, *, /, **) and unary minus
+    are allowed.
+
+    Args:
+        expr (str): expression to be compiled
+
+    Returns:
+        function: function accepting dictionary of variables. Names of used
+        variables are stored in its `variables` attribute.
+
+    Example:
+        >>> f = compile_expr('xMgX/(xFeX+xMgX)')
+        >>> f.variables
+        frozenset({'xFeX', 'xMgX'})
+        >>> f(pt.grids[0].results.phase_data('g'))
+        array([0.12584216, 0.12676032, ...])
+    """
+    ops = {ast.Add: np.add, ast.Sub: np.subtract,
+           ast.Mult: np.multiply, ast.Div: np.divide,
+           ast.Pow: np.power, ast.USub: np.negative, ast.UAdd: np.positive}
+    variables = set()
+
+    def compile_(node):
         if isinstance(node, ast.Name):  # variable
-            return dt[node.id]
-        elif isinstance(node, ast.BinOp):  # <left> <operator> <right>
-            return ops[type(node.op)](eval_(node.left), eval_(node.right))
-        elif isinstance(node, ast.UnaryOp):  # <operator> <operand> e.g., -1
-            return ops[type(node.op)](eval_(node.operand))
+            name = node.id
+            variables.add(name)
+            return lambda dt: dt[name]
+        elif isinstance(node, ast.BinOp) and type(node.op) in ops:  # <left> <operator> <right>
+            op, left, right = ops[type(node.op)], compile_(node.left), compile_(node.right)
+            return lambda dt: op(left(dt), right(dt))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in ops:  # <operator> <operand> e.g., -1
+            op, operand = ops[type(node.op)], compile_(node.operand)
+            return lambda dt: op(operand(dt))
+        elif isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):  # number
+            value = node.value
+            return lambda dt: value
         else:
             raise TypeError(node)
-    ops = {ast.Add: np.add, ast.Sub: np.subtract,
-           ast.Mult: np.multiply, ast.Div: np.divide,
-           ast.Pow: np.power}
-    return eval_(ast.parse(expr, mode='eval').body)
+    func = compile_(ast.parse(expr, mode='eval').body)
+    func.variables = frozenset(variables)
+    return func
 
 explorers = {'.ptb': PTPS,
              '.txb': TXPS,
@@ -2129,11 +3043,43 @@ def ps_grid():
                         help='use stored original working directory')
     parser.add_argument('--tolerance', type=float, default=None,
                         help='tolerance to simplify univariant lines')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of parallel THERMOCALC processes')
+    parser.add_argument('--resume', action='store_true',
+                        help='resume interrupted gridding from checkpoint')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='kill THERMOCALC running longer than timeout seconds')
+    parser.add_argument('--cache', action='store_true',
+                        help='use on-disk cache of THERMOCALC calculations')
+    parser.add_argument('--adaptive', type=int, default=0,
+                        help='number of adaptive refinement levels')
+    parser.add_argument('--maxerr', type=float, default=0.05,
+                        help='maximum relative error of adaptive refinement')
+    parser.add_argument('--chain', type=int, default=1,
+                        help='number of grid points calculated in single THERMOCALC session')
+    parser.add_argument('--continuation', action='store_true',
+                        help='calculate fields as wavefronts from solved neighbours')
+    parser.add_argument('--trace', type=str, default=None,
+                        help='write timing of gridding to Chrome trace file')
     args = parser.parse_args()
     PSOK = explorers.get(Path(args.project[0]).suffix, None)
     if PSOK is not None:
         ps = PSOK(*args.project, tolerance=args.tolerance, origwd=args.origwd)
-        sys.exit(ps.calculate_composition(nx=args.nx, ny=args.ny))
+        ps.tc.timeouts['assemblage'] = args.timeout
+        if args.cache:
+            ps.tc.enable_cache()
+        if args.trace:
+            ps.tc.enable_timer()
+        ps.calculate_composition(nx=args.nx, ny=args.ny, workers=args.jobs, resume=args.resume,
+                                 adaptive=args.adaptive, maxerr=args.maxerr, chain=args.chain,
+                                 continuation=args.continuation)
+        if args.trace:
+            ps.tc.timer.to_chrome_trace(args.trace, run=ps.tc.timer.run)
+            print('{:20s} {:>8s} {:>10s} {:>10s}'.format('span', 'count', 'total [s]', 'mean [ms]'))
+            for name, st in ps.run_stats()['spans'].items():
+                print('{:20s} {:8d} {:10.2f} {:10.2f}'.format(name, st['count'], st['total'], 1000 * st['mean']))
+            print('Trace written to {}'.format(args.trace))
+        sys.exit(0)
     else:
         print('Project file not recognized...')
         sys.exit(1)
@@ -2205,3 +3151,46 @@ def ps_drawpd():
     else:
         print('Project file not recognized...')
         sys.exit(1)
+
+
+def ps_dogmin():
+    parser = argparse.ArgumentParser(description='Survey stable assemblages by dogmin on grid')
+    parser.add_argument('workdir', type=str,
+                        help='THERMOCALC working directory')
+    parser.add_argument('--nx', type=int, default=10,
+                        help='number of T steps')
+    parser.add_argument('--ny', type=int, default=10,
+                        help='number of P steps')
+    parser.add_argument('-v', '--variance', type=int, default=4,
+                        help='maximum variance of equilibria')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                        help='number of parallel THERMOCALC processes')
+    parser.add_argument('--doglevel', type=int, default=1,
+                        help='dogmin log level')
+    parser.add_argument('--which', type=str, nargs='+', default=None,
+                        help='phases considered by dogmin')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='kill THERMOCALC running longer than timeout seconds')
+    parser.add_argument('-o', '--out', type=str, default=None,
+                        help='save map of stable assemblages to file')
+    args = parser.parse_args()
+    tc = TCAPI(args.workdir, lazy=False)
+    if not tc.OK:
+        print(tc.status)
+        sys.exit(1)
+    tc.timeouts['dogmin'] = args.timeout
+    kwargs = dict(doglevel=args.doglevel)
+    if args.which is not None:
+        kwargs['which'] = set(args.which)
+    survey = tc.dogmin_survey(nx=args.nx, ny=args.ny, variance=args.variance, workers=args.jobs, **kwargs)
+    print(survey)
+    for key, n in survey.counts().items():
+        print('{:5d} {}'.format(n, ' '.join(sorted(key.difference(tc.excess)))))
+    candidates = survey.invariant_candidates()
+    if candidates:
+        print('Possible invariant points:')
+        for x, y, keys in candidates:
+            print('  T={:g} p={:g} {} assemblages'.format(x, y, len(keys)))
+    if args.out is not None:
+        survey.show(excess=tc.excess, filename=args.out)
+    sys.exit(0)
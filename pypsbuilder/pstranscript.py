@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Record and replay of THERMOCALC runs.
+
+Runs of TCAPI with recording enabled (see `TCAPI.record`) are stored in
+transcript directory. Stand-in executable created by `TCTranscript.install`
+replays them, so whole workflows (gridding, PT paths, builders) could be
+benchmarked or tested on machine without THERMOCALC.
+
+Module uses only standard library, so stand-in executable starts quickly.
+It runs this file as script::
+
+    python pstranscript.py /path/to/transcript
+
+"""
+import os
+import sys
+import gzip
+import pickle
+import hashlib
+from pathlib import Path
+
+TCenc = 'mac-roman'
+
+replay_template = """#!/bin/sh
+exec "{python}" "{module}" "{transcriptdir}"
+"""
+
+
+class TCTranscript:
+    """Directory of recorded THERMOCALC runs.
+
+    Every run is stored as gzipped pickle with standard input and output and
+    content of log, ic, -o and -dr files. Runs are keyed by SHA-256 hash of
+    input together with prefs file and scriptfile, so the same calculation
+    with different starting guesses or bulk is recorded separately.
+
+    Attributes:
+        transcriptdir (Path): Directory with recorded runs
+
+    Example:
+        >>> tc.record('/path/to/transcript')
+        >>> tcout, ans = tc.calc_assemblage(phases, p, t)
+        >>> TCTranscript('/path/to/transcript').install('/path/to/copy')
+    """
+    outputs = ('-ic', '-o', '-dr')
+
+    def __init__(self, transcriptdir):
+        self.transcriptdir = Path(transcriptdir).resolve()
+        self.transcriptdir.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return 'THERMOCALC transcript with {} runs in {}'.format(len(self), self.transcriptdir)
+
+    def __len__(self):
+        return len(list(self.transcriptdir.glob('*.gz')))
+
+    def files(self, workdir):
+        """Return lists of input and output files of working directory."""
+        workdir = Path(workdir)
+        prefs = workdir.joinpath('tc-prefs.txt')
+        name = None
+        if prefs.exists():
+            for line in prefs.read_bytes().decode(TCenc).splitlines():
+                kw = line.split()
+                if kw and kw[0] == 'scriptfile':
+                    name = kw[1]
+        inputs = [prefs]
+        outputs = [workdir.joinpath('tc-log.txt')]
+        if name is not None:
+            inputs.append(workdir.joinpath('tc-' + name + '.txt'))
+            outputs.extend(workdir.joinpath('tc-' + name + sfx + '.txt') for sfx in self.outputs)
+        return inputs, outputs
+
+    def key(self, workdir, instr):
+        """Return key of run defined by input (bytes) and working directory."""
+        inputs, outputs = self.files(workdir)
+        h = hashlib.sha256(instr)
+        for f in inputs:
+            h.update(f.read_bytes() if f.exists() else b'-')
+        return h.hexdigest()
+
+    def path(self, key):
+        return self.transcriptdir.joinpath(key + '.gz')
+
+    def record(self, tc, instr, tcout):
+        """Store finished run of TCAPI.
+
+        Args:
+            tc (TCAPI): THERMOCALC API
+            instr (str): Standard input of run
+            tcout (str): Standard output of run
+        """
+        inputs, outputs = self.files(tc.workdir)
+        self.add(tc.workdir, instr.encode(tc.TCenc), tcout.encode(tc.TCenc),
+                 {f.name: f.read_bytes() for f in outputs if f.exists()})
+
+    def add(self, workdir, stdin, stdout, files=None):
+        """Store run defined by input and output, e.g. synthetic one.
+
+        Args:
+            workdir (str, Path): Working directory
+            stdin (bytes): Standard input of run
+            stdout (bytes): Standard output of run
+            files (dict): Content of output files keyed by file name.
+                Default None (no output files)
+        """
+        entry = dict(stdin=stdin, stdout=stdout, files={} if files is None else files)
+        path = self.path(self.key(workdir, stdin))
+        tmp = path.with_name('{}.{}.tmp'.format(path.name, os.getpid()))
+        with gzip.open(str(tmp), 'wb', compresslevel=1) as stream:
+            pickle.dump(entry, stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(str(tmp), str(path))
+
+    def replay(self, workdir='.', stdin=None, stdout=None):
+        """Replay recorded run in working directory.
+
+        Output files of recorded run are written to working directory (or
+        removed when run did not produce them) and recorded output is written
+        to stdout.
+
+        Args:
+            workdir (str, Path): Working directory. Default is current one.
+            stdin: Binary stream with input. Default ``sys.stdin``
+            stdout: Binary stream for output. Default ``sys.stdout``
+
+        Returns:
+            int: Exit status. 1 when run with given input was not recorded.
+        """
+        stdin = sys.stdin.buffer if stdin is None else stdin
+        stdout = sys.stdout.buffer if stdout is None else stdout
+        instr = stdin.read()
+        key = self.key(workdir, instr)
+        try:
+            with gzip.open(str(self.path(key)), 'rb') as stream:
+                entry = pickle.load(stream)
+        except OSError:
+            stdout.write('No recorded THERMOCALC run {} in {}\n'.format(key, self.transcriptdir).encode(TCenc))
+            stdout.flush()
+            return 1
+        inputs, outputs = self.files(workdir)
+        for f in outputs:
+            if f.name in entry['files']:
+                f.write_bytes(entry['files'][f.name])
+            elif f.exists():
+                f.unlink()
+        stdout.write(entry['stdout'])
+        stdout.flush()
+        return 0
+
+    def install(self, workdir, name='tc350replay'):
+        """Create stand-in THERMOCALC executable replaying this transcript.
+
+        Executable is found by TCAPI as any other THERMOCALC executable,
+        so other ``tc3*`` executables should be removed from working
+        directory. Requires POSIX shell.
+
+        Args:
+            workdir (str, Path): Working directory
+            name (str): Name of executable. Default 'tc350replay'
+
+        Returns:
+            Path: Path to executable
+        """
+        exe = Path(workdir).resolve().joinpath(name)
+        exe.write_text(replay_template.format(python=sys.executable,
+                                              module=Path(__file__).resolve(),
+                                              transcriptdir=self.transcriptdir))
+        exe.chmod(0o755)
+        return exe
+
+
+if __name__ == '__main__':
+    sys.exit(TCTranscript(sys.argv[1]).replay())
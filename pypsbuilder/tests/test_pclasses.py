@@ -1,5 +1,19 @@
+import os
+import sys
+import asyncio
+import pickle
+import shutil
+import json
+from pathlib import Path
+import numpy as np
 import pytest
+from shapely.geometry import box
 from pypsbuilder import TCAPI, InvPoint, UniLine, PTsection
+from pypsbuilder.psclasses import PXsection, run_coroutine, TCTimer, Dogmin, DogminSurvey, ResultTable, Scriptfile
+from pypsbuilder import psexplorer
+from pypsbuilder.psexplorer import (PTPS, FieldIndex, FieldMasks, GridData, GridAxes, PXGridAxes, GuessIndex,
+                                    GridContinuation, GridCheckpoint, GridRefinement, compile_expr, eval_expr)
+from pypsbuilder.benchmarks.synthetic import synthetic_project, synthetic_grid, composition, synthetic_section, field_phases
 
 pytest.ps = PTsection(trange=(400., 700.), prange=(7., 16.))
 
@@ -7,6 +21,44 @@ pytest.ps = PTsection(trange=(400., 700.), prange=(7., 16.))
 def mock_tc():
 	return TCAPI('./examples/outputs')
 
+
+@pytest.fixture
+def fake_tc(tmp_path):
+    """Return function creating TCAPI in temporary working directory, which
+    runs given shell script instead of THERMOCALC."""
+    def make(script):
+        exe = tmp_path / 'tc350'
+        exe.write_text('#!/bin/sh\n' + script)
+        exe.chmod(0o755)
+        tc = TCAPI('./examples/outputs')
+        tc.workdir = tmp_path
+        tc.tcexe = exe
+        tc.name, tc.axname = 'test', 'ax'
+        tc.tcout = 'THERMOCALC 3.50 running\nusing tc-ds.txt produced\n'
+        tc.runstats = dict(calls=0, spawn=0.0, run=0.0, timeouts=0, cached=0)
+        return tc
+    return make
+
+
+@pytest.fixture
+def px_tc():
+    """Return TCAPI with two bulk compositions and temperature range of
+    P-X section."""
+    tc = TCAPI('./examples/outputs')
+    tc.bulk = [['1', '2'], ['3', '2']]
+    tc.trange = (400., 600.)
+    return tc
+
+
+@pytest.fixture
+def synthetic_pt(tmp_path):
+    """Return explorer of synthetic project with 3x2 fields gridded on 12x10
+    grid. THERMOCALC is replayed by stand-in executable."""
+    pt = PTPS(synthetic_project(tmp_path / 'project', nx=3, ny=2, npts=10))
+    synthetic_grid(pt, nx=12, ny=10)
+    return pt
+
+
 def test_parse_ini1(mock_tc):
     test = 'inv1'
     ofile = mock_tc.workdir / '{}-log.txt'.format(test)
@@ -267,3 +319,486 @@ def test_create_shapes():
     akey = frozenset({'pa', 'ep', 'g', 'q', 'bi', 'mu', 'H2O', 'sph'})
     assert len(shapes) == 1, 'Wrong number of areas created'
     assert akey in shapes, 'Wrong key for constructed area'
+
+
+@pytest.mark.parametrize('test', ['inv1', 'inv2', 'inv3', 'uni1', 'uni2', 'uni3'])
+def test_streaming_parser(mock_tc, fake_tc, test):
+    ofile = mock_tc.workdir / '{}-log.txt'.format(test)
+    icfile = mock_tc.workdir / '{}-ic.txt'.format(test)
+
+    with ofile.open('r', encoding=mock_tc.TCenc) as f:
+        output = f.read()
+
+    with icfile.open('r', encoding=mock_tc.TCenc) as f:
+        resic = f.read()
+
+    expected = mock_tc.parse_logfile_new(output=output, resic=resic)
+    tc = fake_tc('')
+    shutil.copy(str(ofile), str(tc.logfile))
+    shutil.copy(str(icfile), str(tc.icfile))
+    for use_mmap in (False, True):
+        new = tc.parse_logfile_new(mmap=use_mmap)
+        assert new[:2] == expected[:2], 'Wrong status or variance'
+        assert (new[2] == expected[2]).all(), 'Wrong pts'
+        assert list(new[3]) == list(expected[3]), 'Wrong results'
+        assert new[4] == output, 'Wrong output'
+
+
+def test_result_table(mock_tc):
+    test = 'uni2'
+    ofile = mock_tc.workdir / '{}-log.txt'.format(test)
+    icfile = mock_tc.workdir / '{}-ic.txt'.format(test)
+
+    with ofile.open('r', encoding=mock_tc.TCenc) as f:
+        output = f.read()
+
+    with icfile.open('r', encoding=mock_tc.TCenc) as f:
+        resic = f.read()
+
+    status, variance, pts, res, output = mock_tc.parse_logfile_new(output=output, resic=resic)
+    rows = list(res)
+
+    assert (res.column('g', 'mode') == [r['data']['g']['mode'] for r in rows]).all(), 'Wrong column'
+    assert list(res[10:20]) == rows[10:20], 'Wrong slice'
+    assert list(pickle.loads(pickle.dumps(res))) == rows, 'Wrong pickle roundtrip'
+    res.insert(1, rows[5])
+    assert res[1] == rows[5], 'Wrong insert'
+    res.rename_phase('g', 'gt')
+    assert res[0]['data']['gt'] == rows[0]['data']['g'], 'Wrong rename'
+    row = res[2]
+    row['data']['gt']['mode'] = -1.
+    row['ptguess'].append('% edited')
+    assert res.column('gt', 'mode')[2] == -1. and res.ptguesses[2].endswith('% edited'), 'Row edit not stored'
+    del res[0]
+    assert res[1] is row and res.column('gt', 'mode')[1] == -1., 'Row detached by removal'
+
+
+def test_result_table_empty_row():
+    res = ResultTable([dict(data=None, ptguess=None)])
+    assert res.data(0) == {} and res[0]['data'] == {}, 'Empty row data should be empty dict'
+    uni = UniLine(phases={'g', 'bi'}, out={'g'}, x=[500., 510.], y=[8., 9.], results=res[[0, 0]])
+    assert 'g' not in uni.data(), 'Line data should be empty dict'
+    res.set_value(0, 'g', 'mode', 0.1)
+    assert res[0]['data'] == {'g': {'mode': 0.1}}, 'Wrong set_value'
+
+
+def test_grid_set_result():
+    grid = GridData(pytest.ps, nx=3, ny=3)
+    for c, mode in enumerate([0.1, 0.2, 0.3]):
+        grid.set_result(0, c, dict(data={'g': {'mode': mode}}, ptguess=['ptguess']))
+    grid.set_result(0, 1, dict(data={'g': {'mode': 0.5}}, ptguess=['ptguess']))
+    assert len(grid.results) == 3, 'Recalculated point appended new row'
+    assert grid.get_result(0, 1)['data']['g']['mode'] == 0.5, 'Result not replaced'
+    grid.set_result(0, 0, None)
+    assert len(grid.results) == 2 and grid.get_result(0, 0) is None, 'Orphan row left'
+    assert [grid.get_result(0, c)['data']['g']['mode'] for c in (1, 2)] == [0.5, 0.3], 'Wrong index after removal'
+
+
+def test_compile_expr():
+    func = compile_expr('xMgX/(xFeX+xMgX)')
+    assert func is compile_expr('xMgX/(xFeX+xMgX)'), 'Expression not cached'
+    assert func.variables == {'xMgX', 'xFeX'}, 'Wrong variables'
+    dt = dict(xMgX=np.array([1., 3.]), xFeX=np.array([1., 1.]))
+    assert (func(dt) == [0.5, 0.75]).all(), 'Wrong vectorised evaluation'
+    assert eval_expr('-2*mode', dict(mode=0.25)) == -0.5, 'Wrong scalar evaluation'
+    with pytest.raises(TypeError):
+        compile_expr('mode.real')
+
+
+def test_field_index():
+    shapes = {frozenset([str(i)]): box(i % 5, i // 5, i % 5 + 1, i // 5 + 1) for i in range(20)}
+    index = FieldIndex(shapes)
+    assert index.identify(2.5, 1.5) == frozenset(['7']), 'Wrong field identified'
+    assert index.identify(-1, 1.5) is None, 'Point outside should give None'
+    keys = index.identify_many(np.array([2.5, -1, 4.5]), np.array([1.5, 1, 3.5]))
+    assert list(keys) == [frozenset(['7']), None, frozenset(['19'])], 'Wrong batch identification'
+
+
+def test_field_masks_overlap():
+    first, second = frozenset(['a']), frozenset(['b'])
+    index = FieldIndex({first: box(0, 0, 2, 2), second: box(1, 1, 3, 3)})
+    xg, yg = np.meshgrid(np.arange(0.5, 3), np.arange(0.5, 3))
+    masks = FieldMasks(index.labels(xg, yg), index.keys)
+    assert not np.any(masks[first] & masks[second]), 'Masks of overlapping fields not exclusive'
+    assert masks[first][1, 1] and not masks[second][1, 1], 'Overlap not assigned to first field'
+    assert np.count_nonzero(masks[first] | masks[second]) == 7, 'Overlapping fields not covered'
+    assert index.identify_many(xg, yg)[1, 1] == first, 'Masks inconsistent with identification'
+
+
+def test_grid_checkpoint(mock_tc, tmp_path):
+    with (mock_tc.workdir / 'inv1-log.txt').open('r', encoding=mock_tc.TCenc) as f:
+        output = f.read()
+    with (mock_tc.workdir / 'inv1-ic.txt').open('r', encoding=mock_tc.TCenc) as f:
+        resic = f.read()
+    status, variance, pts, res, output = mock_tc.parse_logfile_new(output=output, resic=resic)
+    projfile = tmp_path / 'test.ptb'
+    grid = GridData(pytest.ps, nx=4, ny=3)
+    with GridCheckpoint(projfile, grid) as ckpt:
+        ckpt.write(0, 1, res, 0.5)
+        ckpt.write(2, 3, res, 0.7)
+    # simulate interrupted write
+    with ckpt.filename.open('ab') as f:
+        f.write(b'\x80\x04\x95')
+    restored = GridData(pytest.ps, nx=4, ny=3)
+    ckpt = GridCheckpoint(projfile, restored)
+    assert ckpt.restore(restored) == 2, 'Wrong number of restored grid points'
+    assert restored.status[2, 3] == 1 and restored.delta[0, 1] == 0.5, 'Wrong restored status'
+    assert restored.get_result(2, 3)['data'] == res[0]['data'], 'Wrong restored result'
+    with ckpt:
+        ckpt.write(1, 1, res, 0.6)
+    assert GridCheckpoint(projfile, grid).restore(grid) == 3, 'Checkpoint not appended after truncation'
+    other = GridData(pytest.ps, nx=5, ny=3)
+    assert GridCheckpoint(projfile, other).restore(other) == 0, 'Checkpoint of different grid restored'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_runtc_timeout(fake_tc):
+    tc = fake_tc('exec sleep 10\n')
+    tc.timeouts['assemblage'] = 0.2
+    tcout, ans = tc.calc_assemblage(['g', 'bi', 'mu'], 8, 600)
+    assert tc.timedout, 'THERMOCALC not killed'
+    assert tc.runstats['timeouts'] == 1, 'Timeout not counted'
+    status, variance, pts, res, output = tc.parse_logfile()
+    assert status == 'timeout' and len(res) == 0, 'Wrong status of killed run'
+
+
+def test_grid_refinement():
+    shapes = {frozenset(['g', 'bi']): box(400, 7, 550.5, 16), frozenset(['g', 'st']): box(550.5, 7, 700, 16)}
+    index = FieldIndex(shapes)
+    grid = GridData(pytest.ps, nx=65, ny=33)
+    keys = index.identify_many(grid.xg, grid.yg)
+    quadtree = GridRefinement(grid, keys, index, 3)
+    nodes = quadtree.nodes()
+    while nodes:
+        for r, c in nodes:
+            if np.isnan(grid.status[r, c]):
+                x, y = grid.xg[r, c], grid.yg[r, c]
+                grid.set_result(r, c, dict(data={'g': {'mode': x / 1000 + y / 100}}, ptguess=None))
+                grid.status[r, c] = 1
+        nodes = quadtree.refine()
+    calculated = np.isfinite(grid.status)
+    assert calculated.sum() < grid.status.size / 2, 'Smooth fields over-refined'
+    boundary = np.flatnonzero(np.diff(grid.xspace > 550.5))[0]
+    assert calculated[:, boundary:boundary + 2].all(), 'Field boundary not refined'
+    assert quadtree.interpolate() == np.count_nonzero(~calculated), 'Skipped grid points not interpolated'
+    assert np.all(grid.status[~calculated] == 2), 'Wrong status of interpolated grid points'
+    mode = grid.results.column('g', 'mode')[grid.index]
+    assert np.allclose(mode, grid.xg / 1000 + grid.yg / 100), 'Wrong interpolated values'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_tc_cache(fake_tc, tmp_path):
+    tc = fake_tc('cat > input.txt\necho run >> calls.txt\ncp input.txt tc-log.txt\necho done\n')
+    for f in (tc.scriptfile, tc.axfile, tc.datasetfile, tc.prefsfile):
+        f.write_text('content')
+    cache = tc.enable_cache(tmp_path / 'cache')
+    for instr in ['a', 'b', 'a']:
+        assert tc.runtc(instr, cache=True) == 'done\n', 'Wrong output'
+        assert tc.logfile.read_text() == instr, 'Log file not restored'
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 2, 'Wrong cache statistics'
+    tc.scriptfile.write_text('modified')
+    tc.runtc('a', cache=True)
+    assert len((tmp_path / 'calls.txt').read_text().split()) == 3, 'Cached calculation executed'
+    cache.maxsize = 0
+    tc.runtc('c', cache=True)
+    assert len(cache) == 1 and cache.stats['evictions'] == 3, 'LRU eviction failed'
+
+
+def test_tc_cache_parsed(fake_tc, tmp_path):
+    tc = fake_tc('cat > /dev/null\n')
+    cache = tc.enable_cache(tmp_path / 'cache')
+    parsed = {}
+    for test in ['uni1', 'uni2', 'uni1']:
+        shutil.copy('examples/outputs/{}-log.txt'.format(test), str(tc.logfile))
+        shutil.copy('examples/outputs/{}-ic.txt'.format(test), str(tc.icfile))
+        status, variance, pts, res, output = tc.parse_logfile()
+        parsed.setdefault(test, []).append(pts)
+    assert cache.stats['parse_hits'] == 1 and cache.stats['parse_misses'] == 2, 'Wrong cache statistics'
+    assert cache.stats['hits'] == 0 and cache.stats['misses'] == 0, 'Parsing counted as runs'
+    assert parsed['uni1'][0].shape == parsed['uni1'][1].shape, 'Wrong cached results'
+    assert parsed['uni1'][0].shape != parsed['uni2'][0].shape, 'Results attached to other output'
+    # rewrite of same size within same modification time
+    st = tc.logfile.stat()
+    tc.logfile.write_bytes(tc.logfile.read_bytes().replace(b'ptguess', b'PTGUESS'))
+    os.utime(str(tc.logfile), ns=(st.st_atime_ns, st.st_mtime_ns))
+    tc.parse_logfile()
+    assert cache.stats['parse_misses'] == 3, 'Parsed results of previous output reused'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_async_session(fake_tc, tmp_path):
+    tc = fake_tc('cat > /dev/null\npwd\nexec sleep 0.2\n')
+
+    async def calc(session, phases):
+        wtc = await session.acquire()
+        try:
+            tcout, ans = await wtc.acalc_assemblage(phases, 8, 600)
+        finally:
+            session.release(wtc)
+        return tcout.strip()
+
+    async def main():
+        async with tc.asession(workers=3, basedir=tmp_path / 'workers') as session:
+            dirs = await asyncio.gather(*[calc(session, ['g', 'bi']) for i in range(6)])
+            return dirs, session.stats
+
+    dirs, stats = asyncio.run(main())
+    assert len(set(dirs)) == 3, 'Workers not used concurrently'
+    assert stats['calls'] == 6, 'Wrong session statistics'
+    tc.timeouts['assemblage'] = 0.05
+    asyncio.run(tc.acalc_assemblage(['g', 'bi'], 8, 600))
+    assert tc.timedout, 'THERMOCALC not killed'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_tcapi_initcache(tmp_path):
+    for f in Path('examples/avgpelite').iterdir():
+        shutil.copy(str(f), str(tmp_path))
+    exe = tmp_path / 'tc350'
+    exe.write_text('#!/bin/sh\ncat > /dev/null\necho run >> calls.txt\n'
+                   'echo "THERMOCALC 3.50 running at 12.00 on Mon 1 Jan,2020"\n'
+                   'echo "using tc-ds62.txt produced at 15.43 on Wed 7 Dec,2011"\n'
+                   'echo "phases ranging over:"\necho "choose from: q g bi mu"\n')
+    exe.chmod(0o755)
+
+    def calls():
+        return len((tmp_path / 'calls.txt').read_text().split())
+
+    tc = TCAPI(tmp_path)
+    assert tc.OK and not (tmp_path / 'calls.txt').exists(), 'THERMOCALC executed by opening project'
+    tc.calc_assemblage(['g', 'bi', 'mu'], 8, 600)
+    assert calls() == 2 and tc.phases == ['bi', 'g', 'mu', 'q'], 'THERMOCALC not checked by first calculation'
+    tc.update_scriptfile(guesses=['% guess', 'ptguess 8 600'])
+    cached = TCAPI(tmp_path, lazy=False)
+    assert calls() == 2, 'THERMOCALC executed for unchanged working directory'
+    assert cached.OK and cached.phases == tc.phases and cached.excess == tc.excess, 'Wrong cached check'
+    with tc.scriptfile.open('a', encoding=tc.TCenc) as f:
+        f.write('\n% modified\n')
+    stale = TCAPI(tmp_path)
+    assert stale.OK and calls() == 2, 'THERMOCALC executed by opening project'
+    assert stale.phases == tc.phases and calls() == 3, 'Modified scriptfile not checked'
+    assert TCAPI(tmp_path, initcache=False, lazy=False).OK and calls() == 4, 'Initial check not forced'
+
+
+def test_scriptfile(tmp_path):
+    path = tmp_path / 'tc-avgpelite.txt'
+    shutil.copy('examples/avgpelite/tc-avgpelite.txt', str(path))
+    original = path.read_text(encoding='mac-roman')
+    sc = Scriptfile(path)
+    assert sc.render() == original, 'Scriptfile not rendered back'
+    assert not sc.write(), 'Unchanged scriptfile written'
+    sc.guesses = ['ptguess 8 600']
+    sc.set_bulk([['1', '2', '3']])
+    assert sc.write(), 'Changed scriptfile not written'
+    assert sc.guesses == ['ptguess 8 600'] and 'setbulk yes 1 2 3\n' in path.read_text(encoding='mac-roman')
+    path.write_text(original.replace('{PSBGUESS-BEGIN}\n', '{PSBGUESS-BEGIN}\nptguess 9 650\n'), encoding='mac-roman')
+    assert 'ptguess 9 650' in sc.guesses, 'Modified scriptfile not reloaded'
+    worker = sc.copy(tmp_path / 'worker.txt')
+    worker.guesses = []
+    assert worker.write() and 'ptguess 9 650' in sc.guesses, 'Worker copy not independent'
+    assert sc.write(path=sc.path), 'Scriptfile not written to own path'
+    # edit of same size within same modification time
+    st = path.stat()
+    path.write_text(path.read_text(encoding='mac-roman').replace('ptguess 9 650', 'ptguess 9 651'), encoding='mac-roman')
+    os.utime(str(path), ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert 'ptguess 9 651' in sc.guesses, 'Modified scriptfile not reloaded'
+
+
+def test_parse_assemblages(fake_tc):
+    tc = fake_tc('cat > /dev/null\n')
+    shutil.copy('examples/outputs/uni1-log.txt', str(tc.logfile))
+    shutil.copy('examples/outputs/uni1-ic.txt', str(tc.icfile))
+    points = [(6.748, 500.885), (7, 500), (6.55, 498.66), (6.946, 503.078)]
+    results = tc.parse_assemblages(points)
+    assert results[1] is None, 'Point without solution matched'
+    status, variance, pts, allres, output = tc.parse_logfile()
+    for res, ix in zip([results[0], results[2], results[3]], [1, 0, 2]):
+        assert len(res) == 1, 'Wrong number of results'
+        assert res[0] == allres[ix], 'Result assigned to wrong point'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_transcript_replay(tmp_path):
+    rec, rep = tmp_path / 'rec', tmp_path / 'rep'
+    shutil.copytree('examples/avgpelite', str(rec))
+    shutil.copytree('examples/avgpelite', str(rep))
+    exe = rec / 'tc350'
+    exe.write_text('#!/bin/sh\ncat > tc-log.txt\ncp tc-log.txt tc-avgpelite-ic.txt\n'
+                   'echo "THERMOCALC 3.50 running at 12.00 on Mon 1 Jan,2020"\n'
+                   'echo "using tc-ds62.txt produced at 15.43 on Wed 7 Dec,2011"\n'
+                   'echo "phases ranging over:"\necho "choose from: q g bi mu"\n')
+    exe.chmod(0o755)
+    tc = TCAPI(rec, initcache=False)
+    transcript = tc.record(tmp_path / 'transcript')
+    tcout, ans = tc.calc_assemblage(['g', 'bi'], 8, 600)
+    assert len(transcript) == 2, 'Runs not recorded'
+    transcript.install(rep)
+    rtc = TCAPI(rep, initcache=False)
+    assert rtc.OK and rtc.phases == tc.phases, rtc.status
+    assert rtc.calc_assemblage(['g', 'bi'], 8, 600)[0] == tcout, 'Wrong replayed output'
+    assert rtc.icfile.read_bytes() == tc.icfile.read_bytes(), 'Wrong replayed ic file'
+    assert rtc.runtc('unknown\n').startswith('No recorded THERMOCALC run'), 'Unknown input replayed'
+
+
+def test_synthetic_section():
+    ps = synthetic_section(nx=4, ny=3, npts=10)
+    assert len(ps.unilines) == 17 and len(ps.invpoints) == 6, 'Wrong synthetic topology'
+    shapes, unilists, log = ps.create_shapes()
+    assert not log, 'Invalid synthetic fields'
+    assert set(shapes) == {frozenset(field_phases(r, c)) for r in range(3) for c in range(4)}, 'Wrong fields'
+
+
+def test_timer(tmp_path):
+    timer = TCTimer()
+    timer.start_run()
+    timer.field = 'bi g q'
+    for name in ['wait', 'parse', 'wait']:
+        with timer.span(name):
+            pass
+    assert timer.summary()['wait']['count'] == 2, 'Wrong span aggregation'
+    assert list(timer.summary(by='field')['bi g q']) == ['wait', 'parse'], 'Wrong field aggregation'
+    assert not pickle.loads(pickle.dumps(timer)).events, 'Spans copied to worker'
+    timer.to_chrome_trace(tmp_path / 'trace.json')
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert [e['name'] for e in events] == ['wait', 'parse', 'wait'] and events[0]['ph'] == 'X', 'Wrong trace'
+    assert not timer.summary(run=2), 'Spans of other run included'
+
+
+def test_guess_index():
+    ps = synthetic_section(nx=4, ny=3, npts=10)
+    shapes, unilists, log = ps.create_shapes()
+    index = GuessIndex(ps, unilists)
+    key = frozenset(field_phases(1, 2))
+    for x, y in [(410., 2.5), (555., 7.), (690., 11.9)]:
+        d2 = {i: (inv._x - x)**2 + (ps.ratio * (inv._y - y))**2 for i, inv in ps.invpoints.items()}
+        assert index.nearest_inv(x, y) == min(d2, key=d2.get), 'Wrong nearest invariant point'
+        d2 = {(i, v): (uni._x[v] - x)**2 + (ps.ratio * (uni._y[v] - y))**2
+              for i in unilists[key] for uni in [ps.unilines[i]] for v in np.arange(len(uni._x))[uni.used]}
+        assert index.nearest_uni(x, y, key) == min(d2, key=d2.get), 'Wrong nearest univariant line point'
+    invs = {ps.unilines[i].begin for i in unilists[key]} | {ps.unilines[i].end for i in unilists[key]}
+    assert index.nearest_inv(400., 2., key) in invs, 'Field restriction ignored'
+
+
+def test_fix_solutions(synthetic_pt, monkeypatch):
+    grid = synthetic_pt.grids[0]
+    keys = synthetic_pt.identify_many(grid.xg, grid.yg)
+    # (4, 5) is solved only from (4, 6), corner (0, 0) is never solved
+    first, second, corner = (4, 5), (4, 6), (0, 0)
+    sources = {grid.ptguess(r, c)[0]: (r, c) for r, c in np.ndindex(grid.xg.shape)}
+    for r, c in (first, second, corner):
+        grid.set_result(r, c, None)
+        grid.status[r, c] = 0
+    calls = []
+
+    def fake_nodes(tc, tasks, chain=1):
+        for r, c, phases, p, t, guesses in tasks:
+            used = [sources[g[0]] for g in guesses]
+            calls.append(((r, c), used))
+            if (r, c) == second or ((r, c) == first and second in used):
+                yield r, c, composition(phases, t, p), 0.1, 1, 0
+            else:
+                yield r, c, None, 0.1, 0, None
+
+    monkeypatch.setattr(psexplorer, 'iter_grid_nodes', fake_nodes)
+    residuals = synthetic_pt.fix_solutions()
+    assert [node for node, used in calls] == [first, second, corner, first], 'Wrong priority or requeue order'
+    assert calls[-1][1] == [second], 'Requeued point tried with already used neighbours'
+    assert calls[2][1][0] in grid.neighs(*corner) and len(calls[2][1]) == 3, 'Wrong neighbours of corner point'
+    assert grid.status[first] == 1 and grid.status[second] == 1, 'Failed points not fixed'
+    assert residuals == {0: {keys[corner]: 1}}, 'Wrong residual failures of fields'
+
+
+def test_grid_continuation():
+    ps = synthetic_section(nx=3, ny=2, npts=10)
+    shapes, unilists, log = ps.create_shapes()
+    grid = GridData(ps, nx=15, ny=10)
+    keys = FieldIndex(shapes).identify_many(grid.xg, grid.yg)
+    wavefront = GridContinuation(grid, keys, GuessIndex(ps, unilists))
+    nodes, seeds = wavefront.nodes(), 0
+    while nodes:
+        for r, c in nodes:
+            if (r, c) in wavefront.sources:
+                assert keys[wavefront.sources[(r, c)]] == keys[r, c], 'Neighbour from other field'
+            else:
+                seeds += 1
+            grid.status[r, c] = 1
+        nodes = wavefront.nodes()
+    assert seeds == len(wavefront.fields), 'Wrong number of seeds'
+    assert np.all(grid.status[keys != None] == 1), 'Grid points not calculated'
+
+
+def test_grid_axes(px_tc):
+    grid = GridData(PXsection(prange=(4., 10.)), nx=3, ny=4)
+    with pytest.raises(TypeError):
+        GridAxes(px_tc, grid)
+    axes = PXGridAxes(px_tc, grid)
+    r, c, phases, p, t, guesses, bulk = axes.task(1, 2, {'g'}, [])
+    assert t == 500 and p == grid.yg[1, 2], 'Wrong P-X mapping'
+    assert bulk == px_tc.interpolate_bulk(grid.xspace[2]), 'Wrong bulk of column'
+    assert sorted(np.ndindex(grid.xg.shape), key=axes.order)[:4] == [(0, 0), (1, 0), (2, 0), (3, 0)], 'Wrong order'
+
+
+def test_dogmin_survey():
+    xspace, yspace = np.linspace(400, 600, 5), np.linspace(2, 10, 4)
+    dogmins = {}
+    for r, c in np.ndindex(4, 5):
+        if (r, c) != (0, 0):
+            phases = 'q ' + ('g' if c > 2 else 'chl') + (' ky' if r > 1 else ' bi')
+            output = '#' * 58 + '\nphases: {} (gmin = -1)\n'.format(phases)
+            dogmins[(r, c)] = Dogmin(output=output, resic=output, x=xspace[c], y=yspace[r])
+    survey = DogminSurvey(xspace, yspace, dogmins)
+    assert len(survey.keys) == 4 and survey.labels[0, 0] == -1, 'Wrong labels'
+    assert sum(survey.counts().values()) == 19, 'Wrong counts'
+    x, y, keys = survey.invariant_candidates()[0]
+    assert (x, y, len(keys)) == (525., 6., 4), 'Wrong invariant point candidate'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_explore_uni(fake_tc):
+    outputs = Path('./examples/outputs').resolve()
+    tc = fake_tc('cat > /dev/null\ncp "{0}/inv1-log.txt" tc-log.txt\n'
+                 'cp "{0}/inv1-ic.txt" tc-test-ic.txt\n'.format(outputs))
+    tc.scriptfile.write_text('axfile ax\n%{PSBGUESS-BEGIN}\nptguess 8 600\n%{PSBGUESS-END}\n*\n')
+    tc.phases, tc.excess = ['g', 'bi', 'chl', 'q', 'H2O', 'ky'], {'q', 'H2O'}
+    tc.prange, tc.trange = (7, 16), (400, 700)
+    streamed = []
+    found = tc.explore_uni({'g', 'bi', 'chl', 'q', 'H2O'}, {'chl'}, workers=3,
+                           callback=lambda *args: streamed.append(args))
+    assert {frozenset(out) for phases, out, res in found} == {frozenset({'chl', 'g'}), frozenset({'chl', 'bi'}),
+                                                              frozenset({'chl', 'ky'})}, 'Wrong candidates'
+    assert len(streamed) == 3 and all(res[0] == 'ok' for phases, out, res in streamed), 'Candidates not streamed'
+    # staged pool is reused and synchronized with guesses of search
+    with tc.session(workers=2) as pool:
+        assert np.isnan(pool.stats['startup']), 'Workers probed by default'
+        assert pool.probe() > 0 and pool.stats['calls'] == 0, 'Probe runs counted'
+        tc.explore_uni({'g', 'bi', 'chl', 'q', 'H2O'}, {'chl'}, pool=pool, guesses=['ptguess 9 650'])
+        assert all(wtc.script.guesses == ['ptguess 9 650'] for wtc in pool.workers), 'Workers not synchronized'
+        tc.explore_uni({'g', 'bi', 'chl', 'q', 'H2O'}, {'chl'}, pool=pool)
+        assert pool.stats['calls'] == 6, 'Pool not reused'
+        assert all(wtc.script.guesses == ['ptguess 8 600'] for wtc in pool.workers), 'Workers not synchronized'
+    assert tc.script.guesses == ['ptguess 8 600'], 'Guesses not restored'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='requires POSIX shell')
+def test_dogmin_survey_timeout(fake_tc):
+    # every run leaves valid dogmin output, but dogmin itself hangs
+    tc = fake_tc('read variance\ncat > /dev/null\n'
+                 'printf "%058d\\nphases: q g bi (gmin = -1)\\n" 0 | tr 0 "#" > tc-log.txt\n'
+                 'cp tc-log.txt tc-test-ic.txt\n'
+                 '[ "$variance" = "4" ] && exec sleep 10\n')
+    tc.scriptfile.write_text('axfile ax\n%{PSBDOGMIN-BEGIN}\ndogmin no\n%{PSBDOGMIN-END}\n*\n')
+    tc.phases, tc.excess = ['q', 'g', 'bi'], set()
+    tc.trange, tc.prange = (400, 600), (2, 10)
+    tc.timeouts['dogmin'] = 0.2
+    survey = tc.dogmin_survey(nx=2, ny=1, workers=1)
+    assert not survey.dogmins, 'Killed dogmin labelled by stale output'
+    assert tc.scriptfile.read_text().splitlines()[2] == 'dogmin no', 'Dogmin block not restored'
+
+
+def test_run_coroutine():
+    async def value():
+        return 42
+
+    async def nested():
+        return run_coroutine(value())
+    assert run_coroutine(nested()) == 42, 'Coroutine not run within running loop'
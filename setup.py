@@ -31,7 +31,7 @@ setup(
     author_email='lexa.ondrej@gmail.com',
     url='https://github.com/ondrolexa/pypsbuilder',
     license="MIT",
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     packages=find_packages(),
     package_data={'pypsbuilder.images': ['*.png']},
     entry_points="""
@@ -43,6 +43,8 @@ setup(
     psiso=pypsbuilder.psexplorer:ps_iso
     psgrid=pypsbuilder.psexplorer:ps_grid
     psdrawpd=pypsbuilder.psexplorer:ps_drawpd
+    psdogmin=pypsbuilder.psexplorer:ps_dogmin
+    psbench=pypsbuilder.benchmarks.suite:main
     """,
     install_requires=requirements,
     zip_safe=False,